@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 from typing import Any, Optional
 import logging
@@ -5,6 +6,11 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+def apptainer_bin() -> str:
+    """The apptainer executable; `APPTAINER_BIN` can point to a stand-in."""
+    return os.getenv("APPTAINER_BIN", "apptainer")
+
+
 class ApptainerServiceConfig:
     """Configuration for an Apptainer service."""
 
@@ -73,7 +79,7 @@ class ApptainerServiceConfig:
     def get_start_command(
         self, instance_name: str, env_vars: dict[str, Any]
     ) -> list[str]:
-        cmd = ["apptainer", "instance", "start"]
+        cmd = [apptainer_bin(), "instance", "start"]
         for env_var, value in env_vars.items():
             cmd.extend(["--env", f"{env_var}={value}"])
 
@@ -83,4 +89,4 @@ class ApptainerServiceConfig:
 
     @staticmethod
     def get_stop_command(instance_name: str) -> list[str]:
-        return ["apptainer", "instance", "stop", instance_name]
+        return [apptainer_bin(), "instance", "stop", instance_name]
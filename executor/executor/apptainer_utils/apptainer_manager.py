@@ -1,10 +1,19 @@
+from concurrent.futures import ThreadPoolExecutor
+import fcntl
 import logging
-from pathlib import Path
+import os
+from pathlib import Path, PurePosixPath
 import random
 import socket
 import subprocess
+import tempfile
+import threading
 import time
-from typing import Any, Optional
+from typing import Any, Optional, TextIO
+import zlib
+
+import grpc
+from sbsvf_api import av_server_pb2_grpc, empty_pb2, sim_server_pb2_grpc
 
 from executor.utils import resolve_host_path
 from executor.apptainer_utils.apptainer_config import ApptainerServiceConfig
@@ -12,18 +21,77 @@ from executor.apptainer_utils.apptainer_config import ApptainerServiceConfig
 logger = logging.getLogger(__name__)
 
 
+# Ports handed out to instances of this process that may not be bound yet.
+_reserved_ports: set[int] = set()
+_port_lock = threading.Lock()
+
+
 def find_free_port(start_port: int = 8000, max_attempts: int = 100) -> Optional[int]:
-    for _ in range(max_attempts):
-        port = random.randint(start_port, start_port + 2000)
-        try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-                sock.bind(("", port))
-                return port
-        except OSError:
-            continue
+    with _port_lock:
+        for _ in range(max_attempts):
+            port = random.randint(start_port, start_port + 2000)
+            if port in _reserved_ports:
+                continue
+            try:
+                with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+                    sock.bind(("", port))
+                    _reserved_ports.add(port)
+                    return port
+            except OSError:
+                continue
     return None
 
 
+def release_ports(ports: list[int]) -> None:
+    with _port_lock:
+        _reserved_ports.difference_update(ports)
+
+
+def _runtime_ports(runtime_envs: dict[str, int]) -> list[int]:
+    return [port for key, port in runtime_envs.items() if key.endswith("PORT")]
+
+
+# ROS 2 on Linux only supports domain IDs 0-101 with the default port ranges.
+ROS_DOMAIN_ID_COUNT = 102
+
+# Lock files of the domain IDs this process holds, kept open until it exits.
+_ros_domain_locks: dict[int, TextIO] = {}
+
+
+def reserve_ros_domain_id(preferred: int = 0) -> int:
+    """
+    Reserve a ROS domain ID that no other executor on this node uses, trying
+    `preferred` first. Each ID is held by an flock on a node-local file in
+    $SBSVF_LOCK_DIR (the temp dir by default), which the kernel releases when
+    the process exits, so a crashed executor never keeps one.
+    """
+    lock_dir = Path(os.getenv("SBSVF_LOCK_DIR", tempfile.gettempdir()))
+    with _port_lock:
+        for offset in range(ROS_DOMAIN_ID_COUNT):
+            domain_id = (preferred + offset) % ROS_DOMAIN_ID_COUNT
+            if domain_id in _ros_domain_locks:
+                continue
+            lock_path = lock_dir / f"sbsvf-ros-domain-{domain_id}.lock"
+            try:
+                lock_file = open(lock_path, "a")
+            except OSError as exc:
+                logger.warning(
+                    "Cannot lock ROS domain IDs in %s (%s); using %d unreserved",
+                    lock_dir,
+                    exc,
+                    preferred % ROS_DOMAIN_ID_COUNT,
+                )
+                return preferred % ROS_DOMAIN_ID_COUNT
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                continue
+            _ros_domain_locks[domain_id] = lock_file
+            return domain_id
+    raise RuntimeError("All ROS domain IDs of this node are in use")
+
+
 class ApptainerServiceManager:
     """Start/stop Apptainer services for simulator and av."""
 
@@ -34,16 +102,37 @@ class ApptainerServiceManager:
     SCENARIO_CONTAINER_PATH = "/mnt/scenario"
     OUTPUT_CONTAINER_PATH = "/mnt/output"
 
-    def __init__(self, id: str):
+    READY_STUBS = {
+        "av": av_server_pb2_grpc.AvServerStub,
+        "simulator": sim_server_pb2_grpc.SimServerStub,
+    }
+    # Keep gRPC reconnect attempts short while a service is booting.
+    READY_CHANNEL_OPTIONS = [
+        ("grpc.initial_reconnect_backoff_ms", 50),
+        ("grpc.min_reconnect_backoff_ms", 50),
+        ("grpc.max_reconnect_backoff_ms", 1000),
+    ]
+
+    def __init__(self, id: str, ros_domain_id: Optional[int] = None):
         self.id = id
+        self.ros_domain_id = ros_domain_id
         self.running_instances: dict[str, dict[str, int]] = {}
         self.component_to_instance: dict[str, str] = {}
 
+        self._lock = threading.Lock()
+        self._teardown: Optional[threading.Thread] = None
+
     def _resolve_ros_domain_id(self) -> int:
-        try:
-            return int(self.id[-2:])
-        except ValueError:
-            return abs(hash(self.id)) % 232
+        if self.ros_domain_id is None:
+            # Prefer the historical ID of the manager, the last two digits of
+            # the job ID, so that a job alone on its node keeps its domain.
+            try:
+                preferred = int(self.id[-2:])
+            except ValueError:
+                preferred = zlib.crc32(self.id.encode("utf-8"))
+            self.ros_domain_id = reserve_ros_domain_id(preferred)
+            logger.info("Using ROS domain ID %d for %s", self.ros_domain_id, self.id)
+        return self.ros_domain_id
 
     @staticmethod
     def _run_command(
@@ -72,6 +161,7 @@ class ApptainerServiceManager:
                     carla_port = candidate_port
                     break
             if carla_port is None:
+                release_ports([service_port])
                 return None
             runtime_envs["CARLA_PORT"] = carla_port
 
@@ -100,17 +190,76 @@ class ApptainerServiceManager:
 
         return str(resolved_path)
 
-    def _wait_for_service_start(self, port: int, timeout: int = 30) -> bool:
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-                result = sock.connect_ex(("localhost", port))
-                if result == 0:
-                    logger.info("Service on port %s is up", port)
+    @classmethod
+    def scenario_container_path(cls, scenario_spec: dict[str, Any]) -> str:
+        """
+        Container path of the task's scenario. With a `scenario_root` the root
+        is bound instead of the scenario, which must then lie below it.
+        """
+        root = scenario_spec.get("scenario_root")
+        if not root:
+            return cls.SCENARIO_CONTAINER_PATH
+        scenario_host = Path(resolve_host_path(scenario_spec.get("scenario_path")))
+        try:
+            relative = scenario_host.relative_to(resolve_host_path(root))
+        except ValueError:
+            raise ValueError(
+                f"Scenario {scenario_host} is not below the scenario root {root}"
+            ) from None
+        return str(PurePosixPath(cls.SCENARIO_CONTAINER_PATH) / relative.as_posix())
+
+    def _wait_for_service_ready(
+        self,
+        component_kind: str,
+        port: int,
+        timeout: float = 300.0,
+    ) -> bool:
+        """
+        Wait until the service answers a gRPC `Ping`, retrying with exponential
+        backoff until `timeout` seconds have passed.
+        """
+        stub_class = self.READY_STUBS.get(component_kind)
+        if stub_class is None:
+            raise ValueError(f"Unknown component kind: {component_kind}")
+
+        deadline = time.monotonic() + timeout
+        delay = 0.05
+        with grpc.insecure_channel(
+            f"localhost:{port}", options=self.READY_CHANNEL_OPTIONS
+        ) as channel:
+            stub = stub_class(channel)
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    stub.Ping(
+                        empty_pb2.Empty(),
+                        timeout=min(remaining, 5.0),
+                        wait_for_ready=True,
+                    )
+                    logger.info(
+                        "%s service on port %s is ready after %.2f s",
+                        component_kind,
+                        port,
+                        timeout - remaining,
+                    )
                     return True
-            time.sleep(1)
+                except grpc.RpcError as exc:
+                    logger.debug(
+                        "%s service on port %s not ready: %s",
+                        component_kind,
+                        port,
+                        exc.code().name,
+                    )
+                time.sleep(min(delay, max(deadline - time.monotonic(), 0.0)))
+                delay = min(delay * 2, 1.0)
+
         logger.error(
-            "Service on port %s did not start within %s seconds", port, timeout
+            "%s service on port %s did not become ready within %s seconds",
+            component_kind,
+            port,
+            timeout,
         )
         return False
 
@@ -140,6 +289,7 @@ class ApptainerServiceManager:
         allocated_port = runtime_envs["PORT"]
         service_name = f"{component_name}-{self.id}-{allocated_port}"
 
+        registered = False
         try:
             command = config.get_start_command(service_name, start_envs)
             logger.info("Running command: %s", " ".join(command))
@@ -148,30 +298,47 @@ class ApptainerServiceManager:
                 logger.error("Failed to start Apptainer instance: %s", proc.stderr)
                 return None
 
-            self._wait_for_service_start(allocated_port)
+            with self._lock:
+                self.running_instances[service_name] = runtime_envs
+                self.component_to_instance[f"{component_kind}:{component_name}"] = (
+                    service_name
+                )
+            registered = True
+
+            startup_timeout = float(component_spec.get("startup_timeout", 300.0))
+            if not self._wait_for_service_ready(
+                component_kind, allocated_port, timeout=startup_timeout
+            ):
+                return None
 
             service_url = f"localhost:{allocated_port}"
             logger.info("%s service available at: %s", component_kind, service_url)
 
-            self.running_instances[service_name] = runtime_envs
-            self.component_to_instance[f"{component_kind}:{component_name}"] = (
-                service_name
-            )
-
             return {
                 "url": service_url,
                 "service_name": service_name,
             }
         except Exception as exc:
             logger.exception("Failed to start Apptainer service: %s", exc)
+            return None
+        finally:
+            # Registered instances release their ports once they are stopped.
+            if not registered:
+                release_ports(_runtime_ports(runtime_envs))
 
     def start(
         self,
         services_spec: dict[str, Any],
         output_dir: str,
     ) -> dict[str, dict[str, Any]]:
-        av_spec = dict(services_spec.get("av", {}))
-        simulator_spec = dict(services_spec.get("simulator", {}))
+        # Ports and the ROS domain of a previous task may still be held by
+        # instances that are being stopped.
+        self.wait_for_teardown()
+
+        # Without an "av" entry only the simulator is started (replay mode).
+        service_names = [name for name in ("av", "simulator") if name in services_spec]
+        if "simulator" not in service_names:
+            raise ValueError("services_spec has no 'simulator' entry")
         map_spec = dict(services_spec.get("map", {}))
         scenario_spec = dict(services_spec.get("scenario", {}))
 
@@ -189,6 +356,12 @@ class ApptainerServiceManager:
             spec=scenario_spec,
             key="scenario_path",
         )
+        if scenario_spec.get("scenario_root"):
+            scenario_host = self._require_existing_path_from_spec(
+                spec=scenario_spec,
+                key="scenario_root",
+            )
+        scenario_container_path = self.scenario_container_path(scenario_spec)
 
         output_host = str(Path(output_dir).resolve())
         Path(output_host).mkdir(parents=True, exist_ok=True)
@@ -200,25 +373,24 @@ class ApptainerServiceManager:
             (output_host, self.OUTPUT_CONTAINER_PATH),
         ]
 
-        av_bind_mounts = list(av_spec.get("bind_mounts", [])) + shared_bind_mounts
-        av_service_config = dict(av_spec)
-        av_service_config["bind_mounts"] = av_bind_mounts
-        av_service_info = self._start_one_service(
-            "av",
-            av_service_config,
-        )
+        service_configs: dict[str, dict[str, Any]] = {}
+        for name in service_names:
+            service_spec = dict(services_spec.get(name, {}))
+            service_config = dict(service_spec)
+            service_config["bind_mounts"] = (
+                list(service_spec.get("bind_mounts", [])) + shared_bind_mounts
+            )
+            service_configs[name] = service_config
 
-        simulator_bind_mounts = (
-            list(simulator_spec.get("bind_mounts", [])) + shared_bind_mounts
-        )
-        simulator_service_config = dict(simulator_spec)
-        simulator_service_config["bind_mounts"] = simulator_bind_mounts
-        simulator_service_info = self._start_one_service(
-            "simulator",
-            simulator_service_config,
-        )
+        # The services boot independently, so start them concurrently.
+        with ThreadPoolExecutor(max_workers=len(service_configs)) as pool:
+            futures = {
+                name: pool.submit(self._start_one_service, name, config)
+                for name, config in service_configs.items()
+            }
+            service_infos = {name: future.result() for name, future in futures.items()}
 
-        if simulator_service_info is None or av_service_info is None:
+        if any(info is None for info in service_infos.values()):
             logger.error("Failed to start required services. Stopping all services.")
             self.stop_all_services()
             raise RuntimeError("Failed to start required services.")
@@ -228,42 +400,67 @@ class ApptainerServiceManager:
                 "xodr_path": self.MAP_CONTAINER_PATHS["xodr_path"],
                 "osm_path": self.MAP_CONTAINER_PATHS["osm_path"],
             },
-            "scenario_path": self.SCENARIO_CONTAINER_PATH,
+            "scenario_path": scenario_container_path,
             "output_path": self.OUTPUT_CONTAINER_PATH,
         }
 
         started_specs: dict[str, dict[str, Any]] = {
-            "av": {
-                "service_info": {
-                    "url": av_service_info.get("url") if av_service_info else None
-                },
+            name: {
+                "service_info": {"url": info.get("url")},
                 **dict(base_started_spec),
-            },
-            "simulator": {
-                "service_info": {
-                    "url": (
-                        simulator_service_info.get("url")
-                        if simulator_service_info
-                        else None
-                    )
-                },
-                **dict(base_started_spec),
-            },
+            }
+            for name, info in service_infos.items()
         }
         return started_specs
 
-    def stop_all_services(self):
-        for service_name in list(self.running_instances.keys()):
-            command = ApptainerServiceConfig.get_stop_command(service_name)
-            logger.info("Stopping Apptainer instance: %s", service_name)
-            try:
-                proc = self._run_command(command)
-                if proc.returncode != 0:
-                    logger.error("Failed to stop Apptainer instance: %s", proc.stderr)
-            except Exception as exc:
-                logger.error(
-                    "Failed to stop Apptainer instance %s: %s", service_name, exc
-                )
+    def _stop_instance(self, service_name: str) -> None:
+        command = ApptainerServiceConfig.get_stop_command(service_name)
+        logger.info("Stopping Apptainer instance: %s", service_name)
+        try:
+            proc = self._run_command(command)
+            if proc.returncode != 0:
+                logger.error("Failed to stop Apptainer instance: %s", proc.stderr)
+        except Exception as exc:
+            logger.error("Failed to stop Apptainer instance %s: %s", service_name, exc)
+
+    def _stop_instances(self, instances: dict[str, dict[str, int]]) -> None:
+        if not instances:
+            return
+        with ThreadPoolExecutor(max_workers=len(instances)) as pool:
+            list(pool.map(self._stop_instance, instances.keys()))
+        release_ports(
+            [
+                port
+                for runtime_envs in instances.values()
+                for port in _runtime_ports(runtime_envs)
+            ]
+        )
+
+    def stop_all_services(self, wait: bool = True):
+        """
+        Stop all running instances concurrently. With `wait=False` the
+        instances are stopped in a background thread; `start` and
+        `wait_for_teardown` wait for it to finish.
+        """
+        with self._lock:
+            instances = dict(self.running_instances)
+            self.running_instances.clear()
+            self.component_to_instance.clear()
+
+        self.wait_for_teardown()
+        if wait:
+            self._stop_instances(instances)
+            return
+
+        self._teardown = threading.Thread(
+            target=self._stop_instances,
+            args=(instances,),
+            name=f"teardown-{self.id}",
+            daemon=True,
+        )
+        self._teardown.start()
 
-        self.running_instances.clear()
-        self.component_to_instance.clear()
+    def wait_for_teardown(self) -> None:
+        if self._teardown is not None:
+            self._teardown.join()
+            self._teardown = None
@@ -0,0 +1,210 @@
+"""
+Stand-in for the `apptainer` executable, for lifecycle tests without images.
+
+Point `APPTAINER_BIN` at the script written by `install_fake_apptainer`. It
+understands the commands `ApptainerServiceManager` runs:
+
+    apptainer instance start [--env K=V]... [--bind SRC:DST]... [--nv] IMAGE NAME
+    apptainer instance stop NAME
+    apptainer instance list
+
+An image is a JSON file written by `write_fake_image`, naming the fake
+service to run (see `executor.bench.fake_services`) and its timing:
+
+    {"kind": "simulator", "config": {...}, "boot_delay_s": 2.0,
+     "start_delay_s": 0.5, "stop_delay_s": 0.2}
+
+`instance start` returns after `start_delay_s`, like apptainer returning once
+the container is up; the service inside answers `Ping` after another
+`boot_delay_s`. Instances are detached processes tracked by pid files in
+`$FAKE_APPTAINER_STATE`.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+import signal
+import stat
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Optional
+
+
+def state_dir() -> Path:
+    default = Path(tempfile.gettempdir()) / f"fake-apptainer-{os.getuid()}"
+    path = Path(os.getenv("FAKE_APPTAINER_STATE", default))
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def write_fake_image(
+    path: Path,
+    kind: str,
+    config: Optional[dict[str, Any]] = None,
+    boot_delay_s: float = 0.0,
+    start_delay_s: float = 0.0,
+    stop_delay_s: float = 0.0,
+) -> Path:
+    path = Path(path)
+    path.write_text(
+        json.dumps(
+            {
+                "kind": kind,
+                "config": config or {},
+                "boot_delay_s": boot_delay_s,
+                "start_delay_s": start_delay_s,
+                "stop_delay_s": stop_delay_s,
+            }
+        )
+    )
+    return path
+
+
+def install_fake_apptainer(bin_dir: Path) -> Path:
+    """Write an `apptainer` script running this module; returns its path."""
+    bin_dir = Path(bin_dir)
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    root = Path(__file__).resolve().parents[2]
+    script = bin_dir / "apptainer"
+    script.write_text(
+        "#!/bin/sh\n"
+        f'PYTHONPATH="{root}${{PYTHONPATH:+:$PYTHONPATH}}" '
+        f'exec "{sys.executable}" -m executor.bench.fake_apptainer "$@"\n'
+    )
+    script.chmod(script.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return script
+
+
+def _pid_file(name: str) -> Path:
+    return state_dir() / f"{name}.pid"
+
+
+def _read_instance(pid_file: Path) -> dict[str, Any]:
+    return json.loads(pid_file.read_text())
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _fail(message: str) -> int:
+    print(f"FATAL:   {message}", file=sys.stderr)
+    return 255
+
+
+def instance_start(argv: list[str]) -> int:
+    envs: dict[str, str] = {}
+    positional: list[str] = []
+    args = iter(argv)
+    for arg in args:
+        if arg == "--env":
+            key, _, value = next(args).partition("=")
+            envs[key] = value
+        elif arg == "--bind":
+            source = next(args).split(":", 1)[0]
+            if not Path(source).exists():
+                return _fail(f"bind source {source} does not exist")
+        elif arg.startswith("-"):
+            continue  # --nv and other flags without a value
+        else:
+            positional.append(arg)
+    if len(positional) != 2:
+        return _fail("usage: instance start [options] IMAGE NAME")
+    image_path, name = positional
+
+    try:
+        image = json.loads(Path(image_path).read_text())
+    except (OSError, ValueError) as exc:
+        return _fail(f"could not open image {image_path}: {exc}")
+
+    pid_file = _pid_file(name)
+    if pid_file.exists() and _alive(_read_instance(pid_file)["pid"]):
+        return _fail(f"instance {name} already exists")
+
+    command = [
+        sys.executable,
+        "-m",
+        "executor.bench.fake_services",
+        image["kind"],
+        "--config",
+        json.dumps(image.get("config") or {}),
+        "--boot-delay",
+        str(image.get("boot_delay_s", 0.0)),
+    ]
+    if "PORT" in envs:
+        command += ["--port", envs["PORT"]]
+    with open(state_dir() / f"{name}.log", "ab") as log:
+        proc = subprocess.Popen(
+            command,
+            env={**os.environ, **envs},
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+            start_new_session=True,
+        )
+    pid_file.write_text(
+        json.dumps({"pid": proc.pid, "stop_delay_s": image.get("stop_delay_s", 0.0)})
+    )
+    time.sleep(float(image.get("start_delay_s", 0.0)))
+    if proc.poll() is not None:
+        pid_file.unlink(missing_ok=True)
+        return _fail(f"instance {name} exited with {proc.returncode}")
+    print("INFO:    instance started successfully")
+    return 0
+
+
+def instance_stop(argv: list[str], timeout: float = 10.0) -> int:
+    if len(argv) != 1:
+        return _fail("usage: instance stop NAME")
+    name = argv[0]
+    pid_file = _pid_file(name)
+    if not pid_file.exists():
+        return _fail(f"no instance found with name {name}")
+    instance = _read_instance(pid_file)
+    pid = instance["pid"]
+
+    time.sleep(float(instance.get("stop_delay_s", 0.0)))
+    if _alive(pid):
+        os.kill(pid, signal.SIGTERM)
+        deadline = time.monotonic() + timeout
+        while _alive(pid) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        if _alive(pid):
+            os.kill(pid, signal.SIGKILL)
+    pid_file.unlink(missing_ok=True)
+    print(f"INFO:    Stopping {name} instance of fake image (PID={pid})")
+    return 0
+
+
+def instance_list() -> int:
+    print(f"{'INSTANCE NAME':<32}PID")
+    for pid_file in sorted(state_dir().glob("*.pid")):
+        pid = _read_instance(pid_file)["pid"]
+        if _alive(pid):
+            print(f"{pid_file.stem:<32}{pid}")
+    return 0
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:2] == ["instance", "start"]:
+        return instance_start(argv[2:])
+    if argv[:2] == ["instance", "stop"]:
+        return instance_stop(argv[2:])
+    if argv[:2] == ["instance", "list"]:
+        return instance_list()
+    return _fail(f"unsupported command: {' '.join(argv)}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
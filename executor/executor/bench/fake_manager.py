@@ -0,0 +1,167 @@
+"""
+Stand-in for the manager's HTTP API, as used by `ManagerClient`.
+
+    with FakeManager(tasks=[spec]) as manager:
+        os.environ["MANAGER_URL"] = manager.url
+
+Claims hand out `tasks` in order and then `null`; with `repeat=True` the
+same task is handed out forever with a fresh id. Reported outcomes are kept
+in `outcomes`.
+"""
+
+from __future__ import annotations
+
+import copy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import itertools
+import json
+import logging
+import threading
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+ENTITY_TYPES = ("map", "av", "simulator", "sampler")
+
+
+def example_task_spec(scenario_path: str = "/tmp/scenario") -> dict[str, Any]:
+    """A claimed task spec shaped like the ones the manager returns."""
+    return {
+        "task": {"id": 1, "shard": None},
+        "av": {
+            "name": "fake-av",
+            "image_path": "/tmp/fake-av.sif",
+            "config_path": None,
+            "nv_runtime": False,
+            "ros_runtime": False,
+            "carla_runtime": False,
+        },
+        "simulator": {
+            "name": "fake-sim",
+            "image_path": "/tmp/fake-sim.sif",
+            "config_path": None,
+            "nv_runtime": False,
+            "ros_runtime": False,
+            "carla_runtime": False,
+        },
+        "map": {
+            "name": "bench",
+            "xodr_path": "/tmp/map",
+            "osm_path": "/tmp/map",
+        },
+        "scenario": {
+            "title": "bench",
+            "scenario_path": scenario_path,
+            "goal_config": {
+                "target_speed": 10.0,
+                "position": {"type": "LanePosition", "value": [1, -1, 50.0]},
+            },
+        },
+        "sampler": {
+            "name": "grid",
+            "module_path": "executor.runner.sampler.grid_search_sampler:GridSearchSampler",
+            "config_path": None,
+        },
+    }
+
+
+class FakeManager:
+    def __init__(
+        self,
+        tasks: Optional[list[dict[str, Any]]] = None,
+        repeat: bool = False,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self._tasks = [copy.deepcopy(t) for t in tasks or []]
+        self._repeat = repeat
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.claims = 0
+        self.outcomes: list[tuple[str, dict[str, Any]]] = []
+
+        manager = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                logger.debug("fake manager: " + format, *args)
+
+            def _reply(self, body: Any, status: int = 200) -> None:
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                entity_type = self.path.strip("/")
+                if entity_type not in ENTITY_TYPES:
+                    self._reply({"error": "not found"}, 404)
+                    return
+                self._reply(manager._entities(entity_type))
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"null")
+                route = self.path.rstrip("/")
+                if route == "/executor":
+                    self._reply({"id": 1, **(payload or {})})
+                elif route == "/task/claim":
+                    self._reply(manager._claim())
+                elif route.startswith("/task/"):
+                    with manager._lock:
+                        manager.outcomes.append((route[len("/task/") :], payload))
+                    self._reply({})
+                else:
+                    self._reply({"error": "not found"}, 404)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _entities(self, entity_type: str) -> list[dict[str, Any]]:
+        names = {
+            t.get(entity_type, {}).get("name") for t in self._tasks if entity_type in t
+        }
+        return [
+            {"id": i, "name": name}
+            for i, name in enumerate(sorted(n for n in names if n), start=1)
+        ]
+
+    def _claim(self) -> Optional[dict[str, Any]]:
+        with self._lock:
+            self.claims += 1
+            if not self._tasks:
+                return None
+            if not self._repeat:
+                return self._tasks.pop(0)
+            task = copy.deepcopy(self._tasks[0])
+            task.setdefault("task", {})["id"] = next(self._ids)
+            return task
+
+    def start(self) -> "FakeManager":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="fake-manager", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "FakeManager":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
@@ -0,0 +1,389 @@
+"""
+Stand-ins for the simulator and AV gRPC services.
+
+`FakeServer` serves the `sbsvf_api` SimServer or AvServer API from the current
+process with configurable per-call latency, object count and quit timing, so
+the runner and the service wrappers can be exercised without containers:
+
+    with FakeServer("simulator", FakeServiceConfig(object_count=32)) as sim:
+        wrapper = SimWrapper({"url": sim.url}, dt_ns=50_000_000)
+
+`python -m executor.bench.fake_services simulator --port 50053` serves one
+from a separate process; `spawn_fake_service` starts such a process and waits
+until it accepts connections.
+"""
+
+from __future__ import annotations
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+import json
+import logging
+import math
+import os
+import random
+import signal
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Optional
+
+import grpc
+from google.protobuf import message_factory
+from google.protobuf.struct_pb2 import Struct
+from sbsvf_api import (
+    av_server_pb2,
+    av_server_pb2_grpc,
+    control_pb2,
+    object_pb2,
+    sim_server_pb2,
+    sim_server_pb2_grpc,
+)
+
+logger = logging.getLogger(__name__)
+
+RPCS = ("Ping", "Init", "Reset", "Step", "Stop", "ShouldQuit")
+
+
+@dataclass(frozen=True)
+class FakeServiceConfig:
+    # Seconds each RPC sleeps before answering, by RPC name (e.g. "Step").
+    latency_s: dict[str, float] = field(default_factory=dict)
+    # Uniform extra delay in [0, latency_jitter_s) added to every call.
+    latency_jitter_s: float = 0.0
+    # Objects in every simulator observation, the ego first.
+    object_count: int = 1
+    # ShouldQuit answers True once this many steps ran since the last Reset.
+    quit_after_ticks: Optional[int] = None
+    # Also carry the quit flag on step responses if the API has the field.
+    step_quit_flag: bool = True
+
+    @classmethod
+    def from_spec(cls, spec: dict[str, Any] | None) -> "FakeServiceConfig":
+        if spec is None:
+            return cls()
+        latency_s = spec.get("latency_s") or {}
+        unknown = set(latency_s) - set(RPCS)
+        if unknown:
+            raise ValueError(f"Unknown RPCs in latency_s: {sorted(unknown)}")
+        quit_after = spec.get("quit_after_ticks")
+        return cls(
+            latency_s={k: float(v) for k, v in latency_s.items()},
+            latency_jitter_s=float(spec.get("latency_jitter_s", 0.0)),
+            object_count=max(1, int(spec.get("object_count", 1))),
+            quit_after_ticks=int(quit_after) if quit_after is not None else None,
+            step_quit_flag=bool(spec.get("step_quit_flag", True)),
+        )
+
+    def to_spec(self) -> dict[str, Any]:
+        return {
+            "latency_s": dict(self.latency_s),
+            "latency_jitter_s": self.latency_jitter_s,
+            "object_count": self.object_count,
+            "quit_after_ticks": self.quit_after_ticks,
+            "step_quit_flag": self.step_quit_flag,
+        }
+
+
+def _response_classes(pb2_module: Any, service: str) -> dict[str, Any]:
+    """Response message class of every RPC, looked up from the service."""
+    methods = pb2_module.DESCRIPTOR.services_by_name[service].methods_by_name
+    return {
+        name: message_factory.GetMessageClass(methods[name].output_type)
+        for name in RPCS
+    }
+
+
+class _FakeServicer:
+    SERVICE = ""
+    PB2: Any = None
+
+    def __init__(self, config: FakeServiceConfig):
+        self.config = config
+        self._responses = _response_classes(self.PB2, self.SERVICE)
+        self._lock = threading.Lock()
+        self._dt_s = 0.05
+        self._tick = 0
+        self.calls = {name: 0 for name in RPCS}
+
+    def _respond(self, rpc: str, **fields: Any) -> Any:
+        """Sleep the configured latency, then build the response of `rpc`."""
+        self.calls[rpc] += 1
+        delay = self.config.latency_s.get(rpc, 0.0)
+        if self.config.latency_jitter_s > 0:
+            delay += random.uniform(0.0, self.config.latency_jitter_s)
+        if delay > 0:
+            time.sleep(delay)
+        response_class = self._responses[rpc]
+        # Fields the installed API version does not have are left out.
+        known = response_class.DESCRIPTOR.fields_by_name
+        return response_class(**{k: v for k, v in fields.items() if k in known})
+
+    def _should_quit(self) -> bool:
+        quit_after = self.config.quit_after_ticks
+        return quit_after is not None and self._tick >= quit_after
+
+    def _step_fields(self) -> dict[str, Any]:
+        if not self.config.step_quit_flag:
+            return {}
+        return {"should_quit": self._should_quit()}
+
+    def Ping(self, request, context):
+        return self._respond("Ping", msg=f"fake {self.SERVICE}")
+
+    def Init(self, request, context):
+        with self._lock:
+            if request.dt > 0:
+                self._dt_s = request.dt
+        return self._respond("Init", success=True, msg="ok")
+
+    def Stop(self, request, context):
+        return self._respond("Stop")
+
+    def ShouldQuit(self, request, context):
+        with self._lock:
+            should_quit = self._should_quit()
+        return self._respond("ShouldQuit", should_quit=should_quit)
+
+
+class FakeSimServicer(_FakeServicer):
+    """
+    Simulator with `object_count` cars driving straight along x in three
+    lanes. The ego (slot 0) follows the `speed` entry of the control payload
+    when there is one.
+    """
+
+    SERVICE = "SimServer"
+    PB2 = sim_server_pb2
+
+    def __init__(self, config: FakeServiceConfig):
+        super().__init__(config)
+        self._objects: list[Any] = []
+
+    def _spawn(self) -> None:
+        self._objects = []
+        # Named so that monitors can find the ego, if the API has the field.
+        named = "name" in object_pb2.ObjectState.DESCRIPTOR.fields_by_name
+        for i in range(self.config.object_count):
+            extra = {"name": "ego" if i == 0 else f"npc{i}"} if named else {}
+            self._objects.append(
+                object_pb2.ObjectState(
+                    **extra,
+                    type=1,  # RoadObjectType.CAR
+                    kinematic=object_pb2.ObjectKinematic(
+                        x=15.0 * i,
+                        y=-3.5 * (i % 3),
+                        speed=10.0 + (i % 5),
+                    ),
+                    shape=object_pb2.Shape(
+                        type=0,
+                        dimensions=object_pb2.Shape.Dimension(x=4.5, y=1.8, z=1.5),
+                    ),
+                )
+            )
+
+    def _advance(self, ctrl_cmd: Any, time_ns: int) -> None:
+        if ctrl_cmd is not None and "speed" in ctrl_cmd.payload:
+            self._objects[0].kinematic.speed = float(ctrl_cmd.payload["speed"])
+        for obj in self._objects:
+            kinematic = obj.kinematic
+            kinematic.time_ns = time_ns
+            kinematic.x += kinematic.speed * math.cos(kinematic.yaw) * self._dt_s
+            kinematic.y += kinematic.speed * math.sin(kinematic.yaw) * self._dt_s
+
+    def Reset(self, request, context):
+        with self._lock:
+            self._tick = 0
+            self._spawn()
+            objects = list(self._objects)
+        return self._respond("Reset", objects=objects)
+
+    def Step(self, request, context):
+        with self._lock:
+            ctrl_cmd = request.ctrl_cmd if request.HasField("ctrl_cmd") else None
+            self._advance(ctrl_cmd, request.timestamp_ns)
+            self._tick += 1
+            objects = list(self._objects)
+            fields = self._step_fields()
+        return self._respond("Step", objects=objects, **fields)
+
+
+class FakeAvServicer(_FakeServicer):
+    """AV answering every observation with a constant-speed control command."""
+
+    SERVICE = "AvServer"
+    PB2 = av_server_pb2
+
+    def __init__(self, config: FakeServiceConfig, target_speed: float = 10.0):
+        super().__init__(config)
+        payload = Struct()
+        payload.update({"speed": target_speed, "steering_angle": 0.0})
+        self._ctrl = control_pb2.CtrlCmd(
+            mode=control_pb2.CtrlMode.ACKERMANN, payload=payload
+        )
+
+    def Init(self, request, context):
+        with self._lock:
+            if request.HasField("scenario_pack"):
+                self._set_target_speed(request.scenario_pack)
+        return super().Init(request, context)
+
+    def _set_target_speed(self, scenario_pack: Any) -> None:
+        target_speed = scenario_pack.ego.target_speed
+        if target_speed > 0:
+            self._ctrl.payload["speed"] = target_speed
+
+    def Reset(self, request, context):
+        with self._lock:
+            self._tick = 0
+            if request.HasField("scenario_pack"):
+                self._set_target_speed(request.scenario_pack)
+        return self._respond("Reset", ctrl_cmd=self._ctrl)
+
+    def Step(self, request, context):
+        with self._lock:
+            self._tick += 1
+            fields = self._step_fields()
+        return self._respond("Step", ctrl_cmd=self._ctrl, **fields)
+
+
+SERVICES = {
+    "simulator": (FakeSimServicer, sim_server_pb2_grpc.add_SimServerServicer_to_server),
+    "av": (FakeAvServicer, av_server_pb2_grpc.add_AvServerServicer_to_server),
+}
+
+
+class FakeServer:
+    """A fake simulator or AV service on a local gRPC server."""
+
+    def __init__(
+        self,
+        kind: str,
+        config: Optional[FakeServiceConfig] = None,
+        port: int = 0,
+        host: str = "127.0.0.1",
+        max_workers: int = 4,
+    ):
+        if kind not in SERVICES:
+            raise ValueError(
+                f"Unknown service kind {kind!r}, expected one of {list(SERVICES)}"
+            )
+        servicer_class, add_to_server = SERVICES[kind]
+        self.kind = kind
+        self.servicer = servicer_class(config or FakeServiceConfig())
+        self._host = host
+        self._server = grpc.server(ThreadPoolExecutor(max_workers=max_workers))
+        add_to_server(self.servicer, self._server)
+        # Port 0 lets the OS pick a free port.
+        self.port = self._server.add_insecure_port(f"{host}:{port}")
+        if self.port == 0:
+            raise RuntimeError(f"Failed to bind {host}:{port}")
+
+    @property
+    def url(self) -> str:
+        return f"{self._host}:{self.port}"
+
+    def start(self) -> "FakeServer":
+        self._server.start()
+        logger.debug("Fake %s service listening on %s", self.kind, self.url)
+        return self
+
+    def stop(self, grace: Optional[float] = None) -> None:
+        self._server.stop(grace).wait()
+
+    def wait(self) -> None:
+        self._server.wait_for_termination()
+
+    def __enter__(self) -> "FakeServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
+
+
+def fake_service_command(
+    kind: str,
+    config: Optional[FakeServiceConfig] = None,
+    port: Optional[int] = None,
+    boot_delay_s: float = 0.0,
+) -> list[str]:
+    """Command line serving a fake service from a separate process."""
+    command = [sys.executable, "-m", "executor.bench.fake_services", kind]
+    if port is not None:
+        command += ["--port", str(port)]
+    if config is not None:
+        command += ["--config", json.dumps(config.to_spec())]
+    if boot_delay_s > 0:
+        command += ["--boot-delay", str(boot_delay_s)]
+    return command
+
+
+def spawn_fake_service(
+    kind: str,
+    port: int,
+    config: Optional[FakeServiceConfig] = None,
+    timeout: float = 30.0,
+) -> subprocess.Popen:
+    """Start a fake service process and wait until its port accepts calls."""
+    proc = subprocess.Popen(fake_service_command(kind, config, port))
+    with grpc.insecure_channel(f"127.0.0.1:{port}") as channel:
+        try:
+            grpc.channel_ready_future(channel).result(timeout=timeout)
+        except grpc.FutureTimeoutError:
+            proc.terminate()
+            proc.wait()
+            raise RuntimeError(
+                f"Fake {kind} service on port {port} not ready after {timeout} s"
+            ) from None
+    return proc
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Serve a fake simulator or AV gRPC service."
+    )
+    parser.add_argument("kind", choices=list(SERVICES.keys()))
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=int(os.environ.get("PORT", 0)),
+        help="Port to listen on; defaults to $PORT as set for Apptainer services",
+    )
+    parser.add_argument("--host", type=str, default="0.0.0.0")
+    parser.add_argument(
+        "--config",
+        type=str,
+        default=None,
+        help="FakeServiceConfig fields as a JSON object",
+    )
+    parser.add_argument(
+        "--boot-delay",
+        type=float,
+        default=0.0,
+        help="Seconds to wait before listening, to mimic a slow service start",
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+    )
+    config = FakeServiceConfig.from_spec(
+        json.loads(args.config) if args.config else None
+    )
+    if args.boot_delay > 0:
+        time.sleep(args.boot_delay)
+
+    server = FakeServer(args.kind, config, port=args.port, host=args.host).start()
+    logger.info("Fake %s service listening on port %d", args.kind, server.port)
+    signal.signal(signal.SIGTERM, lambda *_: server.stop(grace=1.0))
+    try:
+        server.wait()
+    except KeyboardInterrupt:
+        server.stop(grace=1.0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""
+End-to-end service lifecycle benchmark on the fake apptainer.
+
+Claims tasks from a `FakeManager`, starts the services through
+`ApptainerServiceManager` with `APPTAINER_BIN` pointing at
+`executor.bench.fake_apptainer`, runs until the first simulator step and tears
+the services down again:
+
+    python -m executor.bench.lifecycle --tasks 5 --boot-delay 1.0 [--persistent]
+
+Timings per task are written as JSON like the benchmark suite's results.
+"""
+
+from __future__ import annotations
+
+import argparse
+from contextlib import contextmanager
+import json
+import logging
+import os
+from pathlib import Path
+import platform
+import statistics
+import tempfile
+import time
+from typing import Any, Iterator, Optional
+
+from executor.bench.fake_apptainer import install_fake_apptainer, write_fake_image
+from executor.bench.fake_manager import FakeManager, example_task_spec
+from executor.bench.suite import SCHEMA_VERSION, Workspace, git_commit
+
+logger = logging.getLogger(__name__)
+
+PHASES = (
+    "claim_s",
+    "start_services_s",
+    "runner_init_s",
+    "first_step_s",
+    "claim_to_first_step_s",
+    "teardown_s",
+)
+
+
+@contextmanager
+def _restored_environ(*names: str) -> Iterator[None]:
+    """Restore the environment variables `names` to their values on entry."""
+    saved = {name: os.environ.get(name) for name in names}
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def _run_task(
+    client, session, executor_info, job_id: int, output_dir: Path
+) -> dict[str, float]:
+    from executor.runner.runner import Runner
+    from executor.utils import build_runner_spec, build_services_spec
+
+    timings: dict[str, float] = {}
+    start = time.perf_counter()
+    claimed = client.claim_task_spec(executor_info)
+    timings["claim_s"] = time.perf_counter() - start
+    if claimed is None:
+        raise RuntimeError("The fake manager handed out no task")
+
+    t = time.perf_counter()
+    services_spec = build_services_spec(
+        claimed_av=claimed["av"],
+        claimed_simulator=claimed["simulator"],
+        claimed_map=claimed["map"],
+        claimed_scenario=claimed["scenario"],
+        reuse=session.reuse,
+    )
+    started_specs = session.acquire(
+        services_spec=services_spec, output_dir=str(output_dir)
+    )[0]
+    timings["start_services_s"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    runner_spec = build_runner_spec(
+        claimed_spec=claimed,
+        claimed_simulator=claimed["simulator"],
+        claimed_av=claimed["av"],
+        claimed_map=claimed["map"],
+        claimed_scenario=claimed["scenario"],
+        started_specs=started_specs,
+        job_id=job_id,
+        output_dir=str(output_dir),
+    )
+    runner = Runner(runner_spec, lanes=session.lanes, keep_alive=session.reuse)
+    session.adopt(runner.lanes)
+    timings["runner_init_s"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    lane = runner.lanes[0]
+    raw_obs = lane.sim.reset("lifecycle", runner.sps)
+    ctrl = lane.av.reset("lifecycle", runner.sps, raw_obs)
+    lane.sim.step(ctrl, 0)
+    done = time.perf_counter()
+    timings["first_step_s"] = done - t
+    timings["claim_to_first_step_s"] = done - start
+
+    t = time.perf_counter()
+    runner.close()
+    session.release(wait=True)
+    timings["teardown_s"] = time.perf_counter() - t
+    client.task_succeeded(claimed["task"]["id"])
+    return timings
+
+
+def run_lifecycle(
+    tasks: int = 3,
+    boot_delay_s: float = 0.5,
+    start_delay_s: float = 0.0,
+    stop_delay_s: float = 0.0,
+    persistent: bool = False,
+) -> dict[str, Any]:
+    """
+    Run `tasks` tasks through the full service lifecycle and return the
+    timings of every task and their summary. Raises if a service fails to
+    start.
+    """
+    from executor.apptainer_utils.apptainer_manager import ApptainerServiceManager
+    from executor.manager_client import ManagerClient
+    from executor.session import ServiceSession
+
+    with (
+        tempfile.TemporaryDirectory(prefix="sbsvf-lifecycle-") as tmp,
+        _restored_environ("APPTAINER_BIN", "FAKE_APPTAINER_STATE"),
+        Workspace(Path(tmp)) as ws,
+    ):
+        root = Path(tmp)
+        os.environ["APPTAINER_BIN"] = str(install_fake_apptainer(root / "bin"))
+        os.environ["FAKE_APPTAINER_STATE"] = str(root / "state")
+
+        images = root / "images"
+        images.mkdir()
+        task = example_task_spec(str(ws.scenario_dir))
+        task["map"].update(xodr_path=str(ws.map_dir), osm_path=str(ws.map_dir))
+        task["sampler"] = {}
+        for kind in ("simulator", "av"):
+            task[kind]["image_path"] = str(
+                write_fake_image(
+                    images / f"{kind}.sif",
+                    kind,
+                    boot_delay_s=boot_delay_s,
+                    start_delay_s=start_delay_s,
+                    stop_delay_s=stop_delay_s,
+                )
+            )
+
+        executor_info = {"job_id": 1, "array_id": 0, "hostname": platform.node()}
+        runs: list[dict[str, float]] = []
+        with FakeManager(tasks=[task], repeat=True) as manager:
+            client = ManagerClient()
+            client.manager_url = manager.url
+            service_manager = ApptainerServiceManager(id=f"lifecycle{os.getpid()}")
+            session = ServiceSession(
+                service_managers=[service_manager], reuse=persistent
+            )
+            try:
+                for i in range(tasks):
+                    timings = _run_task(
+                        client, session, executor_info, 1, ws.output_dir / f"task{i}"
+                    )
+                    logger.info("Task %d: %s", i, timings)
+                    runs.append(timings)
+            finally:
+                t = time.perf_counter()
+                session.release(force=True)
+                final_teardown_s = time.perf_counter() - t
+
+    summary = {}
+    for phase in PHASES:
+        values = [run[phase] for run in runs]
+        summary[phase] = {
+            "min": min(values),
+            "median": statistics.median(values),
+            "max": max(values),
+        }
+    return {
+        "schema": SCHEMA_VERSION,
+        "commit": git_commit(),
+        "created": time.time(),
+        "python": platform.python_version(),
+        "host": platform.node(),
+        "settings": {
+            "tasks": tasks,
+            "boot_delay_s": boot_delay_s,
+            "start_delay_s": start_delay_s,
+            "stop_delay_s": stop_delay_s,
+            "persistent": persistent,
+        },
+        "runs": runs,
+        "summary": summary,
+        "final_teardown_s": final_teardown_s,
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Service lifecycle benchmark with a fake apptainer."
+    )
+    parser.add_argument("--tasks", type=int, default=3)
+    parser.add_argument(
+        "--boot-delay",
+        type=float,
+        default=0.5,
+        help="Seconds until a fake service answers Ping after it started",
+    )
+    parser.add_argument(
+        "--start-delay",
+        type=float,
+        default=0.0,
+        help="Seconds `apptainer instance start` takes to return",
+    )
+    parser.add_argument(
+        "--stop-delay",
+        type=float,
+        default=0.0,
+        help="Seconds `apptainer instance stop` takes before stopping",
+    )
+    parser.add_argument(
+        "--persistent",
+        action="store_true",
+        help="Reuse the services between tasks, as with `executor --persistent`",
+    )
+    parser.add_argument("--output", type=str, default=None)
+    parser.add_argument(
+        "--log-level",
+        type=str,
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        default="WARNING",
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(
+        level=getattr(logging, args.log_level),
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+    )
+
+    report = run_lifecycle(
+        tasks=args.tasks,
+        boot_delay_s=args.boot_delay,
+        start_delay_s=args.start_delay,
+        stop_delay_s=args.stop_delay,
+        persistent=args.persistent,
+    )
+    output = Path(args.output or f"bench-results/lifecycle-{report['commit']}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+
+    print(f"{'phase':24s} {'min':>9s} {'median':>9s} {'max':>9s}")
+    for phase, stats in report["summary"].items():
+        print(
+            f"{phase:24s} {stats['min']:9.3f} {stats['median']:9.3f} "
+            f"{stats['max']:9.3f}"
+        )
+    print(f"{'final_teardown_s':24s} {report['final_teardown_s']:9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,583 @@
+"""
+Benchmarks of the executor's hot paths against local stand-ins.
+
+    python -m executor.bench.suite [--only runner_sync grid_sampler] \
+        [--output results.json] [--compare baseline.json]
+
+Results are written as JSON (by default to bench-results/<commit>.json) so
+that runs on different commits can be compared with `--compare`, which exits
+non-zero when a benchmark got slower than `--threshold`.
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import asdict, dataclass, field
+import json
+import logging
+from pathlib import Path
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+
+
+class BenchmarkSkipped(Exception):
+    """A benchmark cannot run here, e.g. the RoadManager library is missing."""
+
+
+@dataclass
+class BenchResult:
+    name: str
+    # Operations per round; a round is timed as a whole.
+    ops: int
+    rounds: int
+    # Fastest round; the least disturbed by the rest of the machine.
+    best_s: float
+    median_s: float
+    ns_per_op: float
+    ops_per_s: float
+    extra: dict[str, Any] = field(default_factory=dict)
+
+
+def measure(
+    name: str,
+    fn: Callable[[], Any],
+    ops: int = 1,
+    repeat: int = 5,
+    **extra: Any,
+) -> BenchResult:
+    """
+    Time `fn`, which performs `ops` operations per call, over `repeat` rounds
+    of enough calls to take at least 0.2 s each.
+    """
+    timer = timeit.Timer(fn)
+    calls, _ = timer.autorange()
+    rounds = timer.repeat(repeat=repeat, number=calls)
+    total_ops = calls * ops
+    best = min(rounds)
+    return BenchResult(
+        name=name,
+        ops=total_ops,
+        rounds=repeat,
+        best_s=best,
+        median_s=statistics.median(rounds),
+        ns_per_op=best / total_ops * 1e9,
+        ops_per_s=total_ops / best if best > 0 else float("inf"),
+        extra=extra,
+    )
+
+
+# ---------- workspace ----------
+_XODR = """<?xml version="1.0" encoding="UTF-8"?>
+<OpenDRIVE>
+  <header revMajor="1" revMinor="6" name="bench"/>
+  <road name="r1" length="200.0" id="1" junction="-1">
+    <planView>
+      <geometry s="0.0" x="0.0" y="0.0" hdg="0.0" length="200.0"><line/></geometry>
+    </planView>
+    <lanes>
+      <laneSection s="0.0">
+        <center><lane id="0" type="none"/></center>
+        <right>
+          <lane id="-1" type="driving"><width sOffset="0" a="3.5" b="0" c="0" d="0"/></lane>
+        </right>
+      </laneSection>
+    </lanes>
+  </road>
+</OpenDRIVE>
+"""
+
+GOAL = {"type": "LanePosition", "value": [1, -1, 50.0]}
+
+
+class Workspace:
+    """
+    Scratch directory with a map, a scenario folder and a position memo that
+    already holds the ego goal, so that `ScenarioPack.from_dict` resolves it
+    without loading the RoadManager. The memo stands in for the process-wide
+    one until the workspace is closed.
+    """
+
+    def __init__(self, root: Path):
+        from executor.runner.utils import road_network
+        from executor.runner.utils.position import (
+            LanePosition,
+            Position,
+            WorldPosition,
+        )
+        from executor.runner.utils.road_network import GoalMemo, map_key
+
+        self.root = root
+        self.map_dir = root / "map"
+        self.map_dir.mkdir()
+        self.xodr = self.map_dir / "bench.xodr"
+        self.xodr.write_text(_XODR, encoding="utf-8")
+        self.scenario_dir = root / "scenario"
+        self.scenario_dir.mkdir()
+        self.output_dir = root / "outputs"
+        # Only keys the memo; the goal is never resolved with the library.
+        self.rmlib = root / "libesminiRMLib.so"
+
+        goal = Position(
+            lane=LanePosition(road_id=1, lane_id=-1, s=50.0, offset=0.0),
+            world=WorldPosition(
+                x=50.0, y=-1.75, z=0.0, h=0.0, p=0.0, r=0.0, h_relative=0.0
+            ),
+        )
+        memo = GoalMemo(cache_dir=root / "cache")
+        memo.put(map_key(self.xodr, self.rmlib), GOAL["type"], GOAL["value"], goal)
+        self._saved_memo = road_network._memo
+        road_network._memo = memo
+
+    def close(self) -> None:
+        """Give the process-wide position memo back."""
+        from executor.runner.utils import road_network
+
+        road_network._memo = self._saved_memo
+
+    def __enter__(self) -> "Workspace":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def scenario_spec(self) -> dict[str, Any]:
+        return {
+            "title": "bench",
+            "scenario_path": str(self.scenario_dir),
+            "rmlib_path": str(self.rmlib),
+            "goal_config": {"target_speed": 10.0, "position": GOAL},
+        }
+
+    def map_spec(self) -> dict[str, Any]:
+        return {"name": "bench", "xodr_path": str(self.map_dir)}
+
+
+def _distribution_xml(
+    ranges: int = 6,
+    steps: int = 10,
+    value_sets: int = 0,
+    set_elements: int = 0,
+) -> str:
+    """A `_param.xosc` body with a grid of `steps ** ranges` points."""
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        "<OpenSCENARIO>",
+        '<FileHeader revMajor="1" revMinor="2" description="bench"/>',
+        "<ParameterValueDistribution>",
+        '<ScenarioFile filepath="bench.xosc"/>',
+        "<Deterministic>",
+    ]
+    for i in range(ranges):
+        parts.append(
+            f'<DeterministicSingleParameterDistribution parameterName="range_{i}">'
+            f'<DistributionRange stepWidth="1.0">'
+            f'<Range lowerLimit="0.0" upperLimit="{steps - 1}.0"/>'
+            "</DistributionRange></DeterministicSingleParameterDistribution>"
+        )
+    if set_elements:
+        elements = "".join(f'<Element value="{v}"/>' for v in range(set_elements))
+        parts.append(
+            '<DeterministicSingleParameterDistribution parameterName="choice">'
+            f"<DistributionSet>{elements}</DistributionSet>"
+            "</DeterministicSingleParameterDistribution>"
+        )
+    if value_sets:
+        parts.append(
+            "<DeterministicMultiParameterDistribution><ValueSetDistribution>"
+        )
+        for v in range(value_sets):
+            parts.append(
+                "<ParameterValueSet>"
+                f'<ParameterAssignment parameterRef="vs_a" value="{v}"/>'
+                f'<ParameterAssignment parameterRef="vs_b" value="{v * 0.5}"/>'
+                "</ParameterValueSet>"
+            )
+        parts.append(
+            "</ValueSetDistribution></DeterministicMultiParameterDistribution>"
+        )
+    parts += ["</Deterministic>", "</ParameterValueDistribution>", "</OpenSCENARIO>"]
+    return "\n".join(parts)
+
+
+# ---------- benchmarks ----------
+# Every built-in monitor, none of them ending the episode before the fake
+# services quit after `--ticks`.
+BENCH_MONITORS = [
+    {"name": "goal_distance", "config": {"stop_on_reach": False}},
+    {"name": "collision", "config": {"stop": False}},
+    "ttc",
+    "min_distance",
+]
+
+
+def _runner_benchmark(engine: str, ws: Workspace, args) -> list[BenchResult]:
+    from executor.bench.fake_services import FakeServer, FakeServiceConfig
+    from executor.runner.async_runner import AsyncRunner
+    from executor.runner.runner import Runner
+
+    runner_class = AsyncRunner if engine == "async" else Runner
+
+    ticks = args.ticks
+    config = FakeServiceConfig(quit_after_ticks=ticks, object_count=args.objects)
+    results = []
+    with FakeServer("simulator", config) as sim, FakeServer("av", config) as av:
+        for quit_check in ("every_tick", "step_flag"):
+            spec = {
+                "runtime": {
+                    "dt": 0.05,
+                    "engine": engine,
+                    "quit_check": quit_check,
+                    "monitors": BENCH_MONITORS,
+                },
+                "task": {
+                    "job_id": "bench",
+                    "output_dir": str(ws.output_dir / f"{engine}-{quit_check}"),
+                },
+                "simulator": {"url": sim.url},
+                "av": {"url": av.url},
+                "scenario": ws.scenario_spec(),
+                "map": ws.map_spec(),
+                "sampler": {},
+            }
+            runner = runner_class(spec)
+            try:
+                runs = []
+                for i in range(args.repeat):
+                    start = time.perf_counter()
+                    result = runner.run_concrete(f"iteration_{i}", runner.sps)
+                    runs.append((time.perf_counter() - start, result["metrics"]))
+            finally:
+                runner.close()
+
+            walls = [wall for wall, _ in runs]
+            best_wall, metrics = min(runs, key=lambda run: run[0])
+            tick = metrics["tick"]
+            rpc_ns = (
+                metrics["sim"]["step"]["mean_ns"] + metrics["av"]["step"]["mean_ns"]
+            )
+            results.append(
+                BenchResult(
+                    name=f"runner_{engine}_{quit_check}",
+                    ops=metrics["ticks"],
+                    rounds=len(runs),
+                    best_s=best_wall,
+                    median_s=statistics.median(walls),
+                    ns_per_op=best_wall / metrics["ticks"] * 1e9,
+                    ops_per_s=metrics["ticks"] / best_wall,
+                    extra={
+                        "objects": args.objects,
+                        "tick_p50_ns": tick["p50_ns"],
+                        "tick_p99_ns": tick["p99_ns"],
+                        # Time per tick outside the two step RPCs.
+                        "overhead_ns": tick["mean_ns"] - rpc_ns,
+                    },
+                )
+            )
+    return results
+
+
+def bench_runner_sync(ws: Workspace, args) -> list[BenchResult]:
+    return _runner_benchmark("sync", ws, args)
+
+
+def bench_runner_async(ws: Workspace, args) -> list[BenchResult]:
+    return _runner_benchmark("async", ws, args)
+
+
+def bench_grid_sampler(ws: Workspace, args) -> list[BenchResult]:
+    from executor.runner.sampler.grid_search_sampler import GridSearchSampler
+
+    path = ws.root / "grid_param.xosc"
+    path.write_text(_distribution_xml(ranges=6, steps=10, value_sets=10))
+    calls = 10_000
+    samplers = [GridSearchSampler(param_range_file=path)]
+
+    def run() -> None:
+        sampler = samplers[0]
+        for _ in range(calls):
+            if sampler.next() is None:
+                sampler = samplers[0] = GridSearchSampler(param_range_file=path)
+
+    return [
+        measure(
+            "grid_sampler_init",
+            lambda: GridSearchSampler(param_range_file=path),
+            repeat=args.repeat,
+        ),
+        measure(
+            "grid_sampler_next",
+            run,
+            ops=calls,
+            repeat=args.repeat,
+            grid_points=samplers[0].total_permutations(),
+        ),
+    ]
+
+
+def bench_distribution_parse(ws: Workspace, args) -> list[BenchResult]:
+    from executor.runner.sampler.distribution import (
+        parse_parameter_value_distribution,
+        parse_parameter_value_distribution_file,
+    )
+
+    xml = _distribution_xml(
+        ranges=20, steps=1000, value_sets=20_000, set_elements=20_000
+    )
+    path = ws.root / "big_param.xosc"
+    path.write_text(xml)
+    size = len(xml.encode())
+    return [
+        measure(
+            "distribution_parse_str",
+            lambda: parse_parameter_value_distribution(xml),
+            repeat=args.repeat,
+            bytes=size,
+        ),
+        measure(
+            "distribution_parse_file",
+            lambda: parse_parameter_value_distribution_file(path),
+            repeat=args.repeat,
+            bytes=size,
+        ),
+    ]
+
+
+def bench_position_factory(ws: Workspace, args) -> list[BenchResult]:
+    import numpy as np
+
+    from executor.runner.utils.position import PositionFactory
+    from executor.utils import rmlib_path
+
+    lib = Path(args.rmlib or rmlib_path())
+    if not lib.exists():
+        raise BenchmarkSkipped(f"RoadManager library not found: {lib}")
+    xodr = Path(args.xodr) if args.xodr else ws.xodr
+
+    n = 10_000
+    s = np.linspace(0.0, 190.0, n)
+    xyz = np.column_stack([s, np.full(n, -1.75), np.zeros(n)])
+    with PositionFactory(lib_path=lib, xodr_path=xodr) as factory:
+        return [
+            measure(
+                "position_from_lane",
+                lambda: factory.from_lane(road_id=1, lane_id=-1, s=50.0),
+                repeat=args.repeat,
+            ),
+            measure(
+                "position_from_world",
+                lambda: factory.from_world(x=50.0, y=-1.75, z=0.0),
+                repeat=args.repeat,
+            ),
+            measure(
+                "position_from_lanes_batch",
+                lambda: factory.from_lanes(1, -1, s),
+                ops=n,
+                repeat=args.repeat,
+            ),
+            measure(
+                "position_from_worlds_batch",
+                lambda: factory.from_worlds(xyz),
+                ops=n,
+                repeat=args.repeat,
+            ),
+        ]
+
+
+def bench_scenario_pack(ws: Workspace, args) -> list[BenchResult]:
+    from executor.runner.utils.sps import ScenarioPack
+
+    scenario_spec, map_spec = ws.scenario_spec(), ws.map_spec()
+    sps = ScenarioPack.from_dict(scenario_spec, map_spec)
+
+    def rebuild() -> None:
+        sps.invalidate()
+        sps.ego.invalidate()
+        sps.to_protobuf()
+
+    return [
+        measure(
+            "scenario_pack_from_dict",
+            lambda: ScenarioPack.from_dict(scenario_spec, map_spec),
+            repeat=args.repeat,
+        ),
+        measure("scenario_pack_to_protobuf", sps.to_protobuf, repeat=args.repeat),
+        measure("scenario_pack_to_protobuf_rebuild", rebuild, repeat=args.repeat),
+    ]
+
+
+def bench_manager_client(ws: Workspace, args) -> list[BenchResult]:
+    from executor.bench.fake_manager import FakeManager, example_task_spec
+    from executor.manager_client import ManagerClient
+
+    executor_info = {"job_id": 1, "array_id": 0, "hostname": platform.node()}
+    task = example_task_spec(str(ws.scenario_dir))
+    with FakeManager(tasks=[task], repeat=True) as manager:
+        client = ManagerClient()
+        client.manager_url = manager.url
+        client.fetch()
+
+        def round_trip() -> None:
+            spec = client.claim_task_spec(executor_info)
+            client.task_succeeded(spec["task"]["id"])
+
+        return [
+            measure(
+                "manager_claim",
+                lambda: client.claim_task_spec(executor_info),
+                repeat=args.repeat,
+            ),
+            measure("manager_claim_and_report", round_trip, repeat=args.repeat),
+        ]
+
+
+BENCHMARKS: dict[str, Callable[[Workspace, Any], list[BenchResult]]] = {
+    "runner_sync": bench_runner_sync,
+    "runner_async": bench_runner_async,
+    "grid_sampler": bench_grid_sampler,
+    "distribution_parse": bench_distribution_parse,
+    "position_factory": bench_position_factory,
+    "scenario_pack": bench_scenario_pack,
+    "manager_client": bench_manager_client,
+}
+
+
+# ---------- results ----------
+def git_commit() -> str:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_benchmarks(names: list[str], args) -> dict[str, Any]:
+    results: list[BenchResult] = []
+    skipped: dict[str, str] = {}
+    with (
+        tempfile.TemporaryDirectory(prefix="sbsvf-bench-") as tmp,
+        Workspace(Path(tmp)) as ws,
+    ):
+        for name in names:
+            logger.info("Running benchmark %s", name)
+            try:
+                results.extend(BENCHMARKS[name](ws, args))
+            except BenchmarkSkipped as exc:
+                logger.warning("Skipping %s: %s", name, exc)
+                skipped[name] = str(exc)
+    return {
+        "schema": SCHEMA_VERSION,
+        "commit": git_commit(),
+        "created": time.time(),
+        "python": platform.python_version(),
+        "host": platform.node(),
+        "results": [asdict(r) for r in results],
+        "skipped": skipped,
+    }
+
+
+def compare(
+    current: dict[str, Any], baseline: dict[str, Any], threshold: float
+) -> list[str]:
+    """Print the change per benchmark; return the names slower than threshold."""
+    base = {r["name"]: r for r in baseline.get("results", [])}
+    regressions = []
+    print(f"{'benchmark':40s} {'base ns/op':>14s} {'ns/op':>14s} {'change':>8s}")
+    for r in current["results"]:
+        b = base.get(r["name"])
+        if b is None:
+            print(f"{r['name']:40s} {'-':>14s} {r['ns_per_op']:14.1f}")
+            continue
+        change = r["ns_per_op"] / b["ns_per_op"] - 1.0
+        mark = ""
+        if change > threshold:
+            regressions.append(r["name"])
+            mark = "  REGRESSION"
+        print(
+            f"{r['name']:40s} {b['ns_per_op']:14.1f} {r['ns_per_op']:14.1f} "
+            f"{change:+8.1%}{mark}"
+        )
+    return regressions
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Executor benchmark suite.")
+    parser.add_argument(
+        "--only",
+        nargs="+",
+        choices=list(BENCHMARKS.keys()),
+        default=None,
+        help="Benchmarks to run (default: all)",
+    )
+    parser.add_argument("--output", type=str, default=None)
+    parser.add_argument("--compare", type=str, default=None, metavar="BASELINE")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="Relative slowdown reported as a regression by --compare",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--ticks", type=int, default=2000, help="Ticks per runner iteration"
+    )
+    parser.add_argument(
+        "--objects", type=int, default=16, help="Objects per fake observation"
+    )
+    parser.add_argument("--rmlib", type=str, default=None)
+    parser.add_argument(
+        "--xodr",
+        type=str,
+        default=None,
+        help="Map for the PositionFactory benchmarks (default: a straight road)",
+    )
+    parser.add_argument(
+        "--log-level",
+        type=str,
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        default="WARNING",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    args = parse_args(argv)
+    logging.basicConfig(
+        level=getattr(logging, args.log_level),
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+    )
+
+    report = run_benchmarks(args.only or list(BENCHMARKS.keys()), args)
+    output = Path(args.output or f"bench-results/{report['commit']}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    logger.warning("Wrote %d results to %s", len(report["results"]), output)
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        if compare(report, baseline, args.threshold):
+            sys.exit(1)
+    else:
+        for r in report["results"]:
+            print(
+                f"{r['name']:40s} {r['ns_per_op']:14.1f} ns/op "
+                f"{r['ops_per_s']:14.1f} op/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
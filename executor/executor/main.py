@@ -2,14 +2,27 @@ import argparse
 import dotenv
 import logging
 import os
+from pathlib import Path
 from pprint import pprint
-from typing import Any
+import time
+from typing import Any, Optional
 
 from executor.apptainer_utils.apptainer_manager import ApptainerServiceManager
 from executor.manager_client import ManagerClient
+from executor.preflight import check_route
+from executor.runner.async_runner import AsyncRunner
+from executor.runner.monitor.base import BUILTIN_MONITORS
+from executor.runner.replay import TASK_FILE, load_replay_task
 from executor.runner.runner import Runner
+from executor.runner.utils.budget import EpisodeStalled
+from executor.runner.utils.quit_check import QuitCheckMode
+from executor.session import ServiceSession
 from executor.system import collect_executor_identity
-from executor.utils import build_runner_spec, build_services_spec
+from executor.utils import (
+    build_runner_spec,
+    build_services_spec,
+    is_logical_scenario,
+)
 
 dotenv.load_dotenv()
 
@@ -21,18 +34,37 @@ logging.basicConfig(
 )
 
 
+RUNNER_ENGINES: dict[str, type[Runner]] = {
+    "sync": Runner,
+    "async": AsyncRunner,
+}
+
+
 def _execute_runner_task(
-    client: ManagerClient,
     task_id: Any,
     runner_spec: dict[str, Any],
-) -> None:
+    session: ServiceSession,
+) -> tuple[str, str | None]:
+    """
+    Run one task and return its outcome as `(status, reason)`, where status is
+    one of "succeeded", "failed", "stalled", "invalid" or "interrupted".
+    """
     pprint(runner_spec)
     try:
-        runner = Runner(runner_spec)
+        runner_class = RUNNER_ENGINES[runner_spec["runtime"].get("engine", "sync")]
+        runner = runner_class(
+            runner_spec,
+            lanes=session.lanes,
+            keep_alive=session.reuse,
+        )
+        session.adopt(runner.lanes)
         runner.exec()
     except KeyboardInterrupt:
         logger.warning("Task execution interrupted by user.")
-        client.task_failed(task_id, reason="Task interrupted by user")
+        return "interrupted", "Task interrupted by user"
+    except EpisodeStalled as exc:
+        logger.error(f"Task execution stalled: {exc}")
+        return "stalled", str(exc)
     except Exception as exc:
         if isinstance(exc, RuntimeError):
             if (
@@ -44,19 +76,255 @@ def _execute_runner_task(
                 logger.error(
                     f"Task execution failed due to route not found error: {exc}"
                 )
-                client.task_invalid(task_id, reason=str(exc))
-                return
+                return "invalid", str(exc)
             else:
                 logger.error(f"Task execution failed with runtime error: {exc}")
-                client.task_failed(task_id, reason=str(exc))
-                return
+                return "failed", str(exc)
         else:
             err_msg = f"{type(exc).__name__}: {str(exc)}"
             logger.error("Task execution failed with error: %s", err_msg)
-            client.task_failed(task_id, reason=err_msg)
+            return "failed", err_msg
     else:
         logger.info("Task execution succeeded for task ID: %s", task_id)
+        return "succeeded", None
+
+
+def _report_task_outcome(
+    client: ManagerClient,
+    task_id: Any,
+    status: str,
+    reason: str | None,
+) -> None:
+    if status == "succeeded":
         client.task_succeeded(task_id)
+    elif status == "invalid":
+        client.task_invalid(task_id, reason=str(reason))
+    elif status == "stalled":
+        # The manager has no separate state for stalls; keep them apart by reason.
+        client.task_failed(task_id, reason=f"stalled: {reason}")
+    else:
+        client.task_failed(task_id, reason=str(reason))
+
+
+def _run_claimed_task(
+    client: ManagerClient,
+    session: ServiceSession,
+    claimed_spec: dict[str, dict[str, Any]],
+    job_id: int,
+    runtime: dict[str, Any],
+    lanes: int = 1,
+    route_preflight: bool = True,
+) -> str:
+    task_id = claimed_spec.get("task", {}).get("id")
+    logger.info("Claimed task with ID: %s", task_id)
+
+    status, reason = _run_task(
+        session=session,
+        claimed_spec=claimed_spec,
+        job_id=job_id,
+        runtime=runtime,
+        lanes=lanes,
+        route_preflight=route_preflight,
+    )
+    if task_id is not None:
+        _report_task_outcome(client, task_id, status, reason)
+    return status
+
+
+def _run_replay(
+    session: ServiceSession,
+    trajectory: str,
+    job_id: int,
+    runtime: dict[str, Any],
+) -> str:
+    """
+    Replay a recorded iteration on its own. The task is rebuilt from the one
+    saved with the recording instead of claiming one, and nothing is reported
+    to the manager.
+    """
+    claimed_spec = load_replay_task(Path(trajectory))
+    if claimed_spec is None:
+        logger.error(
+            "No %s next to %s; record the iteration again to replay it.",
+            TASK_FILE,
+            trajectory,
+        )
+        return "failed"
+
+    task_id = claimed_spec.get("task", {}).get("id")
+    logger.info("Replaying %s of task %s", trajectory, task_id)
+    status, reason = _run_task(
+        session=session,
+        claimed_spec=claimed_spec,
+        job_id=job_id,
+        runtime=runtime,
+    )
+    if reason:
+        logger.info("Replay %s: %s", status, reason)
+    else:
+        logger.info("Replay %s", status)
+    return status
+
+
+def _run_task(
+    session: ServiceSession,
+    claimed_spec: dict[str, dict[str, Any]],
+    job_id: int,
+    runtime: dict[str, Any],
+    lanes: int = 1,
+    route_preflight: bool = True,
+) -> tuple[str, str | None]:
+    """Start the services of a task, run it and return `(status, reason)`."""
+    task_id = claimed_spec.get("task", {}).get("id")
+    claimed_av = dict(claimed_spec.get("av", {}))
+    claimed_simulator = dict(claimed_spec.get("simulator", {}))
+    claimed_map = dict(claimed_spec.get("map", {}))
+    claimed_scenario = dict(claimed_spec.get("scenario", {}))
+    # logger.info("Claimed scenario: %s", claimed_scenario.get("title", "unknown"))
+
+    # A replay feeds recorded control commands to the simulator alone.
+    replay = bool((runtime.get("replay") or {}).get("trajectory"))
+
+    # An unreachable goal only surfaces once the AV tries to plan a route;
+    # catch it before booting any service.
+    if route_preflight and not replay:
+        reason = check_route(claimed_scenario, claimed_map)
+        if reason is not None:
+            logger.error("Task %s is invalid: %s", task_id, reason)
+            return "invalid", reason
+
+    services_spec = build_services_spec(
+        claimed_av=claimed_av,
+        claimed_simulator=claimed_simulator,
+        claimed_map=claimed_map,
+        claimed_scenario=claimed_scenario,
+        reuse=session.reuse,
+    )
+    if replay:
+        del services_spec["av"]
+
+    av = claimed_av.get("name", "unknown_av")
+    sim = claimed_simulator.get("name", "unknown_simulator")
+    map_name = claimed_map.get("name", "unknown_map")
+    scenario_title = claimed_scenario.get("title", "unknown_scenario")
+    cla = f"{av}_{sim}"
+
+    output_root = f"./outputs/{cla}"
+    task_dirname = f"{map_name}-{scenario_title.replace(' ', '_')}-{task_id}"
+    output_dir = str(f"{output_root}/{task_dirname}")
+    os.makedirs(output_dir, exist_ok=True)
+
+    with open(os.path.join(output_dir, "status.txt"), "w") as f:
+        pprint(claimed_spec, stream=f)
+
+    # Reused services mount the output root shared by all tasks of the same
+    # AV/simulator pair and write each task below its own directory.
+    if session.reuse:
+        service_output_dir = output_root
+        service_output_prefix = task_dirname
+    else:
+        service_output_dir = output_dir
+        service_output_prefix = ""
+
+    # Extra lanes only pay off for parameter sweeps of logical scenarios.
+    lanes = lanes if is_logical_scenario(claimed_scenario) and not replay else 1
+
+    try:
+        lane_started_specs = session.acquire(
+            services_spec=services_spec,
+            output_dir=service_output_dir,
+            lanes=lanes,
+        )
+        started_specs = lane_started_specs[0]
+        logger.info(
+            "Started services: %s on %d lane(s)",
+            list(started_specs.keys()),
+            len(lane_started_specs),
+        )
+
+        runner_spec = build_runner_spec(
+            claimed_spec=claimed_spec,
+            claimed_simulator=claimed_simulator,
+            claimed_av=claimed_av,
+            claimed_map=claimed_map,
+            claimed_scenario=claimed_scenario,
+            started_specs=started_specs,
+            job_id=job_id,
+            output_dir=output_dir,
+            service_output_prefix=service_output_prefix,
+            runtime=runtime,
+            lane_started_specs=lane_started_specs[1:],
+        )
+        status, reason = _execute_runner_task(
+            task_id=task_id,
+            runner_spec=runner_spec,
+            session=session,
+        )
+    except Exception as exc:
+        logger.error("Executor failed with error: %s", exc)
+        status, reason = "failed", f"{type(exc).__name__}: {str(exc)}"
+
+    # Services of a failed task may be in an unknown state; never reuse them.
+    # Teardown overlaps with reporting the outcome and claiming the next task.
+    session.release(force=status != "succeeded", wait=False)
+    return status, reason
+
+
+def _build_service_managers(job_id: int, lanes: int) -> list[ApptainerServiceManager]:
+    """
+    One service manager per lane. Lane 0 keeps the historical instance names.
+    Every lane reserves its own ROS domain on the node (see
+    `reserve_ros_domain_id`) so that the AV stacks of the lanes and of other
+    jobs on the node do not see each other's topics.
+    """
+    managers = [ApptainerServiceManager(id=f"job{job_id:02d}")]
+    for lane in range(1, lanes):
+        managers.append(ApptainerServiceManager(id=f"job{job_id:02d}-lane{lane}"))
+    return managers
+
+
+def _real_time_factor(value: str) -> Optional[float]:
+    if value == "max":
+        return None
+    try:
+        factor = float(value)
+    except ValueError:
+        factor = 0.0
+    if not factor > 0:
+        raise argparse.ArgumentTypeError(
+            f"expected a positive number or 'max', got {value!r}"
+        )
+    return factor
+
+
+def _build_runtime_spec(args: argparse.Namespace) -> dict[str, Any]:
+    """Runner runtime settings taken from the command line."""
+    return {
+        "engine": args.engine,
+        "quit_check": {
+            "mode": args.quit_check,
+            "interval": args.quit_check_interval,
+        },
+        "pace": {
+            "real_time_factor": args.real_time_factor,
+        },
+        "budget": {
+            "wall_s": args.episode_wall_budget,
+        },
+        "deadline": {
+            "enabled": not args.no_adaptive_deadlines,
+        },
+        "monitors": list(BUILTIN_MONITORS) if args.monitors == [] else args.monitors,
+        "metrics": {
+            "prometheus_textfile": args.prometheus_textfile,
+        },
+        "record": {
+            "enabled": args.record_trajectory,
+        },
+        "replay": {
+            "trajectory": args.replay,
+        },
+    }
 
 
 def parse_args(
@@ -102,6 +370,109 @@ def parse_args(
         default=None,
         help="Name of the sampler to filter tasks by (optional)",
     )
+    parser.add_argument(
+        "--persistent",
+        action="store_true",
+        help="Keep claiming tasks until the queue is drained or the walltime "
+        "budget runs out, reusing running services between compatible tasks",
+    )
+    parser.add_argument(
+        "--walltime",
+        type=float,
+        default=None,
+        help="Walltime budget in seconds for --persistent; no new task is "
+        "claimed when the remaining time is shorter than the longest task so far",
+    )
+    parser.add_argument(
+        "--engine",
+        type=str,
+        choices=list(RUNNER_ENGINES.keys()),
+        default="sync",
+        help="Runner engine: blocking gRPC calls or grpc.aio with concurrent "
+        "independent calls",
+    )
+    parser.add_argument(
+        "--quit-check",
+        type=str,
+        choices=[mode.value for mode in QuitCheckMode],
+        default=QuitCheckMode.EVERY_TICK.value,
+        help="How the runner asks the services whether the scenario is done",
+    )
+    parser.add_argument(
+        "--quit-check-interval",
+        type=int,
+        default=1,
+        help="Ticks between quit checks for 'interval' and 'concurrent' (and "
+        "the 'step_flag' fallback)",
+    )
+    parser.add_argument(
+        "--real-time-factor",
+        type=_real_time_factor,
+        default=None,
+        metavar="FACTOR",
+        help="Pace simulation time at FACTOR times wall-clock time (e.g. 1 for "
+        "real time, 2 for twice as fast), or 'max' to run as fast as the "
+        "services allow",
+    )
+    parser.add_argument(
+        "--episode-wall-budget",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="Abort an iteration as stalled after this much wall-clock time "
+        "(default: no wall-clock limit)",
+    )
+    parser.add_argument(
+        "--no-adaptive-deadlines",
+        action="store_true",
+        help="Keep the static step timeouts of the services instead of deriving "
+        "step deadlines from the observed step latency",
+    )
+    parser.add_argument(
+        "--monitors",
+        nargs="*",
+        choices=list(BUILTIN_MONITORS),
+        default=None,
+        metavar="MONITOR",
+        help="Monitors evaluated on every tick, out of "
+        f"{', '.join(BUILTIN_MONITORS)}; without names, all of them "
+        "(default: none)",
+    )
+    parser.add_argument(
+        "--lanes",
+        type=int,
+        default=1,
+        help="Number of sim/AV service pairs sweeping the parameter space of a "
+        "logical scenario in parallel",
+    )
+    parser.add_argument(
+        "--prometheus-textfile",
+        type=str,
+        default=None,
+        help="Write the latency metrics of the latest iteration to this file "
+        "in Prometheus text format (e.g. for the node-exporter textfile collector)",
+    )
+    parser.add_argument(
+        "--record-trajectory",
+        action="store_true",
+        help="Record the observation and control command of every tick to "
+        "trajectory.sbtr in each iteration directory",
+    )
+    parser.add_argument(
+        "--replay",
+        type=str,
+        default=None,
+        metavar="TRAJECTORY",
+        help="Start only the simulator and step it with the control commands "
+        "recorded in this trajectory.sbtr (see --record-trajectory), using the "
+        "task saved with it; no task is claimed from the manager",
+    )
+    parser.add_argument(
+        "--no-route-preflight",
+        action="store_true",
+        help="Do not check on the map's lane graph that the ego goal is "
+        "reachable before starting the services",
+    )
     parser.add_argument(
         "--log-level",
         type=str,
@@ -123,77 +494,64 @@ def main():
     executor_info = collect_executor_identity()
 
     job_id = int(executor_info.get("job_id", "unknown"))
+    runtime = _build_runtime_spec(args)
 
-    claimed_spec = client.claim_task_spec(
-        executor_info,
-        av_name=args.av,
-        simulator_name=args.simulator,
-        map_name=args.map,
-        scenario_id=args.scenario_id,
-        sampler_name=args.sampler,
+    lanes = max(1, args.lanes)
+    session = ServiceSession(
+        service_managers=_build_service_managers(job_id, lanes),
+        reuse=args.persistent,
     )
-
-    if claimed_spec is None:
-        logger.info("No task claimed. Executor will exit.")
+    if args.replay:
+        try:
+            _run_replay(session, args.replay, job_id, runtime)
+        finally:
+            session.release(force=True)
         return
 
-    task_id = claimed_spec.get("task", {}).get("id")
-    logger.info("Claimed task with ID: %s", task_id)
-
-    claimed_av = dict(claimed_spec.get("av", {}))
-    claimed_simulator = dict(claimed_spec.get("simulator", {}))
-    claimed_map = dict(claimed_spec.get("map", {}))
-    claimed_scenario = dict(claimed_spec.get("scenario", {}))
-    # logger.info("Claimed scenario: %s", claimed_scenario.get("title", "unknown"))
-
-    services_spec = build_services_spec(
-        claimed_av=claimed_av,
-        claimed_simulator=claimed_simulator,
-        claimed_map=claimed_map,
-        claimed_scenario=claimed_scenario,
-    )
-
-    av = claimed_av.get("name", "unknown_av")
-    sim = claimed_simulator.get("name", "unknown_simulator")
-    map_name = claimed_map.get("name", "unknown_map")
-    scenario_title = claimed_scenario.get("title", "unknown_scenario")
-    cla = f"{av}_{sim}"
-
-    output_dir = str(
-        f"./outputs/{cla}/{map_name}-{scenario_title.replace(' ', '_')}-{task_id}"
-    )
-    os.makedirs(output_dir, exist_ok=True)
+    start_time = time.monotonic()
+    longest_task_s = 0.0
+    try:
+        while True:
+            if args.walltime is not None:
+                remaining_s = args.walltime - (time.monotonic() - start_time)
+                if remaining_s < longest_task_s:
+                    logger.info(
+                        "Remaining walltime %.0f s is shorter than the longest "
+                        "task so far (%.0f s). Executor will exit.",
+                        remaining_s,
+                        longest_task_s,
+                    )
+                    break
 
-    with open(os.path.join(output_dir, "status.txt"), "w") as f:
-        pprint(claimed_spec, stream=f)
+            claimed_spec = client.claim_task_spec(
+                executor_info,
+                av_name=args.av,
+                simulator_name=args.simulator,
+                map_name=args.map,
+                scenario_id=args.scenario_id,
+                sampler_name=args.sampler,
+            )
 
-    service_manager = ApptainerServiceManager(id=f"job{job_id:02d}")
-    try:
-        started_specs = service_manager.start(
-            services_spec=services_spec,
-            output_dir=output_dir,
-        )
-        logger.info("Started services: %s", list(started_specs.keys()))
+            if claimed_spec is None:
+                logger.info("No task claimed. Executor will exit.")
+                break
 
-        runner_spec = build_runner_spec(
-            claimed_spec=claimed_spec,
-            claimed_simulator=claimed_simulator,
-            claimed_av=claimed_av,
-            claimed_map=claimed_map,
-            claimed_scenario=claimed_scenario,
-            started_specs=started_specs,
-            job_id=job_id,
-            output_dir=output_dir,
-        )
-        _execute_runner_task(client=client, task_id=task_id, runner_spec=runner_spec)
-    except Exception as exc:
-        logger.error("Executor failed with error: %s", exc)
-        if task_id is not None:
-            err_msg = f"{type(exc).__name__}: {str(exc)}"
-            client.task_failed(task_id, reason=err_msg)
+            task_start = time.monotonic()
+            status = _run_claimed_task(
+                client=client,
+                session=session,
+                claimed_spec=claimed_spec,
+                job_id=job_id,
+                runtime=runtime,
+                lanes=lanes,
+                route_preflight=not args.no_route_preflight,
+            )
+            longest_task_s = max(longest_task_s, time.monotonic() - task_start)
 
+            if status == "interrupted" or not args.persistent:
+                break
     finally:
-        service_manager.stop_all_services()
+        session.release(force=True)
 
 
 if __name__ == "__main__":
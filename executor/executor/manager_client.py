@@ -11,6 +11,7 @@ class ManagerClient:
     def __init__(self):
         self.manager_url = os.getenv("MANAGER_URL")
         self.timeout = int(os.getenv("TIMEOUT", "30"))
+        self.executor_id: int | None = None
 
         self.avs: dict[str, int] = {}
         self.simulators: dict[str, int] = {}
@@ -99,10 +100,12 @@ class ManagerClient:
         scenario_id: int | None = None,
         sampler_name: str | None = None,
     ) -> dict[str, dict[str, Any]] | None:
-        executor = self._register_executor(executor_info)
-        logger.info("Registered executor with ID: %s", executor["id"])
+        if self.executor_id is None:
+            executor = self._register_executor(executor_info)
+            logger.info("Registered executor with ID: %s", executor["id"])
+            self.executor_id = int(executor["id"])
         return self._claim_task_by_id(
-            executor_id=int(executor["id"]),
+            executor_id=self.executor_id,
             map_id=self._get_id_by_name("map", map_name),
             scenario_id=scenario_id,
             av_id=self._get_id_by_name("av", av_name),
@@ -0,0 +1,415 @@
+"""
+Route preflight: decide before any service boots whether the ego goal can be
+reached from the scenario start on the map's lane graph.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_right
+from collections import deque
+from dataclasses import dataclass, field
+import logging
+from pathlib import Path
+import threading
+from typing import Any, Dict, List, Optional, Set, Tuple
+import xml.etree.ElementTree as ET
+
+from executor.runner.sampler.base import parse_parameter_value_distribution_file
+from executor.runner.utils.road_network import map_key, resolve_position
+from executor.utils import resolve_host_path, rmlib_path
+
+logger = logging.getLogger(__name__)
+
+# (road id, lane section index, lane id)
+LaneNode = Tuple[str, int, int]
+
+DRIVABLE_LANE_TYPES = {
+    "driving",
+    "entry",
+    "exit",
+    "onRamp",
+    "offRamp",
+    "connectingRamp",
+    "bidirectional",
+}
+
+
+@dataclass
+class _Lane:
+    type: str
+    predecessor: Optional[int] = None
+    successor: Optional[int] = None
+
+
+@dataclass
+class _Road:
+    id: str
+    rule: str = "RHT"
+    # (elementType, elementId, contactPoint) of the road-level links.
+    predecessor: Optional[Tuple[str, str, Optional[str]]] = None
+    successor: Optional[Tuple[str, str, Optional[str]]] = None
+    section_s: List[float] = field(default_factory=list)
+    sections: List[Dict[int, _Lane]] = field(default_factory=list)
+
+
+@dataclass
+class _Connection:
+    incoming: str
+    connecting: str
+    contact_point: str
+    lane_links: List[Tuple[int, int]]
+
+
+def _int_or_none(value: Optional[str]) -> Optional[int]:
+    return int(value) if value not in (None, "") else None
+
+
+def _parse_road(elem: ET.Element) -> _Road:
+    road = _Road(id=elem.attrib["id"], rule=elem.attrib.get("rule", "RHT"))
+    link = elem.find("link")
+    if link is not None:
+        for tag in ("predecessor", "successor"):
+            target = link.find(tag)
+            if target is not None:
+                setattr(
+                    road,
+                    tag,
+                    (
+                        target.attrib.get("elementType", "road"),
+                        target.attrib["elementId"],
+                        target.attrib.get("contactPoint"),
+                    ),
+                )
+
+    for section in elem.iterfind("lanes/laneSection"):
+        lanes: Dict[int, _Lane] = {}
+        for lane in section.iterfind("*/lane"):
+            lane_link = lane.find("link")
+            pred = succ = None
+            if lane_link is not None:
+                p = lane_link.find("predecessor")
+                s = lane_link.find("successor")
+                pred = _int_or_none(p.attrib.get("id")) if p is not None else None
+                succ = _int_or_none(s.attrib.get("id")) if s is not None else None
+            lanes[int(lane.attrib["id"])] = _Lane(
+                type=lane.attrib.get("type", "none"),
+                predecessor=pred,
+                successor=succ,
+            )
+        road.section_s.append(float(section.attrib.get("s", 0.0)))
+        road.sections.append(lanes)
+    return road
+
+
+class LaneGraph:
+    """
+    Directed graph of drivable lanes: an edge leads from a lane to the lanes a
+    vehicle can continue into at its end (following lane and junction links
+    in the driving direction) and to its drivable neighbours for lane changes.
+    Lanes whose road ends in a link without lane-level links are `uncertain`:
+    where they continue is unknown.
+    """
+
+    def __init__(self, roads: Dict[str, _Road], connections: Dict[str, list]):
+        self._roads = roads
+        self.edges: Dict[LaneNode, Set[LaneNode]] = {}
+        self.uncertain: Set[LaneNode] = set()
+        for road in roads.values():
+            for k, lanes in enumerate(road.sections):
+                for lane_id, lane in lanes.items():
+                    if lane_id != 0 and lane.type in DRIVABLE_LANE_TYPES:
+                        self.edges[(road.id, k, lane_id)] = set()
+        for node in self.edges:
+            self._link(node, connections)
+
+    @classmethod
+    def from_xodr(cls, path: Path) -> "LaneGraph":
+        roads: Dict[str, _Road] = {}
+        # junction id -> connections
+        connections: Dict[str, list] = {}
+        for _, elem in ET.iterparse(str(path), events=("end",)):
+            if elem.tag == "road":
+                road = _parse_road(elem)
+                roads[road.id] = road
+                elem.clear()
+            elif elem.tag == "junction":
+                connections[elem.attrib["id"]] = [
+                    _Connection(
+                        incoming=conn.attrib["incomingRoad"],
+                        connecting=conn.attrib["connectingRoad"],
+                        contact_point=conn.attrib.get("contactPoint", "start"),
+                        lane_links=[
+                            (int(ll.attrib["from"]), int(ll.attrib["to"]))
+                            for ll in conn.iterfind("laneLink")
+                        ],
+                    )
+                    for conn in elem.iterfind("connection")
+                ]
+                elem.clear()
+        return cls(roads, connections)
+
+    def _forward(self, road: _Road, lane_id: int, lane: _Lane) -> List[bool]:
+        """Driving directions of a lane: True along the road's s axis."""
+        if lane.type == "bidirectional":
+            return [True, False]
+        along = lane_id < 0 if road.rule != "LHT" else lane_id > 0
+        return [along]
+
+    def _section_at_contact(self, road_id: str, contact_point: Optional[str]) -> int:
+        road = self._roads.get(road_id)
+        if road is None or contact_point != "end":
+            return 0
+        return len(road.sections) - 1
+
+    def _linked_back(
+        self, road_id: str, section: int, lane_id: int, via_predecessor: bool
+    ) -> Set[int]:
+        """Lanes of a section whose predecessor (or successor) is `lane_id`."""
+        road = self._roads.get(road_id)
+        if road is None or not road.sections:
+            return set()
+        return {
+            other_id
+            for other_id, other in road.sections[section].items()
+            if (other.predecessor if via_predecessor else other.successor) == lane_id
+        }
+
+    def _add(self, node: LaneNode, target: LaneNode) -> None:
+        if target in self.edges:
+            self.edges[node].add(target)
+
+    def _link(self, node: LaneNode, connections: Dict[str, list]) -> None:
+        road_id, k, lane_id = node
+        road = self._roads[road_id]
+        lane = road.sections[k][lane_id]
+
+        for forward in self._forward(road, lane_id, lane):
+            next_lane = lane.successor if forward else lane.predecessor
+            inner = k + 1 if forward else k - 1
+            if 0 <= inner < len(road.sections):
+                # Links may be given on either side of the section border;
+                # without any, lane ids carry over.
+                targets = self._linked_back(road_id, inner, lane_id, forward)
+                if next_lane is not None:
+                    targets.add(next_lane)
+                for target in targets or {lane_id}:
+                    self._add(node, (road_id, inner, target))
+                continue
+
+            road_link = road.successor if forward else road.predecessor
+            if road_link is None:
+                continue
+            element_type, element_id, contact_point = road_link
+            if element_type == "road":
+                section = self._section_at_contact(element_id, contact_point)
+                targets = self._linked_back(
+                    element_id, section, lane_id, contact_point != "end"
+                )
+                if next_lane is not None:
+                    targets.add(next_lane)
+                if not targets:
+                    self.uncertain.add(node)
+                for target in targets:
+                    self._add(node, (element_id, section, target))
+            elif element_type == "junction":
+                for conn in connections.get(element_id, []):
+                    if conn.incoming != road_id:
+                        continue
+                    if not conn.lane_links:
+                        self.uncertain.add(node)
+                    section = self._section_at_contact(
+                        conn.connecting, conn.contact_point
+                    )
+                    for from_lane, to_lane in conn.lane_links:
+                        if from_lane == lane_id:
+                            self._add(node, (conn.connecting, section, to_lane))
+
+        # Lane changes to the neighbouring lanes on the same side.
+        for neighbour in (lane_id - 1, lane_id + 1):
+            if neighbour != 0 and (neighbour > 0) == (lane_id > 0):
+                self._add(node, (road_id, k, neighbour))
+
+    def node_at(self, road_id: Any, lane_id: int, s: float) -> Optional[LaneNode]:
+        road = self._roads.get(str(road_id))
+        if road is None or not road.sections:
+            return None
+        k = max(bisect_right(road.section_s, s) - 1, 0)
+        node = (road.id, k, int(lane_id))
+        return node if node in self.edges else None
+
+    def reachable(self, start: LaneNode, goal: LaneNode) -> Optional[bool]:
+        """
+        Whether `goal` can be reached from `start`, or None if it cannot be
+        reached on the known links but the search passed an uncertain lane.
+        """
+        if start == goal:
+            return True
+        seen = {start}
+        queue = deque([start])
+        while queue:
+            for target in self.edges[queue.popleft()]:
+                if target == goal:
+                    return True
+                if target not in seen:
+                    seen.add(target)
+                    queue.append(target)
+        return None if not seen.isdisjoint(self.uncertain) else False
+
+
+_graphs: Dict[str, LaneGraph] = {}
+_graphs_lock = threading.Lock()
+
+
+def lane_graph(xodr_path: Path) -> LaneGraph:
+    """Lane graph of `xodr_path`, built once per process and map version."""
+    key = map_key(xodr_path)
+    with _graphs_lock:
+        graph = _graphs.get(key)
+        if graph is None:
+            graph = LaneGraph.from_xodr(xodr_path)
+            _graphs[key] = graph
+            logger.info(
+                "Built lane graph of %s: %d drivable lanes",
+                xodr_path,
+                len(graph.edges),
+            )
+        return graph
+
+
+# ---------- scenario start ----------
+def _resolve_parameter(value: str, declared: Dict[str, str]) -> Optional[str]:
+    if value.startswith("${"):
+        return None
+    if value.startswith("$"):
+        return declared.get(value[1:])
+    return value
+
+
+def _ego_entity(entities: List[str], ego_name: Optional[str]) -> Optional[str]:
+    """
+    The entity named `ego_name`, or else "ego"/"hero", or the only entity of
+    the scenario; None unless exactly one entity qualifies.
+    """
+    names = {ego_name.lower()} if ego_name else {"ego", "hero"}
+    matches = [n for n in entities if n.lower() in names]
+    if not matches and not ego_name and len(entities) == 1:
+        matches = entities
+    return matches[0] if len(matches) == 1 else None
+
+
+def scenario_start(
+    xosc_path: Path,
+    swept: Set[str] = frozenset(),
+    ego_name: Optional[str] = None,
+) -> Optional[Tuple[str, List[str]]]:
+    """
+    Teleport lane position of the ego in the `Init` section of `xosc_path` as
+    a `(type, values)` position spec, or None if it cannot be determined
+    without running the scenario: the ego cannot be told apart from the other
+    entities, its start depends on a swept parameter, or it is a world
+    position that the simulator may snap to another lane than RoadManager.
+    """
+    root = ET.parse(str(xosc_path)).getroot()
+    declared = {
+        p.attrib["name"]: p.attrib.get("value", "")
+        for p in root.iterfind("ParameterDeclarations/ParameterDeclaration")
+    }
+    entities = [o.attrib["name"] for o in root.iterfind("Entities/ScenarioObject")]
+    ego = _ego_entity(entities, ego_name)
+    if ego is None:
+        logger.info("Cannot tell the ego apart among the entities %s", entities)
+        return None
+
+    for private in root.iterfind("Storyboard/Init/Actions/Private"):
+        if private.attrib.get("entityRef") != ego:
+            continue
+        position = private.find("PrivateAction/TeleportAction/Position")
+        if position is None:
+            continue
+        if position.find("WorldPosition") is not None:
+            logger.info("Start of %s is a world position", ego)
+            return None
+        elem = position.find("LanePosition")
+        if elem is None:
+            continue
+        values = []
+        for attr in ("roadId", "laneId", "s", "offset"):
+            raw = elem.attrib.get(attr)
+            if raw is None:
+                break
+            if raw.startswith("$") and raw[1:] in swept:
+                logger.info("Start of %s depends on swept parameter %s", ego, raw)
+                return None
+            value = _resolve_parameter(raw, declared)
+            if value is None:
+                return None
+            values.append(value)
+        return "LanePosition", values
+    return None
+
+
+def _swept_parameters(param_file: Path) -> Set[str]:
+    return {
+        name
+        for spec in parse_parameter_value_distribution_file(param_file)
+        for name in spec.names
+    }
+
+
+def _lane_node(
+    graph: LaneGraph, kind: str, values: List[Any], xodr_path: Path
+) -> Optional[LaneNode]:
+    if kind == "LanePosition":
+        return graph.node_at(values[0], int(float(values[1])), float(values[2]))
+
+    pos = resolve_position(kind, values, xodr_path, Path(rmlib_path()))
+    return graph.node_at(pos.road_id, pos.lane_id, pos.s)
+
+
+def check_route(
+    claimed_scenario: Dict[str, Any], claimed_map: Dict[str, Any]
+) -> Optional[str]:
+    """
+    Reason why the ego goal cannot be reached from the scenario start, or None
+    if it can or if the preflight cannot tell. Only a definite answer marks a
+    task invalid; any problem in the preflight itself is logged and ignored.
+    """
+    try:
+        title = claimed_scenario.get("title")
+        scenario_dir = Path(resolve_host_path(claimed_scenario.get("scenario_path")))
+        map_dir = Path(resolve_host_path(claimed_map.get("xodr_path")))
+        xodr_path = map_dir / f"{claimed_map.get('name')}.xodr"
+        xosc_path = scenario_dir / f"{title}.xosc"
+        goal_config = claimed_scenario.get("goal_config") or {}
+        goal = goal_config.get("position")
+        if not goal or not xosc_path.exists() or not xodr_path.exists():
+            return None
+
+        param_file = scenario_dir / f"{title}_param.xosc"
+        swept = _swept_parameters(param_file) if param_file.exists() else set()
+        start = scenario_start(xosc_path, swept, goal_config.get("name"))
+        if start is None:
+            logger.info("Route preflight skipped: no fixed lane start of the ego")
+            return None
+
+        graph = lane_graph(xodr_path)
+        start_node = _lane_node(graph, *start, xodr_path)
+        goal_node = _lane_node(graph, goal["type"], goal["value"], xodr_path)
+        if start_node is None or goal_node is None:
+            logger.info("Route preflight skipped: start or goal is off the lane graph")
+            return None
+
+        reachable = graph.reachable(start_node, goal_node)
+        if reachable is None:
+            logger.info("Route preflight skipped: the route leaves the lane links")
+            return None
+        if reachable:
+            return None
+        return (
+            f"Goal (road {goal_node[0]}, lane {goal_node[2]}) is not reachable from "
+            f"start (road {start_node[0]}, lane {start_node[2]}) on map "
+            f"{claimed_map.get('name')} (route preflight)"
+        )
+    except Exception as exc:
+        logger.warning("Route preflight failed, continuing without it: %s", exc)
+        return None
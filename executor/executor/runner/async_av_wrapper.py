@@ -0,0 +1,99 @@
+from typing import Any, Optional
+import logging
+from time import perf_counter_ns
+
+import grpc
+from sbsvf_api import empty_pb2
+
+from executor.runner.av_wrapper import AVWrapperBase
+from executor.runner.utils.sps import ScenarioPack
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncAVWrapper(AVWrapperBase):
+    """`AVWrapper` counterpart on a `grpc.aio` channel; all RPCs are coroutines."""
+
+    # ---------------------------
+    # Public API
+    # ---------------------------
+    async def init(self):
+        # long-lived channel, bound to the running event loop
+        start_ns = perf_counter_ns()
+        self._open_stub(grpc.aio.insecure_channel(self._url))
+
+        # Ping
+        try:
+            pong = await self._stub.Ping(empty_pb2.Empty(), timeout=self._timeout)
+            logger.info(f"Ping response: {pong.msg}")
+        except grpc.RpcError as e:
+            raise RuntimeError(f"Ping failed: {e.code().name} - {e.details()}") from e
+
+        response = await self._stub.Init(self._init_request(), timeout=self._timeout)
+        self._init_done(response, start_ns)
+
+    async def reset(
+        self,
+        output_dir: str,
+        sps: ScenarioPack,
+        init_obs: Optional[dict[str, Any]] = {},
+    ):
+        req = self._reset_request(output_dir, sps, init_obs)
+        try:
+            start_ns = perf_counter_ns()
+            resp = await self._stub.Reset(req, timeout=self._timeout)
+            return self._reset_done(resp, start_ns)
+        except grpc.RpcError as e:
+            raise self._reset_error(e) from e
+
+    async def step(self, obs, time_stamp_ns: int):
+        req = self._step_request(obs, time_stamp_ns)
+        timeout = self.step_deadline.timeout_s()
+        try:
+            start_ns = perf_counter_ns()
+            resp = await self._stub.Step(req, timeout=timeout)
+            return self._step_done(resp, start_ns)
+        except grpc.RpcError as e:
+            raise self._step_error(e, timeout) from e
+
+    async def stop(self):
+        """
+        rpc Stop(Empty) returns (Empty)
+        """
+        if self._stub is None:
+            return
+        try:
+            await self._stub.Stop(empty_pb2.Empty(), timeout=min(self._timeout, 5.0))
+        except grpc.RpcError as e:
+            logger.warning(f"[WARN] Stop failed: {e.code().name} - {e.details()}")
+        finally:
+            self._connected = False
+            await self._close()
+
+    async def should_quit(self) -> bool:
+        """
+        rpc ShouldQuit(Empty) returns (ShouldQuitResponse)
+        """
+        if self._stub is None or not self._connected:
+            return True
+        try:
+            start_ns = perf_counter_ns()
+            resp = await self._stub.ShouldQuit(
+                empty_pb2.Empty(), timeout=self._should_quit_timeout()
+            )
+            return self._should_quit_done(resp, start_ns)
+        except grpc.RpcError:
+            # server 抖一下不要直接判 quit
+            return False
+
+    # ---------------------------
+    # Internal
+    # ---------------------------
+    async def _close(self):
+        if self._channel is not None:
+            try:
+                await self._channel.close()
+            except Exception:
+                pass
+        self._channel = None
+        self._stub = None
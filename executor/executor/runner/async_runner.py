@@ -0,0 +1,268 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter_ns
+from typing import Any, Optional
+
+from executor.runner.async_av_wrapper import AsyncAVWrapper
+from executor.runner.async_sim_wrapper import AsyncSimWrapper
+from executor.runner.monitor.base import MonitorStage
+from executor.runner.replay import AsyncReplayAV
+from executor.runner.runner import Lane, Runner
+from executor.runner.utils.metrics import LatencyHistogram
+from executor.runner.utils.quit_check import QuitCheckMode
+from executor.runner.utils.sps import ScenarioPack
+
+
+logger = logging.getLogger(__name__)
+
+_engine_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def engine_loop() -> asyncio.AbstractEventLoop:
+    """
+    Process-wide event loop of the async engine. `grpc.aio` channels are bound
+    to the loop they were created on, so wrappers kept alive across tasks must
+    always be driven by this loop.
+    """
+    global _engine_loop
+    if _engine_loop is None or _engine_loop.is_closed():
+        _engine_loop = asyncio.new_event_loop()
+    return _engine_loop
+
+
+class AsyncRunner(Runner):
+    """
+    Runner driving the services through `grpc.aio`.
+
+    Calls without a data dependency are issued concurrently: both quit checks,
+    and the per-tick hooks alongside the AV step. The simulator step still has
+    to finish before the AV step, which consumes its observation.
+    """
+
+    def _create_sim(self, sim_spec: dict[str, Any]) -> AsyncSimWrapper:
+        sim = AsyncSimWrapper(
+            sim_spec=sim_spec,
+            dt_ns=int(self._dt_s * 1e9),
+            deadline_spec=self._deadline_spec,
+        )
+        engine_loop().run_until_complete(sim.init())
+        return sim
+
+    def _create_av(self, av_spec: dict[str, Any]) -> AsyncAVWrapper:
+        if self._replay_trajectory is not None:
+            return AsyncReplayAV(self._replay_trajectory)
+        av = AsyncAVWrapper(
+            av_spec=av_spec,
+            dt_ns=int(self._dt_s * 1e9),
+            sps=self.sps,
+            deadline_spec=self._deadline_spec,
+        )
+        engine_loop().run_until_complete(av.init())
+        return av
+
+    def run_concrete(
+        self,
+        output_related: str,
+        sps: ScenarioPack,
+        params: Optional[dict[str, Any]] = None,
+        lane: Optional[Lane] = None,
+    ) -> dict[str, Any]:
+        coro = self._run_concrete_async(output_related, sps, params, lane)
+        loop = engine_loop()
+        if loop.is_running():
+            # Called from a lane thread while the loop drives all lanes.
+            return asyncio.run_coroutine_threadsafe(coro, loop).result()
+        return loop.run_until_complete(coro)
+
+    def _run_logical_lanes(self, total: int) -> None:
+        """
+        Every lane runs `_run_lane` in its own thread, as with the sync engine,
+        and hands its iterations to the engine loop, which interleaves the
+        RPCs of all lanes.
+        """
+        self._reset_iteration_queue(total)
+
+        loop = engine_loop()
+
+        async def run_all(pool: ThreadPoolExecutor) -> list[Any]:
+            # Wait for every lane: a lane still running needs the loop.
+            return await asyncio.gather(
+                *(
+                    loop.run_in_executor(pool, self._run_lane, lane)
+                    for lane in self.lanes
+                ),
+                return_exceptions=True,
+            )
+
+        # Lanes get their own threads, so they cannot starve the default
+        # executor that runs the tick hooks.
+        with ThreadPoolExecutor(
+            max_workers=len(self.lanes), thread_name_prefix="lane"
+        ) as pool:
+            results = loop.run_until_complete(run_all(pool))
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+    async def _should_quit(self, sim_quit_coro, av_quit_coro) -> Optional[str]:
+        """Ask both services concurrently; return which one wants to quit."""
+        sim_quit, av_quit = await asyncio.gather(sim_quit_coro, av_quit_coro)
+        if sim_quit:
+            logger.info("Simulator requested to quit.")
+            return "simulator"
+        if av_quit:
+            logger.info("AV requested to quit.")
+            return "av"
+        return None
+
+    async def _run_tick_hooks_async(
+        self,
+        tick: int,
+        sim_time_ns: int,
+        raw_obs: Any,
+        monitors: Optional[MonitorStage] = None,
+    ) -> None:
+        if self._tick_hooks or monitors is not None:
+            await asyncio.to_thread(
+                self._run_tick_hooks, tick, sim_time_ns, raw_obs, monitors
+            )
+
+    async def _run_concrete_async(
+        self,
+        output_related: str,
+        sps: ScenarioPack,
+        params: Optional[dict[str, Any]] = None,
+        lane: Optional[Lane] = None,
+    ) -> dict[str, Any]:
+        lane = lane if lane is not None else self.lanes[0]
+        sim, av = lane.sim, lane.av
+        service_output = self._service_output_dir(output_related)
+
+        logger.info("Resetting simulator...")
+        raw_obs = await sim.reset(service_output, sps, params)
+
+        logger.info("Resetting AV...")
+        ctrl_for_sim = await av.reset(service_output, sps, raw_obs)
+
+        monitors = self._monitors.get(lane.index)
+        if monitors is not None:
+            monitors.reset(sps)
+        scheduler = self._tick_scheduler()
+        sim_budget_ns = self._budget.sim_time_ns(sps.timeout_ns)
+        wall_budget_s = self._budget.wall_time_s(sps.timeout_ns)
+        sim_time_ns = 0  # Simulation time in nanoseconds
+        logger.info(
+            "Starting async execution loop. using dt_s=%.3f, real-time factor %s",
+            self._dt_s,
+            scheduler.real_time_factor or "max",
+        )
+
+        scheduler.start()
+        quit_check = self._quit_check
+        tick_latency = LatencyHistogram()
+        quit_reason = None
+        tick = 0
+        recorder = self._open_recorder(output_related, params)
+        try:
+            while True:
+                step_flag_supported = (
+                    sim.step_should_quit is not None and av.step_should_quit is not None
+                )
+                if quit_check.should_poll(tick, step_flag_supported):
+                    quit_reason = await self._should_quit(
+                        sim.should_quit(), av.should_quit()
+                    )
+                    if quit_reason:
+                        break
+
+                quit_task = None
+                if quit_check.concurrent_due(tick):
+                    quit_task = asyncio.ensure_future(
+                        self._should_quit(sim.should_quit(), av.should_quit())
+                    )
+
+                try:
+                    tick_start_ns = perf_counter_ns()
+                    ctrl_in = ctrl_for_sim
+                    raw_obs = await sim.step(ctrl_in, sim_time_ns)
+                    ctrl_for_sim, _ = await asyncio.gather(
+                        av.step(raw_obs, sim_time_ns),
+                        self._run_tick_hooks_async(
+                            tick, sim_time_ns, raw_obs, monitors
+                        ),
+                    )
+                    if recorder is not None:
+                        recorder.record(tick, sim_time_ns, raw_obs, ctrl_in)
+                    tick_latency.record(perf_counter_ns() - tick_start_ns)
+                    sim_time_ns += scheduler.advance()
+                    tick += 1
+
+                    # Quit answers issued alongside the step refer to the state
+                    # before it, so at most one extra tick is executed.
+                    if quit_task is not None:
+                        quit_reason = await quit_task
+                finally:
+                    # A failed step must not leave the quit checks running.
+                    if quit_task is not None and not quit_task.done():
+                        quit_task.cancel()
+                        await asyncio.gather(quit_task, return_exceptions=True)
+
+                if quit_task is not None:
+                    if quit_reason:
+                        break
+                elif quit_check.mode == QuitCheckMode.STEP_FLAG:
+                    if sim.step_should_quit:
+                        logger.info("Simulator requested to quit.")
+                        quit_reason = "simulator"
+                        break
+                    elif av.step_should_quit:
+                        logger.info("AV requested to quit.")
+                        quit_reason = "av"
+                        break
+
+                if monitors is not None and monitors.stopped_by is not None:
+                    monitor, reason = monitors.stopped_by
+                    logger.info("Monitor %s ended the episode: %s", monitor, reason)
+                    quit_reason = "monitor"
+                    break
+                if sim_budget_ns is not None and sim_time_ns >= sim_budget_ns:
+                    logger.info("Scenario timeout reached.")
+                    quit_reason = "timeout"
+                    break
+                self._check_wall_budget(scheduler, wall_budget_s, tick)
+                await scheduler.wait_async()
+        finally:
+            if recorder is not None:
+                recorder.close()
+
+        sim_time_need = scheduler.elapsed_s()
+        logger.info(
+            f"Completed {sim_time_ns / 1e9:.2f} seconds scenario, using {sim_time_need:.2f} sec."
+        )
+        metrics = self._write_iteration_metrics(
+            output_related,
+            lane,
+            tick,
+            sim_time_need,
+            sim_time_ns,
+            tick_latency,
+            scheduler,
+            monitors,
+        )
+        return {"quit_reason": quit_reason, "metrics": metrics}
+
+    def close(self):
+        if self._keep_alive:
+            logger.debug("Keeping simulator and AV connections alive.")
+            return
+        loop = engine_loop()
+        for lane in self.lanes:
+            try:
+                loop.run_until_complete(lane.av.stop())
+            except Exception:
+                logger.exception("av.stop() failed")
+            try:
+                loop.run_until_complete(lane.sim.stop())
+            except Exception:
+                logger.exception("sim.stop() failed")
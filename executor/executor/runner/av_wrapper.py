@@ -1,5 +1,6 @@
 from typing import Any, Optional
 import logging
+from time import perf_counter_ns
 
 import grpc
 from google.protobuf.struct_pb2 import Struct
@@ -11,30 +12,47 @@ from sbsvf_api import (
     path_pb2,
 )
 
+from executor.runner.utils.budget import AdaptiveDeadline, EpisodeStalled
+from executor.runner.utils.metrics import LatencyRecorder
+from executor.runner.utils.quit_check import PendingQuitCheck, step_quit_flag
 from executor.runner.utils.sps import ScenarioPack
 from executor.runner.utils.util import get_cfg
 
 logger = logging.getLogger(__name__)
 
 
-class AVWrapper:
+class AVWrapperBase:
+    """
+    AV service client without a transport: configuration, request building,
+    response handling, metrics and step deadline. `AVWrapper` and
+    `AsyncAVWrapper` only issue the RPCs, blocking or on `grpc.aio`.
+    """
+
     def __init__(
         self,
         av_spec: dict,
         dt_ns: int = None,
         sps: ScenarioPack = None,
+        deadline_spec: dict | bool | None = None,
     ):
         self._av_spec = av_spec
         self._sps = sps
 
         if dt_ns is None:
-            logger.warning("dt not specified for AVWrapper, defaulting to 0.01s")
+            logger.warning(
+                "dt not specified for %s, defaulting to 0.01s", type(self).__name__
+            )
             self._dt_s = 0.01
         else:
             self._dt_s = dt_ns / 1e9
 
         self._url = self._av_spec.get("url", "localhost:50052")
         self._timeout = float(self._av_spec.get("timeout", 100.0))
+        # Step deadline adapting to the observed step latency, capped at
+        # the static timeout.
+        self.step_deadline = AdaptiveDeadline.from_spec(
+            deadline_spec, ceiling_s=self._timeout
+        )
         self._av_cfg_path = self._av_spec.get("config_path", None)
         self._av_output_dir = self._av_spec.get("output_path", "/mnt/output")
 
@@ -46,74 +64,151 @@ class AVWrapper:
         self._channel = None
         self._stub = None
         self._connected = False
-
-        self.init()
+        # Quit flag of the last step response; None if the server has none.
+        self.step_should_quit: Optional[bool] = None
+        # RPC latencies, drained by the runner after every iteration.
+        self.metrics = LatencyRecorder()
 
     # ---------------------------
-    # Public API
+    # Requests and responses
     # ---------------------------
-    def init(self):
-        # long-lived channel
-        self._channel = grpc.insecure_channel(self._url)
-        self._stub = av_server_pb2_grpc.AvServerStub(self._channel)
-
-        # Ping
-        try:
-            pong = self._stub.Ping(empty_pb2.Empty(), timeout=self._timeout)
-            logger.info(f"Ping response: {pong.msg}")
-        except grpc.RpcError as e:
-            raise RuntimeError(f"Ping failed: {e.code().name} - {e.details()}") from e
+    def _open_stub(self, channel) -> None:
+        self._channel = channel
+        self._stub = av_server_pb2_grpc.AvServerStub(channel)
 
+    def _init_request(self):
         cfg_struct = Struct()
         cfg_struct.update(self._av_cfg if self._av_cfg is not None else {})
         config = config_pb2.Config(config=cfg_struct)
-        request = av_server_pb2.AvServerMessages.InitRequest(
+        return av_server_pb2.AvServerMessages.InitRequest(
             config=config,
             output_dir=path_pb2.Path(path=str(self._av_output_dir)),
             scenario_pack=self._sps.to_protobuf() if self._sps is not None else None,
             dt=self._dt_s,
         )
-        response = self._stub.Init(request, timeout=self._timeout)
+
+    def _init_done(self, response, start_ns: int) -> None:
         logger.info(f"Init response: {response.msg}")
         if not response.success:
             raise RuntimeError(f"Server Init returned success=false: {response.msg}")
 
+        self.metrics.record("init", perf_counter_ns() - start_ns)
         self._connected = True
 
-    def reset(
+    def _reset_request(
         self,
         output_dir: str,
         sps: ScenarioPack,
-        init_obs: Optional[dict[str, Any]] = {},
+        init_obs: Optional[dict[str, Any]],
     ):
-
         self._sps = sps
         self._ensure_ready()
-        req = av_server_pb2.AvServerMessages.ResetRequest(
+        self.step_should_quit = None
+        self.step_deadline.reset()
+        return av_server_pb2.AvServerMessages.ResetRequest(
             output_dir=path_pb2.Path(path=str(output_dir)),
             scenario_pack=self._sps.to_protobuf(),
             initial_observation=init_obs,
         )
+
+    def _reset_done(self, resp, start_ns: int):
+        self.metrics.record("reset", perf_counter_ns() - start_ns)
+        return resp.ctrl_cmd
+
+    @staticmethod
+    def _reset_error(e: grpc.RpcError) -> Exception:
+        if e.code() == grpc.StatusCode.UNAVAILABLE:
+            return RuntimeError(f"AV timed out during reset: {e.details()}")
+        return RuntimeError(f"Reset failed: {e.code().name} - {e.details()}")
+
+    def _step_request(self, obs, time_stamp_ns: int):
+        self._ensure_ready()
+        return av_server_pb2.AvServerMessages.StepRequest(
+            observation=obs, timestamp_ns=int(time_stamp_ns)
+        )
+
+    def _step_done(self, resp, start_ns: int):
+        latency_ns = perf_counter_ns() - start_ns
+        self.metrics.record("step", latency_ns)
+        self.step_deadline.observe(latency_ns)
+        self.step_should_quit = step_quit_flag(resp)
+        return resp.ctrl_cmd
+
+    @staticmethod
+    def _step_error(e: grpc.RpcError, timeout: float) -> Exception:
+        if e.code() == grpc.StatusCode.DEADLINE_EXCEEDED:
+            return EpisodeStalled(f"AV step exceeded its {timeout:.2f}s deadline")
+        return RuntimeError(f"Step failed: {e.code().name} - {e.details()}")
+
+    def _should_quit_timeout(self) -> float:
+        return min(self._timeout, 2.0)
+
+    def _should_quit_done(self, resp, start_ns: int) -> bool:
+        self.metrics.record("should_quit", perf_counter_ns() - start_ns)
+        return bool(resp.should_quit)
+
+    # ---------------------------
+    # Internal
+    # ---------------------------
+    def _ensure_ready(self):
+        if self._stub is None or self._channel is None or not self._connected:
+            raise RuntimeError(
+                f"{type(self).__name__} not initialized. Call init() first."
+            )
+
+
+class AVWrapper(AVWrapperBase):
+    def __init__(
+        self,
+        av_spec: dict,
+        dt_ns: int = None,
+        sps: ScenarioPack = None,
+        deadline_spec: dict | bool | None = None,
+    ):
+        super().__init__(av_spec, dt_ns=dt_ns, sps=sps, deadline_spec=deadline_spec)
+        self.init()
+
+    # ---------------------------
+    # Public API
+    # ---------------------------
+    def init(self):
+        # long-lived channel
+        start_ns = perf_counter_ns()
+        self._open_stub(grpc.insecure_channel(self._url))
+
+        # Ping
         try:
+            pong = self._stub.Ping(empty_pb2.Empty(), timeout=self._timeout)
+            logger.info(f"Ping response: {pong.msg}")
+        except grpc.RpcError as e:
+            raise RuntimeError(f"Ping failed: {e.code().name} - {e.details()}") from e
+
+        response = self._stub.Init(self._init_request(), timeout=self._timeout)
+        self._init_done(response, start_ns)
+
+    def reset(
+        self,
+        output_dir: str,
+        sps: ScenarioPack,
+        init_obs: Optional[dict[str, Any]] = {},
+    ):
+        req = self._reset_request(output_dir, sps, init_obs)
+        try:
+            start_ns = perf_counter_ns()
             resp = self._stub.Reset(req, timeout=self._timeout)
-            return resp.ctrl_cmd
+            return self._reset_done(resp, start_ns)
         except grpc.RpcError as e:
-            if e.code() == grpc.StatusCode.UNAVAILABLE:
-                raise RuntimeError(f"AV timed out during reset: {e.details()}") from e
-            raise RuntimeError(f"Reset failed: {e.code().name} - {e.details()}") from e
+            raise self._reset_error(e) from e
 
     def step(self, obs, time_stamp_ns: int):
-        self._ensure_ready()
-
-        req = av_server_pb2.AvServerMessages.StepRequest(
-            observation=obs, timestamp_ns=int(time_stamp_ns)
-        )
+        req = self._step_request(obs, time_stamp_ns)
+        timeout = self.step_deadline.timeout_s()
         try:
-            resp = self._stub.Step(req, timeout=self._timeout)
-            # StepResponse { repeated ObjectState objects }
-            return resp.ctrl_cmd
+            start_ns = perf_counter_ns()
+            resp = self._stub.Step(req, timeout=timeout)
+            return self._step_done(resp, start_ns)
         except grpc.RpcError as e:
-            raise RuntimeError(f"Step failed: {e.code().name} - {e.details()}") from e
+            raise self._step_error(e, timeout) from e
 
     def stop(self):
         """
@@ -136,21 +231,31 @@ class AVWrapper:
         if self._stub is None or not self._connected:
             return True
         try:
+            start_ns = perf_counter_ns()
             resp = self._stub.ShouldQuit(
-                empty_pb2.Empty(), timeout=min(self._timeout, 2.0)
+                empty_pb2.Empty(), timeout=self._should_quit_timeout()
             )
-            return bool(resp.should_quit)
+            return self._should_quit_done(resp, start_ns)
         except grpc.RpcError:
             # server 抖一下不要直接判 quit
             return False
 
+    def should_quit_future(self) -> Optional[PendingQuitCheck]:
+        """
+        Issue ShouldQuit without blocking; pass the returned call to
+        `resolve_should_quit`. Returns None when not connected.
+        """
+        if self._stub is None or not self._connected:
+            return None
+        start_ns = perf_counter_ns()
+        future = self._stub.ShouldQuit.future(
+            empty_pb2.Empty(), timeout=self._should_quit_timeout()
+        )
+        return PendingQuitCheck(future, start_ns, self.metrics)
+
     # ---------------------------
     # Internal
     # ---------------------------
-    def _ensure_ready(self):
-        if self._stub is None or self._channel is None or not self._connected:
-            raise RuntimeError("AvWrapper not initialized. Call init() first.")
-
     def _close(self):
         if self._channel is not None:
             try:
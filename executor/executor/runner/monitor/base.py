@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import importlib
+import logging
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from executor.runner.utils.observation import ObservationBuffer
+from executor.runner.utils.sps import ScenarioPack
+
+logger = logging.getLogger(__name__)
+
+# Columns of one tick's objects as in `ObservationBuffer.tick_columns`, one
+# row per object. `MonitorStage` moves the ego to row 0; `slot` keeps the
+# position of every object in the observation.
+Frame = Dict[str, np.ndarray]
+
+# Entity names taken as the ego when the scenario does not name it.
+EGO_NAMES = ("ego", "hero")
+
+BUILTIN_MONITORS: Dict[str, str] = {
+    "goal_distance": "executor.runner.monitor.safety:GoalDistanceMonitor",
+    "collision": "executor.runner.monitor.safety:CollisionMonitor",
+    "ttc": "executor.runner.monitor.safety:TTCMonitor",
+    "min_distance": "executor.runner.monitor.safety:MinDistanceMonitor",
+}
+
+
+class Monitor:
+    """
+    Evaluates the simulator observation after every step of an episode.
+
+    `reset` is called before each episode and `update` after every simulator
+    step; `update` returns a reason to end the episode once its outcome is
+    decided, or None to keep going. `result` is added to the iteration
+    metrics under the monitor's `name`.
+    """
+
+    name = "monitor"
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = dict(config or {})
+
+    def reset(self, sps: ScenarioPack) -> None:
+        pass
+
+    def update(self, tick: int, sim_time_ns: int, frame: Frame) -> Optional[str]:
+        raise NotImplementedError
+
+    def result(self) -> Dict[str, Any]:
+        return {}
+
+
+def load_monitors(spec: Optional[List[Any]]) -> List[Monitor]:
+    """
+    Instantiate the monitors of the runtime spec: a list of built-in names
+    (see `BUILTIN_MONITORS`) or `{"name": ..., "module_path": "pkg.mod:Class",
+    "config": {...}}` entries. Monitors can end episodes, so none run unless
+    asked for.
+    """
+    monitors = []
+    for entry in spec or ():
+        if isinstance(entry, str):
+            entry = {"name": entry}
+        name = entry.get("name")
+        module_path = entry.get("module_path") or BUILTIN_MONITORS.get(name)
+        if module_path is None:
+            raise ValueError(f"Unknown monitor {name!r}; set its module_path")
+        module_name, class_name = module_path.split(":")
+        monitor_class = getattr(importlib.import_module(module_name), class_name)
+        monitor = monitor_class(entry.get("config"))
+        if name:
+            monitor.name = name
+        monitors.append(monitor)
+    return monitors
+
+
+def _object_name(obj: Any) -> str:
+    for field in ("name", "id"):
+        value = getattr(obj, field, None)
+        if value is not None and value != "":
+            return str(value)
+    return ""
+
+
+def find_ego(objects: List[Any], names: Sequence[str]) -> Optional[int]:
+    """
+    Slot of the one object whose name or id is in `names` (case-insensitive),
+    or None if no object or more than one matches.
+    """
+    names = {name.lower() for name in names}
+    matches = [
+        slot for slot, obj in enumerate(objects) if _object_name(obj).lower() in names
+    ]
+    return matches[0] if len(matches) == 1 else None
+
+
+class MonitorStage:
+    """
+    Feeds the observation of every tick of one lane to its monitors.
+
+    The `objects` of a step are decoded once into an `ObservationBuffer` that
+    only holds the current tick, and every monitor sees the same columns.
+    The ego is found by the name of `sps.ego`, or by one of `EGO_NAMES`; on a
+    tick where it cannot be told apart the monitors are skipped. The first
+    monitor asking to end the episode is kept in `stopped_by`.
+    """
+
+    def __init__(self, monitors: List[Monitor]):
+        self.monitors = monitors
+        self._buffer = ObservationBuffer(capacity=64)
+        self.stopped_by: Optional[tuple[str, str]] = None
+        self._ego_names: Sequence[str] = EGO_NAMES
+        self.skipped_ticks = 0
+
+    def reset(self, sps: ScenarioPack) -> None:
+        self.stopped_by = None
+        self.skipped_ticks = 0
+        ego_name = sps.ego.name if sps is not None and sps.ego is not None else None
+        self._ego_names = (ego_name,) if ego_name else EGO_NAMES
+        for monitor in self.monitors:
+            monitor.reset(sps)
+
+    def __call__(self, tick: int, sim_time_ns: int, objects: Any) -> None:
+        objects = objects if isinstance(objects, list) else list(objects or ())
+        if not objects:
+            return
+        ego = find_ego(objects, self._ego_names)
+        if ego is None:
+            if not self.skipped_ticks:
+                logger.warning(
+                    "No single object named %s among the %d objects of tick %d; "
+                    "skipping the monitors while the ego is unknown",
+                    "/".join(self._ego_names),
+                    len(objects),
+                    tick,
+                )
+            self.skipped_ticks += 1
+            return
+
+        self._buffer.clear()
+        self._buffer.append_tick(objects, sim_time_ns, tick=tick)
+        frame = self._buffer.tick_columns(0)
+        if ego:
+            order = np.r_[ego, 0:ego, ego + 1 : len(objects)]
+            frame = {name: column[order] for name, column in frame.items()}
+        for monitor in self.monitors:
+            reason = monitor.update(tick, sim_time_ns, frame)
+            if reason and self.stopped_by is None:
+                self.stopped_by = (monitor.name, reason)
+
+    def results(self) -> Dict[str, Any]:
+        results: Dict[str, Any] = {m.name: m.result() for m in self.monitors}
+        if self.stopped_by is not None:
+            monitor, reason = self.stopped_by
+            results["stopped_by"] = {"monitor": monitor, "reason": reason}
+        if self.skipped_ticks:
+            results["skipped_ticks"] = self.skipped_ticks
+        return results
@@ -0,0 +1,265 @@
+"""
+Built-in safety monitors. Each evaluates the ego (row 0 of a frame, where
+`MonitorStage` puts it) against all other objects of the tick at once with
+NumPy.
+
+Objects are boxes of their `Shape` dimensions (length along the heading,
+width across it) centered on their position; cylinders and polygons are
+approximated by the same box.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from executor.runner.monitor.base import Frame, Monitor
+from executor.runner.utils.object import RoadObjectType
+from executor.runner.utils.sps import ScenarioPack
+
+
+def obb_overlap(frame: Frame) -> np.ndarray:
+    """
+    Whether the box of the ego overlaps the box of each other object, by the
+    separating axis test on the four box axes.
+    """
+    x, y, yaw = frame["x"], frame["y"], frame["yaw"]
+    half_length = frame["length"].astype(np.float64) / 2
+    half_width = frame["width"].astype(np.float64) / 2
+
+    # Unit vectors along (u) and across (v) the heading, one row per object.
+    u = np.stack((np.cos(yaw), np.sin(yaw)), axis=1)
+    v = np.stack((-u[:, 1], u[:, 0]), axis=1)
+    d = np.stack((x[1:] - x[0], y[1:] - y[0]), axis=1)
+
+    def radius(axes: np.ndarray, rows: slice) -> np.ndarray:
+        """Half the extent of the boxes in `rows` projected onto `axes`."""
+        along = np.abs((u[rows] * axes).sum(axis=1))
+        across = np.abs((v[rows] * axes).sum(axis=1))
+        return half_length[rows] * along + half_width[rows] * across
+
+    ego, others = slice(0, 1), slice(1, None)
+    separated = np.zeros(len(d), dtype=bool)
+    for axes in (
+        np.broadcast_to(u[0], d.shape),
+        np.broadcast_to(v[0], d.shape),
+        u[others],
+        v[others],
+    ):
+        gap = np.abs((d * axes).sum(axis=1))
+        separated |= gap > radius(axes, ego) + radius(axes, others)
+    return ~separated
+
+
+def center_distance(frame: Frame) -> np.ndarray:
+    """Distance from the ego's center to the center of each other object."""
+    return np.hypot(frame["x"][1:] - frame["x"][0], frame["y"][1:] - frame["y"][0])
+
+
+def time_to_collision(frame: Frame) -> np.ndarray:
+    """
+    Time until the ego and each other object touch if both keep their
+    velocity, with objects taken as the circles around their boxes. 0 if they
+    already touch, inf if they never will.
+    """
+    x, y, yaw, speed = frame["x"], frame["y"], frame["yaw"], frame["speed"]
+    radius = np.hypot(frame["length"], frame["width"]).astype(np.float64) / 2
+    px, py = x[1:] - x[0], y[1:] - y[0]
+    vx = speed[1:] * np.cos(yaw[1:]) - speed[0] * math.cos(yaw[0])
+    vy = speed[1:] * np.sin(yaw[1:]) - speed[0] * math.sin(yaw[0])
+    reach = radius[1:] + radius[0]
+
+    # |p + v t| = reach, taking the earlier root while closing in.
+    a = vx * vx + vy * vy
+    b = 2 * (px * vx + py * vy)
+    c = px * px + py * py - reach * reach
+    disc = b * b - 4 * a * c
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = (-b - np.sqrt(disc)) / (2 * a)
+    ttc = np.where((a > 0) & (b < 0) & (disc >= 0), t, np.inf)
+    return np.where(c <= 0, 0.0, ttc)
+
+
+def _object_type(frame: Frame, row: int) -> str:
+    value = int(frame["type"][row])
+    try:
+        return RoadObjectType(value).name
+    except ValueError:
+        return RoadObjectType.UNKNOWN.name
+
+
+class GoalDistanceMonitor(Monitor):
+    """
+    Distance from the ego to its goal position. Ends the episode once the
+    ego is within `reach_radius_m` (default 2.0) of the goal unless
+    `stop_on_reach` is false.
+    """
+
+    name = "goal_distance"
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        super().__init__(config)
+        self.reach_radius_m = float(self.config.get("reach_radius_m", 2.0))
+        self.stop_on_reach = bool(self.config.get("stop_on_reach", True))
+        self._goal: Optional[tuple[float, float]] = None
+        self.reset(None)
+
+    def reset(self, sps: Optional[ScenarioPack]) -> None:
+        self._goal = None
+        if sps is not None and sps.ego is not None:
+            position = sps.ego.goal.position
+            self._goal = (position.x, position.y)
+        self._distance: Optional[float] = None
+        self._min_distance: Optional[float] = None
+        self._reached_tick: Optional[int] = None
+
+    def update(self, tick: int, sim_time_ns: int, frame: Frame) -> Optional[str]:
+        if self._goal is None:
+            return None
+        goal_x, goal_y = self._goal
+        distance = math.hypot(frame["x"][0] - goal_x, frame["y"][0] - goal_y)
+        self._distance = distance
+        if self._min_distance is None or distance < self._min_distance:
+            self._min_distance = distance
+        if distance <= self.reach_radius_m:
+            if self._reached_tick is None:
+                self._reached_tick = tick
+            if self.stop_on_reach:
+                return "goal_reached"
+        return None
+
+    def result(self) -> Dict[str, Any]:
+        return {
+            "distance_m": self._distance,
+            "min_distance_m": self._min_distance,
+            "reached": self._reached_tick is not None,
+            "reached_tick": self._reached_tick,
+        }
+
+
+class CollisionMonitor(Monitor):
+    """
+    First overlap of the ego's box with another object's box. Ends the
+    episode on it unless `stop` is false.
+    """
+
+    name = "collision"
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        super().__init__(config)
+        self.stop = bool(self.config.get("stop", True))
+        self.reset(None)
+
+    def reset(self, sps: Optional[ScenarioPack]) -> None:
+        self._collision: Optional[Dict[str, Any]] = None
+
+    def update(self, tick: int, sim_time_ns: int, frame: Frame) -> Optional[str]:
+        if len(frame["x"]) < 2:
+            return None
+        hits = np.flatnonzero(obb_overlap(frame))
+        if not len(hits):
+            return None
+        if self._collision is None:
+            row = int(hits[0]) + 1
+            self._collision = {
+                "tick": tick,
+                "time_s": sim_time_ns / 1e9,
+                "slot": int(frame["slot"][row]),
+                "type": _object_type(frame, row),
+            }
+        return "collision" if self.stop else None
+
+    def result(self) -> Dict[str, Any]:
+        return {"collided": self._collision is not None, **(self._collision or {})}
+
+
+class TTCMonitor(Monitor):
+    """
+    Minimum time to collision of the ego with any other object, and the
+    number of ticks it stays below `threshold_s` (default 1.5). Ends the
+    episode when it drops below `stop_below_s`, if set.
+    """
+
+    name = "ttc"
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        super().__init__(config)
+        self.threshold_s = float(self.config.get("threshold_s", 1.5))
+        stop_below_s = self.config.get("stop_below_s")
+        self.stop_below_s = float(stop_below_s) if stop_below_s is not None else None
+        self.reset(None)
+
+    def reset(self, sps: Optional[ScenarioPack]) -> None:
+        self._min_ttc = math.inf
+        self._min_tick: Optional[int] = None
+        self._min_slot: Optional[int] = None
+        self._ticks_below = 0
+
+    def update(self, tick: int, sim_time_ns: int, frame: Frame) -> Optional[str]:
+        if len(frame["x"]) < 2:
+            return None
+        ttc = time_to_collision(frame)
+        row = int(np.argmin(ttc))
+        value = float(ttc[row])
+        if value < self._min_ttc:
+            self._min_ttc = value
+            self._min_tick = tick
+            self._min_slot = int(frame["slot"][row + 1])
+        if value < self.threshold_s:
+            self._ticks_below += 1
+        if self.stop_below_s is not None and value < self.stop_below_s:
+            return "ttc_below_threshold"
+        return None
+
+    def result(self) -> Dict[str, Any]:
+        finite = math.isfinite(self._min_ttc)
+        return {
+            "min_ttc_s": self._min_ttc if finite else None,
+            "tick": self._min_tick,
+            "slot": self._min_slot,
+            "ticks_below_threshold": self._ticks_below,
+        }
+
+
+class MinDistanceMonitor(Monitor):
+    """
+    Minimum center distance between the ego and any other object. Ends the
+    episode when it drops below `stop_below_m`, if set.
+    """
+
+    name = "min_distance"
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        super().__init__(config)
+        stop_below_m = self.config.get("stop_below_m")
+        self.stop_below_m = float(stop_below_m) if stop_below_m is not None else None
+        self.reset(None)
+
+    def reset(self, sps: Optional[ScenarioPack]) -> None:
+        self._min_distance = math.inf
+        self._min_tick: Optional[int] = None
+        self._min_slot: Optional[int] = None
+
+    def update(self, tick: int, sim_time_ns: int, frame: Frame) -> Optional[str]:
+        if len(frame["x"]) < 2:
+            return None
+        distance = center_distance(frame)
+        row = int(np.argmin(distance))
+        value = float(distance[row])
+        if value < self._min_distance:
+            self._min_distance = value
+            self._min_tick = tick
+            self._min_slot = int(frame["slot"][row + 1])
+        if self.stop_below_m is not None and value < self.stop_below_m:
+            return "min_distance_below_threshold"
+        return None
+
+    def result(self) -> Dict[str, Any]:
+        finite = math.isfinite(self._min_distance)
+        return {
+            "min_distance_m": self._min_distance if finite else None,
+            "tick": self._min_tick,
+            "slot": self._min_slot,
+        }
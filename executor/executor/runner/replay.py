@@ -0,0 +1,185 @@
+"""
+Simulator-only replay of a recorded trajectory.
+
+`ReplayAV` stands in for `AVWrapper`: instead of asking an AV service for the
+next control command it hands back the `CtrlCmd` stream of a trajectory file
+written by `TrajectoryRecorder`, so the simulator can be profiled or bisected
+without booting the AV container.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import Future
+import json
+import logging
+from pathlib import Path
+from time import perf_counter_ns
+from typing import Any, NamedTuple, Optional
+
+from sbsvf_api import control_pb2
+
+from executor.runner.utils.metrics import LatencyRecorder
+from executor.runner.utils.quit_check import PendingQuitCheck
+from executor.runner.utils.recorder import TrajectoryReader
+from executor.runner.utils.sps import ScenarioPack
+
+logger = logging.getLogger(__name__)
+
+PARAMS_FILE = "params.json"
+TASK_FILE = "task.json"
+
+
+class _ShouldQuitResponse(NamedTuple):
+    should_quit: bool
+
+
+def _json_value(value: Any) -> Any:
+    # Sampled values may be NumPy scalars.
+    return value.item() if hasattr(value, "item") else str(value)
+
+
+def save_replay_params(iteration_dir: Path, params: Optional[dict[str, Any]]) -> None:
+    """Keep the parameters of a recorded iteration next to its trajectory."""
+    with open(Path(iteration_dir) / PARAMS_FILE, "w", encoding="utf-8") as f:
+        json.dump(params or {}, f, default=_json_value)
+
+
+def save_replay_task(iteration_dir: Path, task: Optional[dict[str, Any]]) -> None:
+    """
+    Keep the claimed task of a recorded iteration, with its simulator, map and
+    scenario, next to its trajectory so that it can be replayed on its own.
+    """
+    if not task:
+        return
+    with open(Path(iteration_dir) / TASK_FILE, "w", encoding="utf-8") as f:
+        json.dump(task, f, default=_json_value)
+
+
+def load_replay_task(trajectory: Path) -> Optional[dict[str, Any]]:
+    """Claimed task of the recorded iteration, stored next to it."""
+    task_file = Path(trajectory).parent / TASK_FILE
+    if not task_file.exists():
+        return None
+    with open(task_file, "r", encoding="utf-8") as f:
+        return json.load(f) or None
+
+
+def load_replay_params(trajectory: Path) -> Optional[dict[str, Any]]:
+    """Scenario parameters of the recorded iteration, stored next to it."""
+    params_file = Path(trajectory).parent / PARAMS_FILE
+    if not params_file.exists():
+        return None
+    with open(params_file, "r", encoding="utf-8") as f:
+        return json.load(f) or None
+
+
+class ReplayAV:
+    """
+    `AVWrapper` replacement replaying recorded control commands.
+
+    Tick `k` of the recording holds the command the simulator was stepped
+    with at tick `k`: `reset()` returns the one of tick 0 and `step()` at tick
+    `k` the one of tick `k + 1`. Once the recording is exhausted the last
+    command is repeated and every quit check answers True.
+
+    Commands are looked up by their recorded tick. A recording missing ticks,
+    e.g. dropped by a full recorder queue, would step the simulator with the
+    wrong commands and is refused.
+    """
+
+    def __init__(self, trajectory: Path):
+        self.trajectory = Path(trajectory)
+        with TrajectoryReader(self.trajectory) as reader:
+            dropped = reader.dropped
+            self._ctrls = {
+                record.tick: (
+                    control_pb2.CtrlCmd.FromString(record.ctrl)
+                    if record.ctrl
+                    else None
+                )
+                for record in reader
+            }
+        if not self._ctrls:
+            raise ValueError(f"No ticks recorded in {self.trajectory}")
+        self._last_tick = max(self._ctrls)
+        if dropped:
+            raise ValueError(
+                f"Cannot replay {self.trajectory}: the recorder dropped "
+                f"{dropped} ticks"
+            )
+        missing = self._last_tick + 1 - len(self._ctrls)
+        if missing:
+            raise ValueError(
+                f"Cannot replay {self.trajectory}: {missing} of ticks "
+                f"0-{self._last_tick} are missing"
+            )
+        logger.info(
+            "Replaying %d recorded control commands from %s",
+            len(self._ctrls),
+            self.trajectory,
+        )
+        self._next = 0
+        self.step_should_quit: Optional[bool] = None
+        # Kept for the iteration metrics; a replay makes no RPCs.
+        self.metrics = LatencyRecorder()
+
+    @property
+    def exhausted(self) -> bool:
+        # True once the simulator has been stepped with the last command.
+        return self._next > self._last_tick + 1
+
+    def _advance(self) -> Optional[control_pb2.CtrlCmd]:
+        ctrl = self._ctrls[min(self._next, self._last_tick)]
+        self._next += 1
+        self.step_should_quit = self.exhausted
+        return ctrl
+
+    def init(self):
+        pass
+
+    def reset(
+        self,
+        output_dir: str,
+        sps: ScenarioPack,
+        init_obs: Optional[dict[str, Any]] = {},
+    ):
+        self._next = 0
+        return self._advance()
+
+    def step(self, obs, time_stamp_ns: int):
+        return self._advance()
+
+    def stop(self):
+        pass
+
+    def should_quit(self) -> bool:
+        return self.exhausted
+
+    def should_quit_future(self) -> PendingQuitCheck:
+        future: Future = Future()
+        future.set_result(_ShouldQuitResponse(self.exhausted))
+        return PendingQuitCheck(future, perf_counter_ns())
+
+
+class AsyncReplayAV(ReplayAV):
+    """`ReplayAV` with the coroutine API of `AsyncAVWrapper`."""
+
+    async def init(self):
+        pass
+
+    async def reset(
+        self,
+        output_dir: str,
+        sps: ScenarioPack,
+        init_obs: Optional[dict[str, Any]] = {},
+    ):
+        return ReplayAV.reset(self, output_dir, sps, init_obs)
+
+    async def step(self, obs, time_stamp_ns: int):
+        return ReplayAV.step(self, obs, time_stamp_ns)
+
+    async def stop(self):
+        pass
+
+    async def should_quit(self) -> bool:
+        return self.exhausted
@@ -1,10 +1,37 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 import importlib
 import logging
 from pathlib import Path
-from time import time
-from typing import Any, Optional
+import threading
+from time import perf_counter_ns, time
+from typing import Any, Callable, Optional
 
 from executor.runner.av_wrapper import AVWrapper
+from executor.runner.monitor.base import MonitorStage, load_monitors
+from executor.runner.sampler.base import Shard
+from executor.runner.utils.budget import BudgetPolicy, EpisodeStalled
+from executor.runner.utils.manifest import ResumeManifest
+from executor.runner.utils.metrics import (
+    LatencyHistogram,
+    PrometheusTextfile,
+    iteration_metrics,
+    prometheus_samples,
+    write_metrics_file,
+)
+from executor.runner.utils.quit_check import (
+    QuitCheckMode,
+    QuitCheckPolicy,
+    resolve_should_quit,
+)
+from executor.runner.replay import (
+    ReplayAV,
+    load_replay_params,
+    save_replay_params,
+    save_replay_task,
+)
+from executor.runner.utils.recorder import TrajectoryRecorder
+from executor.runner.utils.scheduler import PacePolicy, TickScheduler
 from executor.runner.utils.sps import ScenarioPack
 from executor.runner.sim_wrapper import SimWrapper
 
@@ -12,8 +39,43 @@ from executor.runner.sim_wrapper import SimWrapper
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class Lane:
+    """One simulator/AV service pair that iterations can run on."""
+
+    index: int
+    sim: SimWrapper
+    av: AVWrapper
+
+
+def _outcome_status(error: Optional[Exception]) -> str:
+    if error is None:
+        return "succeeded"
+    if isinstance(error, EpisodeStalled):
+        return "stalled"
+    return "failed"
+
+
 class Runner:
-    def __init__(self, spec: dict[str, Any]):
+    # Failed iterations in a row after which a sweep that keeps going past
+    # failures assumes the services are broken and stops.
+    MAX_CONSECUTIVE_FAILURES = 3
+
+    def __init__(
+        self,
+        spec: dict[str, Any],
+        lanes: Optional[list[Lane]] = None,
+        keep_alive: bool = False,
+    ):
+        """
+        Args:
+            spec: Runner specification built by `build_runner_spec`.
+            lanes: Already initialized lanes to reuse instead of connecting and
+                sending `Init` again. Lane 0 is the primary sim/AV pair, the
+                others match the entries of `spec["lanes"]`.
+            keep_alive: Leave the wrappers connected on `close()` so that the
+                next task can reuse them and only call `Reset`.
+        """
         runtime_spec = spec.get("runtime", {})
         task_spec = spec.get("task", {})
         sim_spec = spec.get("simulator", {})
@@ -26,22 +88,45 @@ class Runner:
         # TODO: default to NoneBridge
         # bridge_spec = {"name": "none", "module_path": "sv.bridge.none:NoneBridge"}
 
-        # TODO: default to defaultMonitor
-        monitor_spec = {
-            "name": "default",
-            "module_path": "sv.monitor.default:defaultMonitor",
-            "config_path": "configs/monitor/default.yaml",
-            "module_path": "sv.monitor.default:defaultMonitor",
-            "config_path": "configs/monitor/default.yaml",
-        }
-
         self.job_id = task_spec.get("job_id", "unknown_job")
+        self._keep_alive = keep_alive
+        # Output directory sent to the services is relative to the container
+        # output mount, which may be shared by several tasks.
+        self._service_output_prefix = task_spec.get("service_output_prefix", "")
+        # Claimed task saved with recordings so that they can be replayed.
+        self._claimed_task = task_spec.get("claimed")
 
         self._dt_s = runtime_spec.get("dt", None)
         if self._dt_s is None:
             logger.warning("No 'dt' specified in runtime_spec; defaulting to 0.01s")
             self._dt_s = 0.01
 
+        self._quit_check = QuitCheckPolicy.from_spec(runtime_spec.get("quit_check"))
+        self._pace = PacePolicy.from_spec(runtime_spec.get("pace"))
+        self._budget = BudgetPolicy.from_spec(runtime_spec.get("budget"))
+        self._deadline_spec = runtime_spec.get("deadline")
+        # Monitors evaluated on every tick; see `load_monitors`.
+        self._monitor_spec = runtime_spec.get("monitors")
+        self._manifest: Optional[ResumeManifest] = None
+        # Guards the sampler, which lanes share.
+        self._sampler_lock = threading.Lock()
+        self._consecutive_failures = 0
+
+        metrics_spec = runtime_spec.get("metrics") or {}
+        prometheus_textfile = metrics_spec.get("prometheus_textfile")
+        self._prometheus = (
+            PrometheusTextfile(prometheus_textfile) if prometheus_textfile else None
+        )
+        # Optional per-tick recording of observations and control commands.
+        self._record_spec = runtime_spec.get("record") or {}
+        # Simulator-only replay of a recorded trajectory instead of the AV.
+        replay_spec = runtime_spec.get("replay") or {}
+        self._replay_trajectory = (
+            Path(replay_spec["trajectory"]).expanduser().resolve()
+            if replay_spec.get("trajectory")
+            else None
+        )
+
         self.output_base = (
             Path(task_spec.get("output_dir", "./outputs")).expanduser().resolve()
         )
@@ -56,46 +141,72 @@ class Runner:
             )
             raise exc
 
-        try:
-            self.sim = SimWrapper(
-                sim_spec=sim_spec,
-                dt_ns=int(self._dt_s * 1e9),
-            )
-            # self.sim.init(sim_spec=sim_spec, dt=self._dt_s)
-        except Exception as exc:
-            logger.error("Simulator initialization failed")
-            raise exc
+        # Lane 0 is the primary pair; extra lanes only run logical scenarios.
+        lane_specs = [{"simulator": sim_spec, "av": av_spec}]
+        lane_specs.extend(spec.get("lanes", []))
+        warm_lanes = list(lanes or [])
 
-        try:
-            self.av = AVWrapper(
-                av_spec=av_spec,
-                dt_ns=int(self._dt_s * 1e9),
-                sps=self.sps,
-            )
-            # self.av.init(av_spec=av_spec, dt=self._dt_s)
-        except Exception as exc:
-            logger.error("AV initialization failed")
-            raise exc
+        self.lanes: list[Lane] = []
+        for index, lane_spec in enumerate(lane_specs):
+            if index < len(warm_lanes):
+                logger.info("Reusing initialized wrappers of lane %d.", index)
+                self.lanes.append(warm_lanes[index])
+                continue
+
+            try:
+                sim = self._create_sim(lane_spec["simulator"])
+                # self.sim.init(sim_spec=sim_spec, dt=self._dt_s)
+            except Exception as exc:
+                logger.error("Simulator initialization failed")
+                raise exc
+
+            try:
+                av = self._create_av(lane_spec["av"])
+                # self.av.init(av_spec=av_spec, dt=self._dt_s)
+            except Exception as exc:
+                logger.error("AV initialization failed")
+                raise exc
+
+            self.lanes.append(Lane(index=index, sim=sim, av=av))
+
+        self.sim = self.lanes[0].sim
+        self.av = self.lanes[0].av
+
+        # Per-tick work that only depends on the simulator observation, called
+        # as hook(tick, sim_time_ns, raw_obs) after every simulator step.
+        self._tick_hooks: list[Callable[[int, int, Any], None]] = []
 
         # module = importlib.import_module(bridge_spec["module_path"].split(":")[0])
         # bridge_class = getattr(module, bridge_spec["module_path"].split(":")[1])
         # self.bridge = bridge_class(cfg_path=bridge_spec.get("config_path", None))
 
-        # module = importlib.import_module(monitor_spec["module_path"].split(":")[0])
-        # monitor_class = getattr(module, monitor_spec["module_path"].split(":")[1])
-        # self.monitor = monitor_class(
-        #     cfg_path=monitor_spec.get("config_path", None),
-        #     plan_name=self._id,
-        # )
-
-        if self.sps.param_range_file is not None:
+        # Every lane runs its own set of monitors.
+        self._monitors: dict[int, MonitorStage] = {}
+        for lane in self.lanes:
+            monitors = load_monitors(self._monitor_spec)
+            if monitors:
+                self._monitors[lane.index] = MonitorStage(monitors)
+
+        self._replay_params = None
+        if self._replay_trajectory is not None:
+            # A replay repeats one recorded iteration with its parameters.
+            self._replay_params = load_replay_params(self._replay_trajectory)
+            logger.info(
+                "Replaying %s with parameters: %s",
+                self._replay_trajectory,
+                self._replay_params,
+            )
+            self.param_sampler = None
+        elif self.sps.param_range_file is not None:
             logger.info("Parameter range file provided: %s", self.sps.param_range_file)
             # param_sampler
             module = importlib.import_module(sampler_spec["module_path"].split(":")[0])
             sampler_class = getattr(module, sampler_spec["module_path"].split(":")[1])
             self.param_sampler = sampler_class(
+                cfg_path=sampler_spec.get("config_path"),
                 param_range_file=self.sps.param_range_file,
                 past_results=None,
+                shard=Shard.from_spec(task_spec.get("shard")),
             )
         else:
             logger.info(
@@ -103,6 +214,50 @@ class Runner:
             )
             self.param_sampler = None
 
+    def _create_sim(self, sim_spec: dict[str, Any]) -> SimWrapper:
+        return SimWrapper(
+            sim_spec=sim_spec,
+            dt_ns=int(self._dt_s * 1e9),
+            deadline_spec=self._deadline_spec,
+        )
+
+    def _create_av(self, av_spec: dict[str, Any]) -> AVWrapper:
+        if self._replay_trajectory is not None:
+            return ReplayAV(self._replay_trajectory)
+        return AVWrapper(
+            av_spec=av_spec,
+            dt_ns=int(self._dt_s * 1e9),
+            sps=self.sps,
+            deadline_spec=self._deadline_spec,
+        )
+
+    def _check_wall_budget(
+        self, scheduler: TickScheduler, wall_budget_s: Optional[float], tick: int
+    ) -> None:
+        if wall_budget_s is None:
+            return
+        elapsed_s = scheduler.elapsed_s()
+        if elapsed_s > wall_budget_s:
+            raise EpisodeStalled(
+                f"Episode exceeded its wall-clock budget of {wall_budget_s:.2f}s "
+                f"after {tick} ticks"
+            )
+
+    def _tick_scheduler(self) -> TickScheduler:
+        return TickScheduler(int(self._dt_s * 1e9), self._pace)
+
+    def _run_tick_hooks(
+        self,
+        tick: int,
+        sim_time_ns: int,
+        raw_obs: Any,
+        monitors: Optional[MonitorStage] = None,
+    ) -> None:
+        for hook in self._tick_hooks:
+            hook(tick, sim_time_ns, raw_obs)
+        if monitors is not None:
+            monitors(tick, sim_time_ns, raw_obs)
+
     def exec(self) -> None:
         """
         Run the scenario(s) according to the provided specifications.
@@ -110,7 +265,10 @@ class Runner:
         otherwise, it will run a single concrete scenario.
         """
         try:
-            if self.param_sampler is not None:
+            if self._replay_trajectory is not None:
+                logger.info("Replaying recorded control commands without an AV.")
+                self.concrete_wrapper("replay", self.sps, self._replay_params)
+            elif self.param_sampler is not None:
                 logger.info("Running logical scenario with parameter sampling.")
                 self.run_logical()
             else:
@@ -128,36 +286,184 @@ class Runner:
 
     def run_logical(self):
         logger.debug("Starting parameter sampling execution.")
-        total = self.param_sampler.total_permutations()
+        total = self.param_sampler.max_iterations()
 
-        logger.info(f"Total parameter combinations: {total}")
+        logger.info(
+            f"Total parameter combinations: {self.param_sampler.total_permutations()}"
+        )
+        if self.param_sampler.shard is not None:
+            logger.info(f"Combinations in shard {self.param_sampler.shard}: {total}")
+        if total < self.param_sampler.total_permutations():
+            logger.info(f"Running at most {total} iterations.")
 
-        for i in range(total):
-            logger.info(f"Sampling iteration {i+1}/{total}")
-            params = self.param_sampler.next()
+        self._manifest = ResumeManifest(
+            self.output_base, self.param_sampler.total_permutations()
+        )
+        try:
+            resumed = 0
+            for index in self._manifest.completed():
+                self.param_sampler.mark_seen(index)
+                resumed += 1
+            if resumed:
+                logger.info(f"Skipping {resumed} combinations completed earlier.")
+            self._run_logical_iterations(total)
+        finally:
+            self._manifest.close()
+            self._manifest = None
+
+    def _run_logical_iterations(self, total: int) -> None:
+        if len(self.lanes) > 1:
+            logger.info("Running parameter sweep on %d lanes.", len(self.lanes))
+            self._run_logical_lanes(total)
+            logger.info("Completed all parameter combinations.")
+            return
+
+        for n in range(total):
+            with self._sampler_lock:
+                params = self.param_sampler.next()
 
             if params is None:
                 logger.debug("Parameter sampling completed.")
                 break
 
+            # Iterations are named by their grid index so that the outputs of
+            # all shards of a sweep line up.
+            i = self.param_sampler.last_index
+            logger.info(f"Sampling iteration {i+1} ({n+1}/{total})")
+
             logger.debug(f"Running scenario with parameters: {params}")
 
             try:
-                self.concrete_wrapper(f"iteration_{i+1}", self.sps, params)
-            except RuntimeError as e:
+                self.concrete_wrapper(
+                    f"iteration_{i+1}", self.sps, params, grid_index=i
+                )
+            except Exception as e:
                 logger.error(
                     f"Scenario execution failed at iteration {i+1} with parameters: {params}"
                 )
-                raise e
+                if not self._keep_sweeping(e):
+                    raise e
 
         logger.info("Completed all parameter combinations.")
 
+    def _reset_iteration_queue(self, total: int) -> None:
+        self._queue_total = total
+        self._queue_next = 0
+        self._queue_stopped = False
+
+    def _next_iteration(self) -> Optional[tuple[int, dict[str, Any]]]:
+        """Hand the next grid point to whichever lane asks first."""
+        with self._sampler_lock:
+            if self._queue_stopped or self._queue_next >= self._queue_total:
+                return None
+            params = self.param_sampler.next()
+            if params is None:
+                logger.debug("Parameter sampling completed.")
+                return None
+            self._queue_next += 1
+            return self.param_sampler.last_index, params
+
+    def _stop_iteration_queue(self) -> None:
+        with self._sampler_lock:
+            self._queue_stopped = True
+
+    def _run_lane(self, lane: Lane) -> None:
+        while (claimed := self._next_iteration()) is not None:
+            i, params = claimed
+            logger.info(f"Lane {lane.index}: sampling iteration {i+1}")
+            try:
+                self.concrete_wrapper(
+                    f"iteration_{i+1}", self.sps, params, lane, grid_index=i
+                )
+            except Exception as e:
+                logger.error(
+                    f"Scenario execution failed at iteration {i+1} with parameters: {params}"
+                )
+                if not self._keep_sweeping(e):
+                    self._stop_iteration_queue()
+                    raise e
+
+    def _keep_sweeping(self, error: Exception) -> bool:
+        """
+        Whether the sweep goes on after an iteration raised `error`. Samplers
+        learning from outcomes need the failed iterations too, so their sweeps
+        only stop once the services stalled or failed several times in a row.
+        """
+        sampler = self.param_sampler
+        if sampler is None or not sampler.learns_from_outcomes:
+            return False
+        if isinstance(error, EpisodeStalled):
+            return False
+        with self._sampler_lock:
+            failures = self._consecutive_failures
+        if failures >= self.MAX_CONSECUTIVE_FAILURES:
+            logger.error("%d iterations failed in a row; stopping the sweep.", failures)
+            return False
+        logger.warning("Continuing the sweep after a failed iteration.")
+        return True
+
+    def _run_logical_lanes(self, total: int) -> None:
+        self._reset_iteration_queue(total)
+        with ThreadPoolExecutor(
+            max_workers=len(self.lanes), thread_name_prefix="lane"
+        ) as pool:
+            futures = [pool.submit(self._run_lane, lane) for lane in self.lanes]
+            for future in futures:
+                future.result()
+
     def concrete_wrapper(
         self,
         output_related: str,
         sps: ScenarioPack,
         params: Optional[dict[str, Any]] = None,
-    ) -> None:
+        lane: Optional[Lane] = None,
+        grid_index: Optional[int] = None,
+    ) -> Optional[dict[str, Any]]:
+        """
+        Run one iteration and return its outcome, or None if it had already
+        completed. Outcomes of grid points are fed back to the sampler.
+        """
+        status_dir = self._begin_iteration(output_related, grid_index)
+        if status_dir is None:
+            return None
+
+        try:
+            result = self.run_concrete(output_related, sps, params, lane)
+        except Exception as e:
+            self._iteration_failed(output_related, status_dir, e)
+            self._report_outcome(grid_index, params, error=e)
+            raise e
+        else:
+            self._iteration_completed(output_related, status_dir, grid_index)
+            return self._report_outcome(grid_index, params, result=result)
+
+    def _report_outcome(
+        self,
+        grid_index: Optional[int],
+        params: Optional[dict[str, Any]],
+        result: Optional[dict[str, Any]] = None,
+        error: Optional[Exception] = None,
+    ) -> dict[str, Any]:
+        outcome = {
+            "index": grid_index,
+            "params": params or {},
+            "status": _outcome_status(error),
+            "error": f"{type(error).__name__}: {error}" if error is not None else None,
+            **(result or {}),
+        }
+        with self._sampler_lock:
+            if error is None:
+                self._consecutive_failures = 0
+            else:
+                self._consecutive_failures += 1
+            if self.param_sampler is not None and grid_index is not None:
+                self.param_sampler.update_with_results([outcome])
+        return outcome
+
+    def _begin_iteration(
+        self, output_related: str, grid_index: Optional[int] = None
+    ) -> Optional[Path]:
+        """Create the status dir, or return None if the iteration already ran."""
         status_dir = Path(self.output_base / output_related / "status")
         status_dir.mkdir(parents=True, exist_ok=True)
 
@@ -166,97 +472,248 @@ class Runner:
             logger.warning(
                 f"Completed file already exists for {output_related}. Skipping execution."
             )
-            return
+            # Outputs from before the manifest existed.
+            self._mark_completed(grid_index)
+            return None
+        return status_dir
 
-        try:
-            self.run_concrete(output_related, sps, params)
-        except Exception as e:
-            logger.error(
-                f"Error in concrete scenario execution for {output_related}: {e}"
+    def _iteration_failed(
+        self, output_related: str, status_dir: Path, e: Exception
+    ) -> None:
+        logger.error(f"Error in concrete scenario execution for {output_related}: {e}")
+        with open(status_dir / "error.txt", "a") as f:
+            f.write(
+                f"Error at {time()} by job {self.job_id}: {type(e).__name__}: {str(e)}\n"
             )
-            with open(status_dir / "error.txt", "a") as f:
-                f.write(
-                    f"Error at {time()} by job {self.job_id}: {type(e).__name__}: {str(e)}\n"
-                )
-            raise e
-        else:
-            with open(completed_file, "w") as f:
-                f.write(f"Completed at {time()} by job {self.job_id}\n")
-            logger.info(f"Scenario {output_related} completed successfully.")
+
+    def _iteration_completed(
+        self, output_related: str, status_dir: Path, grid_index: Optional[int] = None
+    ) -> None:
+        with open(status_dir / "completed.txt", "w") as f:
+            f.write(f"Completed at {time()} by job {self.job_id}\n")
+        self._mark_completed(grid_index)
+        logger.info(f"Scenario {output_related} completed successfully.")
+
+    def _mark_completed(self, grid_index: Optional[int]) -> None:
+        if self._manifest is not None and grid_index is not None:
+            self._manifest.mark_completed(grid_index)
 
     def run_concrete(
         self,
         output_related: str,
         sps: ScenarioPack,
         params: Optional[dict[str, Any]] = None,
-    ) -> None:
+        lane: Optional[Lane] = None,
+    ) -> dict[str, Any]:
         """
-        Run a single concrete scenario with the given parameters.
+        Run a single concrete scenario with the given parameters on `lane`,
+        the primary lane by default. Returns why the run stopped and its
+        metrics.
         """
+        lane = lane if lane is not None else self.lanes[0]
+        sim, av = lane.sim, lane.av
 
         raw_obs = None
+        service_output = self._service_output_dir(output_related)
 
         logger.info(f"Resetting simulator...")
-        raw_obs = self.sim.reset(output_related, sps, params)
+        raw_obs = sim.reset(service_output, sps, params)
 
         logger.info("Resetting AV...")
-        ctrl_for_sim = self.av.reset(output_related, sps, raw_obs)
-
-        dt_s = self._dt_s
-        dt_ns = int(dt_s * 1e9)
-
-        use_real_time = False
-        if dt_ns <= 0:  # use real-time stepping
-            dt_ns = 0
-            use_real_time = True
-            prev = time()
-
+        ctrl_for_sim = av.reset(service_output, sps, raw_obs)
+
+        monitors = self._monitors.get(lane.index)
+        if monitors is not None:
+            monitors.reset(sps)
+        scheduler = self._tick_scheduler()
+        sim_budget_ns = self._budget.sim_time_ns(sps.timeout_ns)
+        wall_budget_s = self._budget.wall_time_s(sps.timeout_ns)
         sim_time_ns = 0  # Simulation time in nanoseconds
-        logger.info("Starting execution loop. using dt_s=%.3f", dt_s)
-
-        real_start_time_s = time()
-        while True:
-            # loop_start_time = time()
-            if self.sim.should_quit():
-                logger.info("Simulator requested to quit.")
-                break
-            elif self.av.should_quit():
-                logger.info("AV requested to quit.")
-                break
-
-            if use_real_time:
-                t = time()
-                dt_ns = int((t - prev) * 1e9)
-                prev = t
-
-            raw_obs = self.sim.step(ctrl_for_sim, sim_time_ns)
-            ctrl_for_sim = self.av.step(raw_obs, sim_time_ns)
-            sim_time_ns += dt_ns
-
-            # cur_time_s = time()
-            # time_use_s = cur_time_s - real_start_time_s
-            # loop_need_time = time() - loop_start_time
-            # sleep_time_s = dt_s - loop_need_time
-            # if sleep_time_s > 0:
-            #     sleep(sleep_time_s)
-
-            # print(
-            #     f"time use = {time_use_s:.2f} s, sim_time = {sim_time_ns / 1e9:.2f} s",
-            #     end="\r",
-            # )
+        logger.info(
+            "Starting execution loop. using dt_s=%.3f, real-time factor %s",
+            self._dt_s,
+            scheduler.real_time_factor or "max",
+        )
 
-            sim_time_need = time() - real_start_time_s
+        scheduler.start()
+        quit_check = self._quit_check
+        tick_latency = LatencyHistogram()
+        quit_reason = None
+        tick = 0
+        recorder = self._open_recorder(output_related, params)
+        try:
+            while True:
+                step_flag_supported = (
+                    sim.step_should_quit is not None and av.step_should_quit is not None
+                )
+                if quit_check.should_poll(tick, step_flag_supported):
+                    if sim.should_quit():
+                        logger.info("Simulator requested to quit.")
+                        quit_reason = "simulator"
+                        break
+                    elif av.should_quit():
+                        logger.info("AV requested to quit.")
+                        quit_reason = "av"
+                        break
+
+                quit_futures = None
+                if quit_check.concurrent_due(tick):
+                    quit_futures = (
+                        sim.should_quit_future(),
+                        av.should_quit_future(),
+                    )
+
+                tick_start_ns = perf_counter_ns()
+                ctrl_in = ctrl_for_sim
+                try:
+                    raw_obs = sim.step(ctrl_in, sim_time_ns)
+                    ctrl_for_sim = av.step(raw_obs, sim_time_ns)
+                    if recorder is not None:
+                        recorder.record(tick, sim_time_ns, raw_obs, ctrl_in)
+                    self._run_tick_hooks(tick, sim_time_ns, raw_obs, monitors)
+                except BaseException:
+                    # A failed step must not leave the quit checks running.
+                    if quit_futures is not None:
+                        for pending in quit_futures:
+                            if pending is not None:
+                                pending.future.cancel()
+                    raise
+                tick_latency.record(perf_counter_ns() - tick_start_ns)
+                sim_time_ns += scheduler.advance()
+                tick += 1
+
+                # Quit answers issued alongside the step refer to the state before
+                # it, so at most one extra tick is executed.
+                if quit_futures is not None:
+                    sim_quit, av_quit = (resolve_should_quit(f) for f in quit_futures)
+                    if sim_quit:
+                        logger.info("Simulator requested to quit.")
+                        quit_reason = "simulator"
+                        break
+                    elif av_quit:
+                        logger.info("AV requested to quit.")
+                        quit_reason = "av"
+                        break
+                elif quit_check.mode == QuitCheckMode.STEP_FLAG:
+                    if sim.step_should_quit:
+                        logger.info("Simulator requested to quit.")
+                        quit_reason = "simulator"
+                        break
+                    elif av.step_should_quit:
+                        logger.info("AV requested to quit.")
+                        quit_reason = "av"
+                        break
+
+                if monitors is not None and monitors.stopped_by is not None:
+                    monitor, reason = monitors.stopped_by
+                    logger.info("Monitor %s ended the episode: %s", monitor, reason)
+                    quit_reason = "monitor"
+                    break
+                if sim_budget_ns is not None and sim_time_ns >= sim_budget_ns:
+                    logger.info("Scenario timeout reached.")
+                    quit_reason = "timeout"
+                    break
+                self._check_wall_budget(scheduler, wall_budget_s, tick)
+                scheduler.wait()
+        finally:
+            if recorder is not None:
+                recorder.close()
 
+        sim_time_need = scheduler.elapsed_s()
         logger.info(
             f"Completed {sim_time_ns / 1e9:.2f} seconds scenario, using {sim_time_need:.2f} sec."
         )
+        metrics = self._write_iteration_metrics(
+            output_related,
+            lane,
+            tick,
+            sim_time_need,
+            sim_time_ns,
+            tick_latency,
+            scheduler,
+            monitors,
+        )
+        return {"quit_reason": quit_reason, "metrics": metrics}
 
-    def close(self):
+    def _write_iteration_metrics(
+        self,
+        output_related: str,
+        lane: Lane,
+        ticks: int,
+        wall_s: float,
+        sim_time_ns: int,
+        tick_latency: LatencyHistogram,
+        scheduler: Optional[TickScheduler] = None,
+        monitors: Optional[MonitorStage] = None,
+    ) -> dict[str, Any]:
+        """
+        Write the tick and RPC latency histograms of one iteration next to its
+        status dir, and refresh the Prometheus textfile if one is configured.
+        """
+        metrics = iteration_metrics(
+            ticks=ticks,
+            wall_s=wall_s,
+            sim_time_s=sim_time_ns / 1e9,
+            tick_latency=tick_latency,
+            components={"sim": lane.sim.metrics.drain(), "av": lane.av.metrics.drain()},
+            schedule=scheduler.summary() if scheduler is not None else None,
+            monitors=monitors.results() if monitors is not None else None,
+        )
+        logger.info(
+            "Iteration %s: %d ticks, %s ticks/s, real-time factor %s",
+            output_related,
+            ticks,
+            metrics["ticks_per_s"],
+            metrics["real_time_factor"],
+        )
         try:
-            self.av.stop()
-        except Exception:
-            logger.exception("av.stop() failed")
+            iteration_dir = self.output_base / output_related
+            iteration_dir.mkdir(parents=True, exist_ok=True)
+            write_metrics_file(iteration_dir / "metrics.json", metrics)
+        except OSError as exc:
+            logger.warning(f"Failed to write metrics of {output_related}: {exc}")
+
+        if self._prometheus is not None:
+            self._prometheus.update(
+                lane.index,
+                prometheus_samples(metrics, {"job": self.job_id, "lane": lane.index}),
+            )
+        return metrics
+
+    def _open_recorder(
+        self, output_related: str, params: Optional[dict[str, Any]] = None
+    ) -> Optional[TrajectoryRecorder]:
+        if not self._record_spec.get("enabled"):
+            return None
+        iteration_dir = self.output_base / output_related
         try:
-            self.sim.stop()
-        except Exception:
-            logger.exception("sim.stop() failed")
+            iteration_dir.mkdir(parents=True, exist_ok=True)
+            save_replay_params(iteration_dir, params)
+            save_replay_task(iteration_dir, self._claimed_task)
+            return TrajectoryRecorder(
+                iteration_dir / "trajectory.sbtr",
+                chunk_ticks=int(self._record_spec.get("chunk_ticks", 256)),
+                queue_size=int(self._record_spec.get("queue_size", 1024)),
+            )
+        except OSError as exc:
+            logger.warning(f"Failed to start recording {output_related}: {exc}")
+            return None
+
+    def _service_output_dir(self, output_related: str) -> str:
+        if not self._service_output_prefix:
+            return output_related
+        return str(Path(self._service_output_prefix) / output_related)
+
+    def close(self):
+        if self._keep_alive:
+            logger.debug("Keeping simulator and AV connections alive.")
+            return
+        for lane in self.lanes:
+            try:
+                lane.av.stop()
+            except Exception:
+                logger.exception("av.stop() failed")
+            try:
+                lane.sim.stop()
+            except Exception:
+                logger.exception("sim.stop() failed")
@@ -2,14 +2,20 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from typing import Optional, Iterable, Dict, Any, List
-import math
-import xml.etree.ElementTree as ET
 import logging
 
+from .distribution import (  # noqa: F401
+    ParamDict,
+    ParameterSpec,
+    ValueRange,
+    frange_inclusive,
+    parse_parameter_value_distribution,
+    parse_parameter_value_distribution_file,
+)
+
 
 logger = logging.getLogger(__name__)
 
-ParamDict = Dict[str, Any]
 TestResult = Dict[str, Any]
 
 
@@ -21,79 +27,68 @@ class Sampler:
         raise NotImplementedError
 
 
-@dataclass
-class ParameterSpec:
-    name: str
-    values: List[float]
-
-
-def frange_inclusive(
-    lower: float, upper: float, step: float, tol: float = 1e-9
-) -> List[float]:
-    if (step <= 0 and upper > lower) or (step >= 0 and upper < lower):
-
-        raise ValueError(f"Invalid step {step} for range [{lower}, {upper}]")
-
-    n_steps = int(math.floor((upper - lower) / step + tol)) if step != 0 else 0
-    vals = []
-    for i in range(n_steps + 1):
-        val = lower + i * step
-        if (step > 0 and val > upper + tol) or (step < 0 and val < upper - tol):
-            break
-        vals.append(val)
-
-    logger.info(
-        f"vals: {vals}, upper: {upper}, tol: {tol}, last_val: {vals[-1] if vals else 'N/A'}"
-    )
-
-    # if vals and upper - vals[-1] > tol:
-    #     vals.append(upper)
-
-    return vals
-
-
-def parse_parameter_value_distribution(xml_str: str) -> List[ParameterSpec]:
-    root = ET.fromstring(xml_str)
-    pvd = (
-        root
-        if root.tag == "ParameterValueDistribution"
-        else root.find(".//ParameterValueDistribution")
-    )
-    if pvd is None:
-        raise ValueError("Cannot find ParameterValueDistribution element")
-
-    det = pvd.find("Deterministic")
-    if det is None:
-        raise ValueError("Only <Deterministic> distributions are supported for now")
+@dataclass(frozen=True)
+class Shard:
+    """
+    Slice of a parameter grid owned by one task: the flat grid indices
+    `start, start + stride, ...` below `stop` (the whole grid if None).
+    """
+
+    start: int = 0
+    stop: Optional[int] = None
+    stride: int = 1
+
+    @classmethod
+    def from_spec(cls, spec: Optional[Dict[str, Any]]) -> Optional[Shard]:
+        """
+        Build a shard from the task spec, either `{"index": i, "count": n}`
+        (every n-th point starting at i) or `{"start": a, "stop": b}`.
+        """
+        if not spec:
+            return None
+        if "count" in spec:
+            count = int(spec["count"])
+            index = int(spec.get("index", 0))
+            if count < 1 or not 0 <= index < count:
+                raise ValueError(f"Invalid shard {index}/{count}")
+            return cls(start=index, stride=count)
+
+        start = int(spec.get("start", 0))
+        stop = spec.get("stop")
+        stop = int(stop) if stop is not None else None
+        stride = int(spec.get("stride", 1))
+        if start < 0 or stride < 1 or (stop is not None and stop < start):
+            raise ValueError(f"Invalid shard range {spec}")
+        return cls(start=start, stop=stop, stride=stride)
+
+    def indices(self, total: int) -> range:
+        stop = total if self.stop is None else min(self.stop, total)
+        return range(self.start, stop, self.stride)
 
-    specs: List[ParameterSpec] = []
 
-    for elem in det.findall("DeterministicSingleParameterDistribution"):
-        name = elem.attrib["parameterName"]
-
-        dist_range = elem.find("DistributionRange")
-        if dist_range is None:
-            raise ValueError(f"Missing <DistributionRange> for parameter {name}")
-
-        step = float(dist_range.attrib["stepWidth"])
-
-        range_elem = dist_range.find("Range")
-        if range_elem is None:
-            raise ValueError(f"Missing <Range> for parameter {name}")
-
-        lower = float(range_elem.attrib["lowerLimit"])
-        upper = float(range_elem.attrib["upperLimit"])
-
-        values = frange_inclusive(lower, upper, step)
-        specs.append(ParameterSpec(name=name, values=values))
+class BaseSampler(Sampler):
+    # Whether `update_with_results` steers later points; the runner then keeps
+    # sweeping past failed iterations so that the sampler sees them.
+    learns_from_outcomes = False
 
-    return specs
+    def __init__(self, specs: List[ParameterSpec], shard: Optional[Shard] = None):
+        self.specs = specs
+        self.shard = shard
+        # Flat grid index of the last point returned by `next()`.
+        self.last_index: Optional[int] = None
 
+    def mark_seen(self, index: int) -> None:
+        """Never return grid point `index`; a no-op without a fixed grid."""
 
-class BaseSampler(Sampler):
-    def __init__(self, specs: List[ParameterSpec]):
-        self.specs = specs
+    def max_iterations(self) -> int:
+        """Upper bound on the number of points `next()` returns."""
+        raise NotImplementedError
 
     def update_with_results(self, past_results: Optional[Iterable[TestResult]]):
+        """
+        Feed back iteration outcomes. Each result holds the grid `index`, the
+        `params`, `status` ("succeeded", "failed" or "stalled"), `error`,
+        `quit_reason` and the iteration `metrics`.
+        """
         if not past_results:
             return
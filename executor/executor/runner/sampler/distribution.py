@@ -0,0 +1,387 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import hashlib
+import io
+import logging
+import math
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Union
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+ParamDict = Dict[str, Any]
+
+
+class ValueRange(Sequence[float]):
+    """
+    Lazy arithmetic progression `lower + i * step` for `i < count`; the values
+    of a `<DistributionRange>` are never materialized.
+    """
+
+    __slots__ = ("lower", "step", "count")
+
+    def __init__(self, lower: float, step: float, count: int):
+        self.lower = lower
+        self.step = step
+        self.count = count
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.to_array()[index]
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError(f"ValueRange index {index} out of range")
+        return self.lower + index * self.step
+
+    def __iter__(self) -> Iterator[float]:
+        for index in range(self.count):
+            yield self.lower + index * self.step
+
+    def index_of(self, value: float, tol: float = 1e-9) -> Optional[int]:
+        if self.step == 0:
+            return 0 if abs(value - self.lower) <= tol else None
+        index = round((value - self.lower) / self.step)
+        if 0 <= index < self.count and abs(self[index] - value) <= tol * max(
+            1.0, abs(value)
+        ):
+            return index
+        return None
+
+    def to_array(self) -> np.ndarray:
+        return self.lower + np.arange(self.count, dtype=np.float64) * self.step
+
+    def __repr__(self) -> str:
+        return f"ValueRange(lower={self.lower}, step={self.step}, count={self.count})"
+
+
+def value_label(value: Any) -> str:
+    """String handed to the services for a parameter value."""
+    if isinstance(value, np.floating):
+        return str(float(value))
+    if isinstance(value, np.integer):
+        return str(int(value))
+    return str(value)
+
+
+@dataclass
+class ParameterSpec:
+    """
+    One dimension of the parameter space.
+
+    A plain spec assigns `values[k]` to parameter `name`. A joint spec, from a
+    `<ValueSetDistribution>` or a `<Stochastic>` block, has `columns` instead:
+    value `k` assigns `columns[p][k]` to every parameter `p` at once.
+    """
+
+    name: str
+    values: Sequence[Any]
+    # Bounds and step of the <Range> the values were generated from.
+    lower: Optional[float] = None
+    upper: Optional[float] = None
+    step: Optional[float] = None
+    columns: Optional[Dict[str, Sequence[Any]]] = None
+    _index: Optional[Dict[Any, int]] = field(default=None, repr=False, compare=False)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.columns) if self.columns is not None else [self.name]
+
+    def assignment(self, k: int) -> ParamDict:
+        if self.columns is None:
+            return {self.name: value_label(self.values[k])}
+        return {name: value_label(column[k]) for name, column in self.columns.items()}
+
+    def index_of(self, params: ParamDict) -> Optional[int]:
+        """Index of the value `params` assign to this dimension, if any."""
+        if self.columns is None and isinstance(self.values, ValueRange):
+            try:
+                return self.values.index_of(float(params.get(self.name)))
+            except (TypeError, ValueError):
+                return None
+
+        if self._index is None:
+            self._index = {
+                tuple(self.assignment(k).values()): k for k in range(len(self))
+            }
+        key = tuple(value_label(params.get(name)) for name in self.names)
+        index = self._index.get(key)
+        if index is None and self.columns is None:
+            # Numbers reported back as floats, e.g. 1.0 for a "1" set element.
+            try:
+                number = float(params.get(self.name))
+            except (TypeError, ValueError):
+                return None
+            index = self._index.get((value_label(number),))
+            if index is None and number.is_integer():
+                index = self._index.get((value_label(int(number)),))
+        return index
+
+
+def frange_inclusive(
+    lower: float, upper: float, step: float, tol: float = 1e-9
+) -> ValueRange:
+    if (step <= 0 and upper > lower) or (step >= 0 and upper < lower):
+        raise ValueError(f"Invalid step {step} for range [{lower}, {upper}]")
+
+    n_steps = int(math.floor((upper - lower) / step + tol)) if step != 0 else 0
+    values = ValueRange(lower, step, n_steps + 1)
+    logger.debug(
+        "range [%s, %s] step %s: %d values, last %s",
+        lower,
+        upper,
+        step,
+        len(values),
+        values[-1],
+    )
+    return values
+
+
+# ---------------------------
+# Stochastic distributions
+# ---------------------------
+Draw = Callable[[np.random.Generator, int], np.ndarray]
+
+
+def _range_limits(elem: ET.Element) -> Optional[tuple[float, float]]:
+    range_elem = elem.find("Range")
+    if range_elem is None:
+        return None
+    lower = float(range_elem.attrib["lowerLimit"])
+    return lower, float(range_elem.attrib["upperLimit"])
+
+
+def _truncated(draw: Draw, limits: Optional[tuple[float, float]]) -> Draw:
+    """Redraw values outside `limits` until all of them are inside."""
+    if limits is None:
+        return draw
+    lower, upper = limits
+
+    def truncated(rng: np.random.Generator, n: int) -> np.ndarray:
+        values = draw(rng, n)
+        for _ in range(100):
+            outside = (values < lower) | (values > upper)
+            if not outside.any():
+                return values
+            values[outside] = draw(rng, int(outside.sum()))
+        logger.warning("Clipping samples that stay outside [%s, %s]", lower, upper)
+        return np.clip(values, lower, upper)
+
+    return truncated
+
+
+def _parse_stochastic_draw(elem: ET.Element, name: str) -> Draw:
+    normal = elem.find("NormalDistribution")
+    if normal is not None:
+        mean = float(normal.attrib["expectedValue"])
+        std = math.sqrt(float(normal.attrib["variance"]))
+        return _truncated(
+            lambda rng, n: rng.normal(mean, std, n), _range_limits(normal)
+        )
+
+    log_normal = elem.find("LogNormalDistribution")
+    if log_normal is not None:
+        # Parameters of the underlying normal distribution.
+        mean = float(log_normal.attrib["expectedValue"])
+        std = math.sqrt(float(log_normal.attrib["variance"]))
+        return _truncated(
+            lambda rng, n: rng.lognormal(mean, std, n), _range_limits(log_normal)
+        )
+
+    uniform = elem.find("UniformDistribution")
+    if uniform is not None:
+        limits = _range_limits(uniform)
+        if limits is None:
+            raise ValueError(f"Missing <Range> in UniformDistribution of {name}")
+        lower, upper = limits
+        return lambda rng, n: rng.uniform(lower, upper, n)
+
+    poisson = elem.find("PoissonDistribution")
+    if poisson is not None:
+        lam = float(poisson.attrib["expectedValue"])
+        return _truncated(
+            lambda rng, n: rng.poisson(lam, n).astype(np.float64),
+            _range_limits(poisson),
+        )
+
+    histogram = elem.find("Histogram")
+    if histogram is not None:
+        bins = [(float(b.attrib["weight"]), _range_limits(b)) for b in histogram]
+        if not bins or any(limits is None for _, limits in bins):
+            raise ValueError(f"Histogram of {name} needs bins with a <Range>")
+        weights = np.array([w for w, _ in bins], dtype=np.float64)
+        lows = np.array([limits[0] for _, limits in bins], dtype=np.float64)
+        highs = np.array([limits[1] for _, limits in bins], dtype=np.float64)
+        probs = weights / weights.sum()
+
+        def draw_histogram(rng: np.random.Generator, n: int) -> np.ndarray:
+            chosen = rng.choice(len(bins), size=n, p=probs)
+            return rng.uniform(lows[chosen], highs[chosen])
+
+        return draw_histogram
+
+    prob_set = elem.find("ProbabilityDistributionSet")
+    if prob_set is not None:
+        elements = prob_set.findall("Element")
+        if not elements:
+            raise ValueError(f"Empty ProbabilityDistributionSet for {name}")
+        values = np.array([e.attrib["value"] for e in elements])
+        weights = np.array([float(e.attrib["weight"]) for e in elements])
+        probs = weights / weights.sum()
+        return lambda rng, n: rng.choice(values, size=n, p=probs)
+
+    raise ValueError(f"Unsupported stochastic distribution for parameter {name}")
+
+
+# ---------------------------
+# Parsing
+# ---------------------------
+def _parse_single_parameter(elem: ET.Element) -> ParameterSpec:
+    name = elem.attrib["parameterName"]
+
+    dist_range = elem.find("DistributionRange")
+    if dist_range is not None:
+        step = float(dist_range.attrib["stepWidth"])
+        range_elem = dist_range.find("Range")
+        if range_elem is None:
+            raise ValueError(f"Missing <Range> for parameter {name}")
+        lower = float(range_elem.attrib["lowerLimit"])
+        upper = float(range_elem.attrib["upperLimit"])
+        values = frange_inclusive(lower, upper, step)
+        return ParameterSpec(
+            name=name, values=values, lower=lower, upper=upper, step=step
+        )
+
+    dist_set = elem.find("DistributionSet")
+    if dist_set is not None:
+        values = np.array([e.attrib["value"] for e in dist_set.iter("Element")])
+        if len(values) == 0:
+            raise ValueError(f"Empty <DistributionSet> for parameter {name}")
+        return ParameterSpec(name=name, values=values)
+
+    raise ValueError(f"Unsupported distribution for parameter {name}")
+
+
+class _DistributionParser:
+    """
+    Build the parameter specs from the `end` events of `iterparse`, clearing
+    every element once it has been consumed so that memory stays bounded by
+    the largest single distribution.
+    """
+
+    def __init__(self, source: str = ""):
+        # Names the distribution in the default seed of <Stochastic> blocks.
+        self.source = source
+        self.specs: List[ParameterSpec] = []
+        self.found = False
+        self._value_sets: List[ParamDict] = []
+        self._draws: Dict[str, Draw] = {}
+
+    def feed(self, elem: ET.Element) -> None:
+        tag = elem.tag
+        if tag == "DeterministicSingleParameterDistribution":
+            self.specs.append(_parse_single_parameter(elem))
+            elem.clear()
+        elif tag == "ParameterValueSet":
+            self._value_sets.append(
+                {
+                    a.attrib["parameterRef"]: a.attrib["value"]
+                    for a in elem.findall("ParameterAssignment")
+                }
+            )
+            elem.clear()
+        elif tag == "ValueSetDistribution":
+            self._finish_value_sets()
+            elem.clear()
+        elif tag == "StochasticDistribution":
+            name = elem.attrib["parameterName"]
+            self._draws[name] = _parse_stochastic_draw(elem, name)
+            elem.clear()
+        elif tag == "Stochastic":
+            self._finish_stochastic(elem)
+            elem.clear()
+        elif tag == "UserDefinedDistribution":
+            raise ValueError("<UserDefinedDistribution> is not supported")
+        elif tag == "ParameterValueDistribution":
+            self.found = True
+
+    def _finish_value_sets(self) -> None:
+        value_sets, self._value_sets = self._value_sets, []
+        if not value_sets:
+            raise ValueError("Empty <ValueSetDistribution>")
+        names = list(value_sets[0])
+        if any(list(value_set) != names for value_set in value_sets):
+            names = sorted({name for value_set in value_sets for name in value_set})
+        columns = {
+            name: np.array([value_set.get(name, "") for value_set in value_sets])
+            for name in names
+        }
+        self.specs.append(
+            ParameterSpec(
+                name="+".join(names), values=range(len(value_sets)), columns=columns
+            )
+        )
+
+    def _finish_stochastic(self, elem: ET.Element) -> None:
+        runs = int(elem.attrib["numberOfTestRuns"])
+        seed = elem.attrib.get("randomSeed")
+        draws, self._draws = self._draws, {}
+        if seed is not None:
+            rng = np.random.default_rng(int(float(seed)))
+        else:
+            # Shards and resumed runs parse the file again, and every grid
+            # index has to map to the same draw each time.
+            default_seed = _default_seed(self.source, draws)
+            logger.warning(
+                "<Stochastic> of %s in %s has no randomSeed; using default seed %d",
+                ", ".join(draws),
+                self.source or "<string>",
+                default_seed,
+            )
+            rng = np.random.default_rng(default_seed)
+        columns = {name: draw(rng, runs) for name, draw in draws.items()}
+        self.specs.append(
+            ParameterSpec(name="stochastic", values=range(runs), columns=columns)
+        )
+
+
+def _default_seed(source: str, names: Sequence[str]) -> int:
+    """Seed derived from the distribution's file name and parameter names."""
+    key = "\0".join([source, *names]).encode("utf-8")
+    return int.from_bytes(hashlib.sha256(key).digest()[:8], "little")
+
+
+def _parse_events(events, source: str = "") -> List[ParameterSpec]:
+    parser = _DistributionParser(source)
+    for _, elem in events:
+        parser.feed(elem)
+    if not parser.found:
+        raise ValueError("Cannot find ParameterValueDistribution element")
+    return parser.specs
+
+
+def parse_parameter_value_distribution(xml_str: str) -> List[ParameterSpec]:
+    source = io.BytesIO(xml_str.encode("utf-8"))
+    return _parse_events(ET.iterparse(source, events=("end",)))
+
+
+def parse_parameter_value_distribution_file(
+    path: Union[str, Path],
+) -> List[ParameterSpec]:
+    """
+    Stream-parse a `_param.xosc` file. `<Stochastic>` blocks without a
+    `randomSeed` are seeded from the file name, not the full path, so that
+    every node mounting the scenarios elsewhere draws the same values.
+    """
+    return _parse_events(ET.iterparse(str(path), events=("end",)), Path(path).name)
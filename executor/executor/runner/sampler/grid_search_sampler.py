@@ -1,14 +1,15 @@
 from __future__ import annotations
 
-from typing import Optional, Iterable
+from typing import Iterator, Optional, Iterable
 from pathlib import Path
 from logging import getLogger
 
 from .base import (
     BaseSampler,
     ParamDict,
+    Shard,
     TestResult,
-    parse_parameter_value_distribution,
+    parse_parameter_value_distribution_file,
 )
 
 logger = getLogger(__name__)
@@ -20,6 +21,7 @@ class GridSearchSampler(BaseSampler):
         cfg_path: Optional[Path] = None,
         past_results: Optional[Iterable[TestResult]] = None,
         param_range_file: Optional[Path] = None,
+        shard: Optional[Shard] = None,
     ):
         # self.cfg = get_cfg(cfg_path)
         # try:
@@ -27,21 +29,25 @@ class GridSearchSampler(BaseSampler):
         # except KeyError:
         #     raise ValueError("Missing 'xml_path' in sampler configuration")
         xml_path = param_range_file
-        xml_text = xml_path.read_text(encoding="utf-8")
-        specs = parse_parameter_value_distribution(xml_text)
-        super().__init__(specs)
-
-        self._names = [s.name for s in specs]
-        self._grid = [s.values for s in specs]
-        self._indices = [0] * len(self._grid)
-        self._done = False
-
-        self._seen = set()
-        if past_results:
-            for r in past_results:
-                params = r.get("params", r)
-                key = self._params_to_key(params)
-                self._seen.add(key)
+        specs = parse_parameter_value_distribution_file(xml_path)
+        super().__init__(specs, shard)
+
+        self._names = [name for s in specs for name in s.names]
+        # A flat grid index is a mixed-radix number with one digit per
+        # distribution; the last one varies fastest. Value sets and stochastic
+        # runs are a single digit that assigns several parameters.
+        self._radices = [len(s) for s in specs]
+        self._total = 1
+        for radix in self._radices:
+            self._total *= radix
+
+        self._shard_range = (shard or Shard()).indices(self._total)
+        self._cursor = 0
+
+        # One bit per grid point that was emitted or reported as done.
+        self._seen = bytearray((self._total + 7) // 8)
+        self._seen_count = 0
+        self._mark_results(past_results)
 
         logger.info(
             "GridSearchSampler initialized from xml_path=%s, %d parameters: %s",
@@ -49,55 +55,87 @@ class GridSearchSampler(BaseSampler):
             len(self._names),
             self._names,
         )
-
-    def _params_to_key(self, params: ParamDict):
-        return tuple(params.get(name) for name in self._names)
-
-    def _advance_indices(self):
-        if self._done:
+        if shard is not None:
+            logger.info(
+                "Restricted to shard %s: %d of %d combinations",
+                shard,
+                len(self._shard_range),
+                self.total_permutations(),
+            )
+
+    def point(self, index: int) -> ParamDict:
+        """Parameters of the grid point with flat index `index`."""
+        if not 0 <= index < self._total:
+            raise IndexError(f"Grid index {index} out of range [0, {self._total})")
+        digits = [0] * len(self._radices)
+        for dim in reversed(range(len(self._radices))):
+            index, digits[dim] = divmod(index, self._radices[dim])
+        params: ParamDict = {}
+        for spec, digit in zip(self.specs, digits):
+            params.update(spec.assignment(digit))
+        return params
+
+    def index_of(self, params: ParamDict) -> Optional[int]:
+        """Flat index of `params`, or None if they are not on the grid."""
+        index = 0
+        for spec, radix in zip(self.specs, self._radices):
+            digit = spec.index_of(params)
+            if digit is None:
+                return None
+            index = index * radix + digit
+        return index
+
+    def iter_range(
+        self, start: int = 0, stop: Optional[int] = None, stride: int = 1
+    ) -> Iterator[tuple[int, ParamDict]]:
+        """Yield `(index, params)` for the indices in `range(start, stop, stride)`."""
+        stop = self._total if stop is None else min(stop, self._total)
+        for index in range(start, stop, stride):
+            yield index, self.point(index)
+
+    def is_seen(self, index: int) -> bool:
+        return bool(self._seen[index >> 3] & (1 << (index & 7)))
+
+    def mark_seen(self, index: int) -> None:
+        if not self.is_seen(index):
+            self._seen[index >> 3] |= 1 << (index & 7)
+            self._seen_count += 1
+
+    def _mark_results(self, past_results: Optional[Iterable[TestResult]]) -> None:
+        if not past_results:
             return
-
-        for dim in reversed(range(len(self._indices))):
-            self._indices[dim] += 1
-            if self._indices[dim] < len(self._grid[dim]):
-                return
-            self._indices[dim] = 0
-            if dim == 0:
-                self._done = True
-                return
+        for r in past_results:
+            index = self.index_of(r.get("params", r))
+            if index is not None:
+                self.mark_seen(index)
 
     def next(
         self,
         past_results: Optional[Iterable[TestResult]] = None,
     ) -> Optional[ParamDict]:
-        if past_results:
-            for r in past_results:
-                params = r.get("params", r)
-                key = self._params_to_key(params)
-                self._seen.add(key)
-
-        while not self._done:
-            combo: ParamDict = {
-                name: str(self._grid[i][idx])
-                for i, (name, idx) in enumerate(zip(self._names, self._indices))
-            }
-
-            self._advance_indices()
-
-            key = self._params_to_key(combo)
-            if key in self._seen:
+        self._mark_results(past_results)
+
+        while self._cursor < len(self._shard_range):
+            index = self._shard_range[self._cursor]
+            self._cursor += 1
+            if self.is_seen(index):
                 continue
 
-            self._seen.add(key)
-            return combo
+            self.mark_seen(index)
+            self.last_index = index
+            return self.point(index)
 
         return None
 
     def total_permutations(self) -> int:
-        total = 1
-        for values in self._grid:
-            total *= len(values)
-        return total
+        return self._total
+
+    def shard_permutations(self) -> int:
+        """Number of combinations in the shard this sampler runs."""
+        return len(self._shard_range)
+
+    def max_iterations(self) -> int:
+        return self.shard_permutations()
 
     def remaining_permutations(self) -> int:
-        return max(self.total_permutations() - len(self._seen), 0)
+        return max(self._total - self._seen_count, 0)
@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+import numpy as np
+
+from .space_filling import SpaceFillingSampler
+
+
+class LatinHypercubeSampler(SpaceFillingSampler):
+    """
+    Latin hypercube design: every parameter range is cut into `budget` equal
+    strata and each stratum is hit exactly once. Set `centered: true` in the
+    config to place points in the middle of their strata instead of at a
+    random offset.
+    """
+
+    def _unit_points(self, n: int, dims: int) -> np.ndarray:
+        strata = self._rng.permuted(np.tile(np.arange(n), (dims, 1)), axis=1).T
+        if self._cfg.get("centered", False):
+            offsets = np.full((n, dims), 0.5)
+        else:
+            offsets = self._rng.random((n, dims))
+        return (strata + offsets) / n
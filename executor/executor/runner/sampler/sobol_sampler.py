@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+from logging import getLogger
+
+import numpy as np
+
+from .space_filling import SpaceFillingSampler
+
+logger = getLogger(__name__)
+
+BITS = 32
+
+# Joe & Kuo (2008) primitive polynomials and initial direction numbers for
+# dimensions 2..21 (new-joe-kuo-6.21201): (degree s, coefficients a, m_1..m_s).
+# Dimension 1 is the van der Corput sequence.
+JOE_KUO = [
+    (1, 0, (1,)),
+    (2, 1, (1, 3)),
+    (3, 1, (1, 3, 1)),
+    (3, 2, (1, 1, 1)),
+    (4, 1, (1, 1, 3, 3)),
+    (4, 4, (1, 3, 5, 13)),
+    (5, 2, (1, 1, 5, 5, 17)),
+    (5, 4, (1, 1, 5, 5, 5)),
+    (5, 7, (1, 1, 7, 11, 19)),
+    (5, 11, (1, 1, 5, 1, 1)),
+    (5, 13, (1, 1, 1, 3, 11)),
+    (5, 14, (1, 3, 5, 5, 31)),
+    (6, 1, (1, 3, 3, 9, 7, 49)),
+    (6, 13, (1, 1, 1, 15, 21, 21)),
+    (6, 16, (1, 3, 1, 13, 27, 49)),
+    (6, 19, (1, 1, 1, 15, 7, 5)),
+    (6, 22, (1, 3, 1, 15, 13, 25)),
+    (6, 25, (1, 1, 5, 5, 19, 61)),
+    (7, 1, (1, 3, 7, 11, 23, 15, 103)),
+    (7, 4, (1, 3, 7, 13, 13, 15, 69)),
+]
+MAX_DIMS = len(JOE_KUO) + 1
+
+
+def direction_numbers(dims: int) -> np.ndarray:
+    """`dims` x BITS direction numbers, scaled to BITS-bit integers."""
+    if dims > MAX_DIMS:
+        raise ValueError(f"Sobol sequence supports up to {MAX_DIMS} parameters")
+
+    v = np.zeros((dims, BITS), dtype=np.uint64)
+    v[0] = [1 << (BITS - 1 - k) for k in range(BITS)]
+    for dim in range(1, dims):
+        s, a, m = JOE_KUO[dim - 1]
+        row = [m[k] << (BITS - 1 - k) for k in range(s)]
+        for k in range(s, BITS):
+            value = row[k - s] ^ (row[k - s] >> s)
+            for i in range(1, s):
+                if (a >> (s - 1 - i)) & 1:
+                    value ^= row[k - i]
+            row.append(value)
+        v[dim] = row
+    return v
+
+
+class SobolSampler(SpaceFillingSampler):
+    """
+    Sobol low-discrepancy design. With `scramble` (the default) the generator
+    matrices get a random linear matrix scramble and the points a random
+    digital shift, which keeps the balance properties while removing the
+    origin and the alignment of the plain sequence. Budgets that are powers
+    of two give the best balance.
+    """
+
+    def _unit_points(self, n: int, dims: int) -> np.ndarray:
+        if n & (n - 1):
+            logger.warning("Sobol budget %d is not a power of two", n)
+
+        v = direction_numbers(dims)
+        shift = np.zeros(dims, dtype=np.uint64)
+        if self._cfg.get("scramble", True):
+            v = self._linear_matrix_scramble(v)
+            shift = self._rng.integers(0, 1 << BITS, size=dims, dtype=np.uint64)
+
+        index = np.arange(n, dtype=np.uint64)
+        gray = index ^ (index >> np.uint64(1))
+        x = np.zeros((n, dims), dtype=np.uint64)
+        for k in range(BITS):
+            bit = ((gray >> np.uint64(k)) & np.uint64(1)).astype(bool)
+            x[bit] ^= v[:, k]
+        x ^= shift
+        return x.astype(np.float64) / float(1 << BITS)
+
+    def _linear_matrix_scramble(self, v: np.ndarray) -> np.ndarray:
+        """Multiply each generator matrix by a random unit lower-triangular one."""
+        dims = v.shape[0]
+        # Row i of the scramble matrix as a BITS-bit mask, bit BITS-1 being
+        # column 0; below-diagonal entries are random, the diagonal is one.
+        below = self._rng.integers(0, 2, size=(dims, BITS, BITS))
+        scrambled = np.zeros_like(v)
+        for dim in range(dims):
+            rows = []
+            for i in range(BITS):
+                mask = 1 << (BITS - 1 - i)
+                for j in range(i):
+                    if below[dim, i, j]:
+                        mask |= 1 << (BITS - 1 - j)
+                rows.append(mask)
+            for k in range(BITS):
+                column = int(v[dim, k])
+                value = 0
+                for i, mask in enumerate(rows):
+                    if (column & mask).bit_count() & 1:
+                        value |= 1 << (BITS - 1 - i)
+                scrambled[dim, k] = value
+        return scrambled
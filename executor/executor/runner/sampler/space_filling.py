@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+from typing import Iterable, Optional
+from pathlib import Path
+from logging import getLogger
+
+import numpy as np
+
+from executor.runner.utils.util import get_cfg
+
+from .base import (
+    BaseSampler,
+    ParamDict,
+    Shard,
+    TestResult,
+    parse_parameter_value_distribution_file,
+)
+
+logger = getLogger(__name__)
+
+
+class SpaceFillingSampler(BaseSampler):
+    """
+    Base of samplers that draw a fixed budget of points from the unit cube
+    and scale them to the `<Range>` bounds of each parameter; other
+    distributions are treated as categorical.
+
+    The whole design is generated up front, so sample `i` is the same on every
+    run with the same seed; `i` takes the place of the grid index for shards,
+    iteration names and the resume manifest.
+
+    Configuration (all optional):
+        budget: Number of points to draw.
+        snap_to_grid: Round every coordinate to the `stepWidth` grid of its
+            parameter; duplicate points are dropped.
+        seed: Random seed of the design.
+    """
+
+    def __init__(
+        self,
+        cfg_path: Optional[Path] = None,
+        past_results: Optional[Iterable[TestResult]] = None,
+        param_range_file: Optional[Path] = None,
+        shard: Optional[Shard] = None,
+    ):
+        cfg = get_cfg(cfg_path) if cfg_path else {}
+        specs = parse_parameter_value_distribution_file(param_range_file)
+        super().__init__(specs, shard)
+
+        self._cfg = cfg
+        self._budget = int(cfg.get("budget", 128))
+        self._snap = bool(cfg.get("snap_to_grid", True))
+        self._rng = np.random.default_rng(cfg.get("seed", 0))
+        self._names = [name for s in specs for name in s.names]
+
+        unit = self._unit_points(self._budget, len(specs))
+        self._digits, self._coords = self._scale(unit)
+        self._total = len(self._digits)
+
+        self._shard_range = (shard or Shard()).indices(self._total)
+        self._cursor = 0
+        self._seen = bytearray((self._total + 7) // 8)
+
+        logger.info(
+            "%s initialized from xml_path=%s: %d points over %d parameters: %s",
+            type(self).__name__,
+            param_range_file,
+            self._total,
+            len(self._names),
+            self._names,
+        )
+
+    def _unit_points(self, n: int, dims: int) -> np.ndarray:
+        """`n` x `dims` design in [0, 1)."""
+        raise NotImplementedError
+
+    def _continuous(self, spec) -> bool:
+        return spec.step is not None and not self._snap
+
+    def _scale(self, unit: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Map the unit design to the value index of every coordinate, plus the
+        raw coordinates of ranges that are not snapped to their step grid.
+        Sets, value sets and stochastic runs are categorical: the unit
+        interval is split into one equal bin per value.
+        """
+        digits = np.zeros(unit.shape, dtype=np.int64)
+        coords = np.zeros(unit.shape, dtype=np.float64)
+        for dim, spec in enumerate(self.specs):
+            u = unit[:, dim]
+            if spec.step is None:
+                bins = (u * len(spec)).astype(np.int64)
+                digits[:, dim] = np.minimum(bins, len(spec) - 1)
+                continue
+
+            lower = min(spec.lower, spec.upper)
+            upper = max(spec.lower, spec.upper)
+            coords[:, dim] = lower + u * (upper - lower)
+            if self._snap and len(spec) > 1 and spec.step:
+                # Nearest value of the parameter's step grid.
+                k = np.rint((coords[:, dim] - spec.lower) / spec.step)
+                digits[:, dim] = np.clip(k, 0, len(spec) - 1)
+
+        if self._snap:
+            _, first = np.unique(digits, axis=0, return_index=True)
+            if len(first) < len(digits):
+                logger.info(
+                    "Snapping to the step grid merged %d of %d points",
+                    len(digits) - len(first),
+                    len(digits),
+                )
+            keep = np.sort(first)
+            digits, coords = digits[keep], coords[keep]
+        return digits, coords
+
+    def point(self, index: int) -> ParamDict:
+        params: ParamDict = {}
+        for dim, spec in enumerate(self.specs):
+            if self._continuous(spec):
+                params[spec.name] = str(float(self._coords[index, dim]))
+            else:
+                params.update(spec.assignment(int(self._digits[index, dim])))
+        return params
+
+    def is_seen(self, index: int) -> bool:
+        return bool(self._seen[index >> 3] & (1 << (index & 7)))
+
+    def mark_seen(self, index: int) -> None:
+        if 0 <= index < self._total:
+            self._seen[index >> 3] |= 1 << (index & 7)
+
+    def next(
+        self,
+        past_results: Optional[Iterable[TestResult]] = None,
+    ) -> Optional[ParamDict]:
+        while self._cursor < len(self._shard_range):
+            index = self._shard_range[self._cursor]
+            self._cursor += 1
+            if self.is_seen(index):
+                continue
+
+            self.mark_seen(index)
+            self.last_index = index
+            return self.point(index)
+
+        return None
+
+    def total_permutations(self) -> int:
+        return self._total
+
+    def shard_permutations(self) -> int:
+        return len(self._shard_range)
+
+    def max_iterations(self) -> int:
+        return self.shard_permutations()
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+from typing import Any, Iterable, List, Optional
+from pathlib import Path
+from logging import getLogger
+import random
+
+import numpy as np
+
+from executor.runner.utils.util import get_cfg
+
+from .base import ParamDict, Shard, TestResult
+from .grid_search_sampler import GridSearchSampler
+
+logger = getLogger(__name__)
+
+
+class SurrogateSampler(GridSearchSampler):
+    """
+    Falsification sampler over the parameter grid.
+
+    After a few random points it fits a Gaussian process to the objective of
+    the finished iterations and proposes the unseen grid point most likely to
+    fall below `failure_threshold`, i.e. the one maximizing
+    (threshold - mean) / std of the posterior.
+
+    Configuration (all optional):
+        objective: Dotted path of a number in the iteration outcome, e.g.
+            "metrics.monitors.ttc.min_ttc_s". Iterations that failed,
+            stalled or timed out score `failure_threshold - 1`. Without it
+            the objective is 0 for those and, with the collision monitor
+            enabled, for collisions, and 1 otherwise.
+        failure_threshold: Objective values below it count as failures.
+        max_evaluations: Iteration budget.
+        initial_samples: Random points before the surrogate is used.
+        candidates: Unseen grid points scored per proposal.
+        length_scale: RBF length scale on the [0, 1]-normalized grid.
+        noise: Observation noise added to the kernel diagonal.
+        seed: Random seed.
+    """
+
+    learns_from_outcomes = True
+
+    def __init__(
+        self,
+        cfg_path: Optional[Path] = None,
+        past_results: Optional[Iterable[TestResult]] = None,
+        param_range_file: Optional[Path] = None,
+        shard: Optional[Shard] = None,
+    ):
+        past_results = list(past_results or [])
+        cfg = get_cfg(cfg_path) if cfg_path else {}
+        self._objective = cfg.get("objective")
+        self._threshold = float(
+            cfg.get("failure_threshold", 0.5 if self._objective is None else 0.0)
+        )
+        self._max_evaluations = int(cfg.get("max_evaluations", 100))
+        self._initial_samples = int(cfg.get("initial_samples", 10))
+        self._candidates = int(cfg.get("candidates", 2048))
+        self._length_scale = float(cfg.get("length_scale", 0.2))
+        self._noise = float(cfg.get("noise", 1e-4))
+        self._rng = random.Random(cfg.get("seed"))
+
+        self._x: List[List[float]] = []
+        self._y: List[float] = []
+        self._emitted = 0
+
+        super().__init__(
+            cfg_path=cfg_path,
+            past_results=past_results,
+            param_range_file=param_range_file,
+            shard=shard,
+        )
+        self.update_with_results(past_results)
+
+        logger.info(
+            "SurrogateSampler: objective=%s, threshold=%s, budget=%d",
+            self._objective or "failure",
+            self._threshold,
+            self.max_iterations(),
+        )
+
+    def max_iterations(self) -> int:
+        return min(self._max_evaluations, self.shard_permutations())
+
+    def _normalized(self, index: int) -> List[float]:
+        coords = [0.0] * len(self._radices)
+        for dim in reversed(range(len(self._radices))):
+            index, digit = divmod(index, self._radices[dim])
+            radix = self._radices[dim]
+            coords[dim] = digit / (radix - 1) if radix > 1 else 0.0
+        return coords
+
+    def _objective_value(self, result: TestResult) -> Optional[float]:
+        if result.get("status") != "succeeded":
+            # Iterations that did not finish carry no usable objective.
+            return 0.0 if self._objective is None else self._threshold - 1.0
+        if self._objective is None:
+            monitors = (result.get("metrics") or {}).get("monitors") or {}
+            collided = (monitors.get("collision") or {}).get("collided")
+            return 0.0 if collided else 1.0
+
+        value: Any = result
+        for key in self._objective.split("."):
+            if not isinstance(value, dict) or key not in value:
+                return None
+            value = value[key]
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+
+    def update_with_results(self, past_results: Optional[Iterable[TestResult]]):
+        if not past_results:
+            return
+        for result in past_results:
+            index = result.get("index")
+            if index is None:
+                index = self.index_of(result.get("params", result))
+            if index is None:
+                continue
+            value = self._objective_value(result)
+            if value is None:
+                logger.debug("No objective in result of grid index %s", index)
+                continue
+            self.mark_seen(index)
+            self._x.append(self._normalized(index))
+            self._y.append(value)
+            if value < self._threshold:
+                logger.info(
+                    "Failure found at grid index %d (objective %s)", index, value
+                )
+
+    def _sample_unseen(self, count: int) -> List[int]:
+        """Up to `count` distinct unseen grid indices of the shard."""
+        size = len(self._shard_range)
+        if size == 0:
+            return []
+        picked: set[int] = set()
+        for _ in range(count * 4):
+            if len(picked) >= count:
+                break
+            index = self._shard_range[self._rng.randrange(size)]
+            if not self.is_seen(index):
+                picked.add(index)
+        if not picked:
+            # Nearly exhausted shard; fall back to a scan.
+            for index in self._shard_range:
+                if not self.is_seen(index):
+                    picked.add(index)
+                    if len(picked) >= count:
+                        break
+        return list(picked)
+
+    def _score(self, candidates: List[int]) -> np.ndarray:
+        """(threshold - mean) / std of the GP posterior at each candidate."""
+        x = np.asarray(self._x, dtype=float)
+        y = np.asarray(self._y, dtype=float)
+        xc = np.asarray([self._normalized(i) for i in candidates], dtype=float)
+
+        y_mean = y.mean()
+        y_std = y.std() or 1.0
+        ys = (y - y_mean) / y_std
+
+        def kernel(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+            d2 = ((a[:, None, :] - b[None, :, :]) ** 2).sum(axis=-1)
+            return np.exp(-0.5 * d2 / self._length_scale**2)
+
+        k = kernel(x, x) + self._noise * np.eye(len(x))
+        chol = np.linalg.cholesky(k)
+        alpha = np.linalg.solve(chol.T, np.linalg.solve(chol, ys))
+        k_star = kernel(xc, x)
+        mean = k_star @ alpha
+        v = np.linalg.solve(chol, k_star.T)
+        std = np.sqrt(np.clip(1.0 - (v**2).sum(axis=0), 1e-12, None))
+
+        threshold = (self._threshold - y_mean) / y_std
+        return (threshold - mean) / std
+
+    def next(
+        self,
+        past_results: Optional[Iterable[TestResult]] = None,
+    ) -> Optional[ParamDict]:
+        self.update_with_results(past_results)
+        if self._emitted >= self._max_evaluations:
+            return None
+
+        if len(self._y) < self._initial_samples:
+            candidates = self._sample_unseen(1)
+        else:
+            candidates = self._sample_unseen(self._candidates)
+            if len(candidates) > 1:
+                try:
+                    scores = self._score(candidates)
+                    candidates = [candidates[int(np.argmax(scores))]]
+                except np.linalg.LinAlgError:
+                    logger.warning("Surrogate fit failed; sampling at random.")
+                    candidates = [self._rng.choice(candidates)]
+
+        if not candidates:
+            return None
+
+        index = candidates[0]
+        self.mark_seen(index)
+        self.last_index = index
+        self._emitted += 1
+        return self.point(index)
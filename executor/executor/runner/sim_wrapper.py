@@ -1,4 +1,5 @@
 import logging
+from time import perf_counter_ns
 from typing import Optional
 
 import grpc
@@ -13,25 +14,46 @@ from sbsvf_api import (
     path_pb2,
 )
 
+from executor.runner.utils.budget import AdaptiveDeadline, EpisodeStalled
 from executor.runner.utils.control import Ctrl
+from executor.runner.utils.metrics import LatencyRecorder
+from executor.runner.utils.quit_check import PendingQuitCheck, step_quit_flag
 from executor.runner.utils.sps import ScenarioPack
 from executor.runner.utils.util import get_cfg
 
 logger = logging.getLogger(__name__)
 
 
-class SimWrapper:
-    def __init__(self, sim_spec: dict, dt_ns: int | None = None):
+class SimWrapperBase:
+    """
+    Simulator service client without a transport: configuration, request
+    building, response handling, metrics and step deadline. `SimWrapper` and
+    `AsyncSimWrapper` only issue the RPCs, blocking or on `grpc.aio`.
+    """
+
+    def __init__(
+        self,
+        sim_spec: dict,
+        dt_ns: int | None = None,
+        deadline_spec: dict | bool | None = None,
+    ):
         self._sim_spec = sim_spec
 
         if dt_ns is None:
-            logger.warning("dt not specified for SimWrapper, defaulting to 0.01s")
+            logger.warning(
+                "dt not specified for %s, defaulting to 0.01s", type(self).__name__
+            )
             self._dt_s = 0.01
         else:
             self._dt_s = dt_ns / 1e9
 
         self._url = self._sim_spec.get("url", "localhost:50053")
         self._timeout = float(self._sim_spec.get("timeout", 10.0))
+        # Step deadline adapting to the observed step latency, capped at
+        # the static timeout.
+        self.step_deadline = AdaptiveDeadline.from_spec(
+            deadline_spec, ceiling_s=self._timeout
+        )
         self._sim_cfg_path = self._sim_spec.get("config_path", None)
         self._sim_output_dir = self._sim_spec.get("output_path", "/mnt/output")
 
@@ -43,63 +65,56 @@ class SimWrapper:
         self._channel = None
         self._stub = None
         self._connected = False
-
-        self.init()
+        # Quit flag of the last step response; None if the server has none.
+        self.step_should_quit: Optional[bool] = None
+        # RPC latencies, drained by the runner after every iteration.
+        self.metrics = LatencyRecorder()
 
     # ---------------------------
-    # Public API
+    # Requests and responses
     # ---------------------------
-    def init(self):
-        # long-lived channel
-        self._channel = grpc.insecure_channel(self._url)
-        self._stub = sim_server_pb2_grpc.SimServerStub(self._channel)
-
-        # Ping
-        try:
-            pong = self._stub.Ping(empty_pb2.Empty(), timeout=300)
-            logger.info(f"Ping response: {pong.msg}")
-        except grpc.RpcError as e:
-            raise RuntimeError(f"Ping failed: {e.code().name} - {e.details()}") from e
+    def _open_stub(self, channel) -> None:
+        self._channel = channel
+        self._stub = sim_server_pb2_grpc.SimServerStub(channel)
 
+    def _init_request(self):
         cfg_struct = Struct()
         cfg_struct.update(self._sim_cfg if self._sim_cfg is not None else {})
         config = config_pb2.Config(config=cfg_struct)
-        request = sim_server_pb2.SimServerMessages.InitRequest(
+        return sim_server_pb2.SimServerMessages.InitRequest(
             config=config,
             output_dir=path_pb2.Path(path=str(self._sim_output_dir)),
             dt=self._dt_s,
         )
-        response = self._stub.Init(request, timeout=self._timeout)
+
+    def _init_done(self, response, start_ns: int) -> None:
         logger.info(f"Init response: {response.msg}")
         if not response.success:
             raise RuntimeError(f"Server Init returned success=false: {response.msg}")
 
+        self.metrics.record("init", perf_counter_ns() - start_ns)
         self._connected = True
 
-    def reset(
+    def _reset_request(
         self,
         output_dir: str,
         scenario_pack: ScenarioPack,
-        params: Optional[dict[str, str]] = {},
+        params: Optional[dict[str, str]],
     ):
         self._ensure_ready()
-        req = sim_server_pb2.SimServerMessages.ResetRequest(
+        self.step_should_quit = None
+        self.step_deadline.reset()
+        return sim_server_pb2.SimServerMessages.ResetRequest(
             output_dir=path_pb2.Path(path=str(output_dir)),
             scenario_pack=scenario_pack.to_protobuf(),
             params=params,
         )
-        try:
-            resp = self._stub.Reset(req, timeout=self._timeout)
-            return resp.objects
-        except grpc.RpcError as e:
-            raise RuntimeError(f"Reset failed: {e.code().name} - {e.details()}") from e
 
-    def step(self, ctrl_cmd: Ctrl, time_stamp_ns: int):
-        self._ensure_ready()
-
-        if ctrl_cmd == None:
-            return control_pb2.CtrlCmd(mode=control_pb2.CtrlMode.NONE)  # 空的 CtrlCmd
+    def _reset_done(self, resp, start_ns: int):
+        self.metrics.record("reset", perf_counter_ns() - start_ns)
+        return resp.objects
 
+    def _step_request(self, ctrl_cmd: Ctrl, time_stamp_ns: int):
         # payload = Struct()
         # payload.update(ctrl_cmd.payload)
 
@@ -108,15 +123,99 @@ class SimWrapper:
         #     payload=payload,
         # )
 
-        req = sim_server_pb2.SimServerMessages.StepRequest(
+        return sim_server_pb2.SimServerMessages.StepRequest(
             ctrl_cmd=ctrl_cmd, timestamp_ns=int(time_stamp_ns)
         )
+
+    def _step_done(self, resp, start_ns: int):
+        latency_ns = perf_counter_ns() - start_ns
+        self.metrics.record("step", latency_ns)
+        self.step_deadline.observe(latency_ns)
+        self.step_should_quit = step_quit_flag(resp)
+        # StepResponse { repeated ObjectState objects }
+        return resp.objects
+
+    @staticmethod
+    def _step_error(e: grpc.RpcError, timeout: float) -> Exception:
+        if e.code() == grpc.StatusCode.DEADLINE_EXCEEDED:
+            return EpisodeStalled(
+                f"Simulator step exceeded its {timeout:.2f}s deadline"
+            )
+        return RuntimeError(f"Step failed: {e.code().name} - {e.details()}")
+
+    def _should_quit_timeout(self) -> float:
+        return min(self._timeout, 2.0)
+
+    def _should_quit_done(self, resp, start_ns: int) -> bool:
+        self.metrics.record("should_quit", perf_counter_ns() - start_ns)
+        return bool(resp.should_quit)
+
+    # ---------------------------
+    # Internal
+    # ---------------------------
+    def _ensure_ready(self):
+        if self._stub is None or self._channel is None or not self._connected:
+            raise RuntimeError(
+                f"{type(self).__name__} not initialized. Call init() first."
+            )
+
+
+class SimWrapper(SimWrapperBase):
+    def __init__(
+        self,
+        sim_spec: dict,
+        dt_ns: int | None = None,
+        deadline_spec: dict | bool | None = None,
+    ):
+        super().__init__(sim_spec, dt_ns=dt_ns, deadline_spec=deadline_spec)
+        self.init()
+
+    # ---------------------------
+    # Public API
+    # ---------------------------
+    def init(self):
+        # long-lived channel
+        start_ns = perf_counter_ns()
+        self._open_stub(grpc.insecure_channel(self._url))
+
+        # Ping
         try:
-            resp = self._stub.Step(req, timeout=self._timeout)
-            # StepResponse { repeated ObjectState objects }
-            return resp.objects
+            pong = self._stub.Ping(empty_pb2.Empty(), timeout=300)
+            logger.info(f"Ping response: {pong.msg}")
         except grpc.RpcError as e:
-            raise RuntimeError(f"Step failed: {e.code().name} - {e.details()}") from e
+            raise RuntimeError(f"Ping failed: {e.code().name} - {e.details()}") from e
+
+        response = self._stub.Init(self._init_request(), timeout=self._timeout)
+        self._init_done(response, start_ns)
+
+    def reset(
+        self,
+        output_dir: str,
+        scenario_pack: ScenarioPack,
+        params: Optional[dict[str, str]] = {},
+    ):
+        req = self._reset_request(output_dir, scenario_pack, params)
+        try:
+            start_ns = perf_counter_ns()
+            resp = self._stub.Reset(req, timeout=self._timeout)
+            return self._reset_done(resp, start_ns)
+        except grpc.RpcError as e:
+            raise RuntimeError(f"Reset failed: {e.code().name} - {e.details()}") from e
+
+    def step(self, ctrl_cmd: Ctrl, time_stamp_ns: int):
+        self._ensure_ready()
+
+        if ctrl_cmd == None:
+            return control_pb2.CtrlCmd(mode=control_pb2.CtrlMode.NONE)  # 空的 CtrlCmd
+
+        req = self._step_request(ctrl_cmd, time_stamp_ns)
+        timeout = self.step_deadline.timeout_s()
+        try:
+            start_ns = perf_counter_ns()
+            resp = self._stub.Step(req, timeout=timeout)
+            return self._step_done(resp, start_ns)
+        except grpc.RpcError as e:
+            raise self._step_error(e, timeout) from e
 
     def stop(self):
         """
@@ -139,21 +238,31 @@ class SimWrapper:
         if self._stub is None or not self._connected:
             return True
         try:
+            start_ns = perf_counter_ns()
             resp = self._stub.ShouldQuit(
-                empty_pb2.Empty(), timeout=min(self._timeout, 2.0)
+                empty_pb2.Empty(), timeout=self._should_quit_timeout()
             )
-            return bool(resp.should_quit)
+            return self._should_quit_done(resp, start_ns)
         except grpc.RpcError:
             # server 抖一下不要直接判 quit
             return False
 
+    def should_quit_future(self) -> Optional[PendingQuitCheck]:
+        """
+        Issue ShouldQuit without blocking; pass the returned call to
+        `resolve_should_quit`. Returns None when not connected.
+        """
+        if self._stub is None or not self._connected:
+            return None
+        start_ns = perf_counter_ns()
+        future = self._stub.ShouldQuit.future(
+            empty_pb2.Empty(), timeout=self._should_quit_timeout()
+        )
+        return PendingQuitCheck(future, start_ns, self.metrics)
+
     # ---------------------------
     # Internal
     # ---------------------------
-    def _ensure_ready(self):
-        if self._stub is None or self._channel is None or not self._connected:
-            raise RuntimeError("SimWrapper not initialized. Call init() first.")
-
     def _close(self):
         if self._channel is not None:
             try:
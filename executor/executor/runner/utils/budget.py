@@ -0,0 +1,140 @@
+from collections import deque
+from dataclasses import dataclass
+import math
+from typing import Any, Optional
+
+
+class EpisodeStalled(RuntimeError):
+    """
+    An iteration stopped making progress: a step missed its deadline or the
+    episode ran out of wall-clock budget. The services are assumed wedged.
+    """
+
+
+@dataclass(frozen=True)
+class BudgetPolicy:
+    """
+    Client-side limits of one episode.
+
+    `sim_time_s` caps simulation time and defaults to the scenario's
+    `timeout_ns`; reaching it ends the episode normally. The wall-clock cap is
+    opt-in: `wall_s` seconds, or `wall_factor` times the simulation time
+    budget. Exceeding it aborts the episode as stalled.
+    """
+
+    sim_time_s: Optional[float] = None
+    wall_s: Optional[float] = None
+    wall_factor: Optional[float] = None
+
+    @classmethod
+    def from_spec(cls, spec: Optional[dict[str, Any]]) -> "BudgetPolicy":
+        spec = spec or {}
+        policy = cls(
+            sim_time_s=_optional_float(spec.get("sim_time_s")),
+            wall_s=_optional_float(spec.get("wall_s")),
+            wall_factor=_optional_float(spec.get("wall_factor")),
+        )
+        for name in ("sim_time_s", "wall_s", "wall_factor"):
+            value = getattr(policy, name)
+            if value is not None and not value > 0:
+                raise ValueError(f"Episode budget {name} must be > 0, got {value}")
+        return policy
+
+    def sim_time_ns(self, timeout_ns: int) -> Optional[int]:
+        if self.sim_time_s is not None:
+            return int(self.sim_time_s * 1e9)
+        return int(timeout_ns) if timeout_ns and timeout_ns > 0 else None
+
+    def wall_time_s(self, timeout_ns: int) -> Optional[float]:
+        if self.wall_s is not None:
+            return self.wall_s
+        if self.wall_factor is None:
+            return None
+        sim_time_ns = self.sim_time_ns(timeout_ns)
+        if sim_time_ns is None:
+            return None
+        return self.wall_factor * sim_time_ns / 1e9
+
+
+def _optional_float(value: Any) -> Optional[float]:
+    return None if value is None else float(value)
+
+
+class AdaptiveDeadline:
+    """
+    Deadline of a per-tick RPC derived from its own recent latency.
+
+    After `warmup` calls the deadline is `multiplier` times the `quantile`
+    latency of the last `window` calls, clamped to [floor_s, ceiling_s]. Until
+    then, and with `enabled=False`, it is `ceiling_s`, the service's static
+    timeout.
+
+    `reset()` starts a new episode from `ceiling_s`; the first call after it
+    is not observed, as it carries the episode's setup rather than the
+    steady-state step cost.
+    """
+
+    # Recomputing the quantile on every call would sort the window each tick.
+    REFRESH_EVERY = 32
+
+    def __init__(
+        self,
+        ceiling_s: float,
+        enabled: bool = True,
+        quantile: float = 0.99,
+        multiplier: float = 10.0,
+        floor_s: float = 5.0,
+        warmup: int = 20,
+        window: int = 512,
+    ):
+        if not 0 < quantile <= 1:
+            raise ValueError(f"Deadline quantile must be in (0, 1], got {quantile}")
+        self.ceiling_s = ceiling_s
+        self.enabled = enabled
+        self.quantile = quantile
+        self.multiplier = multiplier
+        self.floor_s = min(floor_s, ceiling_s)
+        self.warmup = max(warmup, 1)
+        self._latencies: deque[int] = deque(maxlen=max(window, 1))
+        self.reset()
+
+    @classmethod
+    def from_spec(
+        cls, spec: dict[str, Any] | bool | None, ceiling_s: float
+    ) -> "AdaptiveDeadline":
+        if spec is None or isinstance(spec, bool):
+            return cls(ceiling_s, enabled=spec is not False)
+        return cls(
+            ceiling_s,
+            enabled=bool(spec.get("enabled", True)),
+            quantile=float(spec.get("quantile", 0.99)),
+            multiplier=float(spec.get("multiplier", 10.0)),
+            floor_s=float(spec.get("floor_s", 5.0)),
+            warmup=int(spec.get("warmup", 20)),
+            window=int(spec.get("window", 512)),
+        )
+
+    def reset(self) -> None:
+        self._latencies.clear()
+        self._observed = 0
+        self._skip_next = True
+        self._timeout_s = self.ceiling_s
+
+    def timeout_s(self) -> float:
+        return self._timeout_s
+
+    def observe(self, latency_ns: int) -> None:
+        if not self.enabled:
+            return
+        if self._skip_next:
+            self._skip_next = False
+            return
+        self._latencies.append(latency_ns)
+        self._observed += 1
+        since_warmup = self._observed - self.warmup
+        if since_warmup < 0 or since_warmup % self.REFRESH_EVERY:
+            return
+        ordered = sorted(self._latencies)
+        rank = max(math.ceil(self.quantile * len(ordered)) - 1, 0)
+        timeout_s = self.multiplier * ordered[rank] / 1e9
+        self._timeout_s = min(max(timeout_s, self.floor_s), self.ceiling_s)
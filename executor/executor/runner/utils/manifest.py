@@ -0,0 +1,105 @@
+import logging
+import mmap
+import os
+from pathlib import Path
+import struct
+import threading
+from typing import Iterator
+
+logger = logging.getLogger(__name__)
+
+
+class ResumeManifest:
+    """
+    Memory-mapped bitmap of the completed grid indices of a logical scenario.
+
+    The file lives in the task output dir and holds a small header followed by
+    one bit per grid point. Marking a point is a single byte store into the
+    shared mapping, flushed right away, so a restarted executor can skip
+    finished points without touching their iteration directories.
+    """
+
+    MAGIC = b"SQRM"
+    VERSION = 1
+    HEADER = struct.Struct("<4sIQ")  # magic, version, total grid points
+    FILENAME = "resume_manifest.bin"
+
+    def __init__(self, output_base: Path, total: int):
+        self.path = Path(output_base) / self.FILENAME
+        self.total = total
+        self._lock = threading.Lock()
+
+        if not self._is_compatible():
+            self._create()
+
+        self._file = open(self.path, "r+b")
+        self._map = mmap.mmap(self._file.fileno(), 0)
+
+    def _size(self) -> int:
+        return self.HEADER.size + (self.total + 7) // 8
+
+    def _is_compatible(self) -> bool:
+        try:
+            with open(self.path, "rb") as f:
+                header = f.read(self.HEADER.size)
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            return False
+
+        if len(header) != self.HEADER.size:
+            logger.warning("Discarding malformed resume manifest %s", self.path)
+            return False
+        magic, version, total = self.HEADER.unpack(header)
+        if (magic, version) != (self.MAGIC, self.VERSION):
+            logger.warning("Discarding malformed resume manifest %s", self.path)
+            return False
+        if total != self.total:
+            logger.warning(
+                "Discarding resume manifest %s written for %d grid points (now %d)",
+                self.path,
+                total,
+                self.total,
+            )
+            return False
+        if size != self._size():
+            logger.warning("Discarding truncated resume manifest %s", self.path)
+            return False
+        return True
+
+    def _create(self) -> None:
+        # Write the empty manifest aside and rename it into place so a crash
+        # never leaves a truncated file behind.
+        tmp_path = self.path.with_suffix(f".tmp{os.getpid()}")
+        with open(tmp_path, "wb") as f:
+            f.write(self.HEADER.pack(self.MAGIC, self.VERSION, self.total))
+            f.truncate(self._size())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def is_completed(self, index: int) -> bool:
+        byte = self._map[self.HEADER.size + (index >> 3)]
+        return bool(byte & (1 << (index & 7)))
+
+    def mark_completed(self, index: int) -> None:
+        if not 0 <= index < self.total:
+            raise IndexError(f"Grid index {index} out of range [0, {self.total})")
+        offset = self.HEADER.size + (index >> 3)
+        with self._lock:
+            self._map[offset] |= 1 << (index & 7)
+            page = offset - offset % mmap.ALLOCATIONGRANULARITY
+            length = min(mmap.ALLOCATIONGRANULARITY, len(self._map) - page)
+            self._map.flush(page, length)
+
+    def completed(self) -> Iterator[int]:
+        """Yield the completed grid indices in ascending order."""
+        bitmap = self._map[self.HEADER.size :]
+        for byte_index, byte in enumerate(bitmap):
+            while byte:
+                bit = (byte & -byte).bit_length() - 1
+                yield byte_index * 8 + bit
+                byte &= byte - 1
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
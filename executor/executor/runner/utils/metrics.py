@@ -0,0 +1,223 @@
+import json
+import logging
+import os
+from pathlib import Path
+import threading
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyHistogram:
+    """
+    HDR-style log-linear histogram of nanosecond latencies.
+
+    Values below 2**SUB_BITS are counted exactly; above that every power of two
+    is split into 2**(SUB_BITS - 1) linear buckets, bounding the relative error
+    of a reported value to about 3%. Recording is a few integer operations and
+    a dict increment.
+    """
+
+    SUB_BITS = 5
+    HALF = 1 << (SUB_BITS - 1)
+
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.counts: dict[int, int] = {}
+        self.count = 0
+        self.total = 0
+        self.min: Optional[int] = None
+        self.max: Optional[int] = None
+
+    @classmethod
+    def _bucket(cls, value: int) -> int:
+        shift = max(value.bit_length() - cls.SUB_BITS, 0)
+        return shift * cls.HALF + (value >> shift)
+
+    @classmethod
+    def _bucket_value(cls, bucket: int) -> int:
+        """Midpoint of the values counted in `bucket`."""
+        shift = max((bucket >> (cls.SUB_BITS - 1)) - 1, 0)
+        lower = (bucket - shift * cls.HALF) << shift
+        return lower + ((1 << shift) - 1) // 2
+
+    def record(self, value_ns: int) -> None:
+        value_ns = max(int(value_ns), 0)
+        bucket = self._bucket(value_ns)
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.count += 1
+        self.total += value_ns
+        if self.min is None or value_ns < self.min:
+            self.min = value_ns
+        if self.max is None or value_ns > self.max:
+            self.max = value_ns
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        for bucket, count in other.counts.items():
+            self.counts[bucket] = self.counts.get(bucket, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+
+    def percentile(self, q: float) -> Optional[int]:
+        if self.count == 0:
+            return None
+        rank = max(1, int(q / 100.0 * self.count + 0.5))
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                return min(max(self._bucket_value(bucket), self.min), self.max)
+        return self.max
+
+    def to_dict(self) -> dict[str, Any]:
+        if self.count == 0:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "min_ns": self.min,
+            "mean_ns": self.total // self.count,
+            "p50_ns": self.percentile(50),
+            "p90_ns": self.percentile(90),
+            "p99_ns": self.percentile(99),
+            "max_ns": self.max,
+            "sum_ns": self.total,
+        }
+
+
+class LatencyRecorder:
+    """Latency histograms of one component, keyed by operation name."""
+
+    def __init__(self):
+        self.histograms: dict[str, LatencyHistogram] = {}
+
+    def record(self, name: str, value_ns: int) -> None:
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+        histogram.record(value_ns)
+
+    def drain(self) -> dict[str, LatencyHistogram]:
+        """Return the histograms recorded so far and start over."""
+        histograms, self.histograms = self.histograms, {}
+        return histograms
+
+
+def iteration_metrics(
+    ticks: int,
+    wall_s: float,
+    sim_time_s: float,
+    tick_latency: LatencyHistogram,
+    components: dict[str, dict[str, LatencyHistogram]],
+    schedule: Optional[dict[str, Any]] = None,
+    monitors: Optional[dict[str, Any]] = None,
+) -> dict[str, Any]:
+    metrics = {
+        "ticks": ticks,
+        "wall_s": round(wall_s, 6),
+        "sim_time_s": round(sim_time_s, 6),
+        "ticks_per_s": round(ticks / wall_s, 3) if wall_s > 0 else None,
+        "real_time_factor": round(sim_time_s / wall_s, 4) if wall_s > 0 else None,
+        "tick": tick_latency.to_dict(),
+        **{
+            component: {name: h.to_dict() for name, h in histograms.items()}
+            for component, histograms in components.items()
+        },
+    }
+    if schedule is not None:
+        metrics["schedule"] = schedule
+    if monitors is not None:
+        metrics["monitors"] = monitors
+    return metrics
+
+
+def write_metrics_file(path: Path, metrics: dict[str, Any]) -> None:
+    with open(path, "w") as f:
+        json.dump(metrics, f, separators=(",", ":"))
+
+
+def _prometheus_labels(labels: dict[str, Any]) -> str:
+    def escape(value: Any) -> str:
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in labels.items()) + "}"
+
+
+QUANTILES = (("0.5", "p50_ns"), ("0.9", "p90_ns"), ("0.99", "p99_ns"))
+ITERATION_GAUGES = ("ticks", "wall_s", "sim_time_s", "ticks_per_s", "real_time_factor")
+
+
+def prometheus_samples(metrics: dict[str, Any], labels: dict[str, Any]) -> list[str]:
+    """Prometheus text-format samples of one iteration's metrics."""
+    samples = []
+    for name in ITERATION_GAUGES:
+        if metrics.get(name) is not None:
+            samples.append(
+                f"executor_iteration_{name}{_prometheus_labels(labels)} {metrics[name]}"
+            )
+
+    runner = {"tick": metrics["tick"]}
+    if "schedule" in metrics:
+        runner["tick_overrun"] = metrics["schedule"]["overrun"]
+    latencies = {
+        "runner": runner,
+        "sim": metrics.get("sim", {}),
+        "av": metrics.get("av", {}),
+    }
+    for component, operations in latencies.items():
+        for operation, summary in operations.items():
+            if not summary.get("count"):
+                continue
+            op_labels = {**labels, "component": component, "op": operation}
+            for quantile, key in QUANTILES:
+                samples.append(
+                    "executor_latency_seconds"
+                    f"{_prometheus_labels({**op_labels, 'quantile': quantile})} "
+                    f"{summary[key] / 1e9:.9f}"
+                )
+            samples.append(
+                f"executor_latency_seconds_sum{_prometheus_labels(op_labels)} "
+                f"{summary['sum_ns'] / 1e9:.9f}"
+            )
+            samples.append(
+                f"executor_latency_seconds_count{_prometheus_labels(op_labels)} "
+                f"{summary['count']}"
+            )
+    return samples
+
+
+class PrometheusTextfile:
+    """
+    Latest iteration metrics of every lane in a node-exporter textfile. The
+    file is replaced atomically so the collector never reads a partial write.
+    """
+
+    HEADER = ["# TYPE executor_latency_seconds summary"] + [
+        f"# TYPE executor_iteration_{name} gauge" for name in ITERATION_GAUGES
+    ]
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._samples: dict[Any, list[str]] = {}
+
+    def update(self, key: Any, samples: list[str]) -> None:
+        with self._lock:
+            self._samples[key] = samples
+            lines = list(self.HEADER)
+            for lane_samples in self._samples.values():
+                lines.extend(lane_samples)
+
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}")
+            try:
+                tmp_path.write_text("\n".join(lines) + "\n")
+                os.replace(tmp_path, self.path)
+            except OSError as exc:
+                logger.warning(
+                    "Failed to write Prometheus textfile %s: %s", self.path, exc
+                )
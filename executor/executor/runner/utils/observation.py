@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from executor.runner.utils.object import (
+    DEFAULT_SHAPES,
+    ObjectKinematic,
+    ObjectState,
+    RoadObjectType,
+    Shape,
+    ShapeType,
+)
+
+
+# Column name -> dtype. One row per object per tick.
+COLUMNS: Dict[str, np.dtype] = {
+    "tick": np.dtype(np.int32),
+    "time_ns": np.dtype(np.int64),
+    # Position of the object in the tick's `objects` field.
+    "slot": np.dtype(np.int32),
+    "x": np.dtype(np.float64),
+    "y": np.dtype(np.float64),
+    "z": np.dtype(np.float64),
+    "yaw": np.dtype(np.float64),
+    "speed": np.dtype(np.float64),
+    "acceleration": np.dtype(np.float64),
+    "yaw_rate": np.dtype(np.float64),
+    "yaw_acceleration": np.dtype(np.float64),
+    "type": np.dtype(np.int16),
+    "shape_type": np.dtype(np.int8),
+    "length": np.dtype(np.float32),
+    "width": np.dtype(np.float32),
+    "height": np.dtype(np.float32),
+}
+
+KINEMATIC_COLUMNS = (
+    "x",
+    "y",
+    "z",
+    "yaw",
+    "speed",
+    "acceleration",
+    "yaw_rate",
+    "yaw_acceleration",
+)
+
+# Default dimensions by RoadObjectType value, as in default_shape_for_vehicle.
+_DEFAULT_DIMS = np.zeros((max(t.value for t in RoadObjectType) + 1, 3))
+for _type, _dims in DEFAULT_SHAPES.items():
+    _DEFAULT_DIMS[_type.value] = _dims
+_KNOWN_TYPES = np.array(sorted(RoadObjectType._value2member_map_), dtype=np.int16)
+
+
+class ObservationBuffer:
+    """
+    Struct-of-arrays store of the `ObjectState` streams of an episode: one
+    preallocated NumPy column per field and one row per object per tick.
+    Rows of tick `i` are `tick_rows(i)`; columns returned by `column()` and
+    `tick_columns()` are views that stay valid until the next append.
+
+    The buffer is a tick hook: `buffer(tick, sim_time_ns, objects)` appends
+    the `objects` repeated field returned by the simulator step.
+    """
+
+    def __init__(self, capacity: int = 4096):
+        self._capacity = max(1, capacity)
+        self._columns = {
+            name: np.empty(self._capacity, dtype=dtype)
+            for name, dtype in COLUMNS.items()
+        }
+        self._rows = 0
+        self._tick_start: List[int] = []
+        self._tick_time_ns: List[int] = []
+
+    def __len__(self) -> int:
+        return self._rows
+
+    @property
+    def num_ticks(self) -> int:
+        return len(self._tick_start)
+
+    def clear(self) -> None:
+        """Drop all rows but keep the allocation for the next episode."""
+        self._rows = 0
+        self._tick_start.clear()
+        self._tick_time_ns.clear()
+
+    def _reserve(self, rows: int) -> None:
+        needed = self._rows + rows
+        if needed <= self._capacity:
+            return
+        capacity = self._capacity
+        while capacity < needed:
+            capacity *= 2
+        for name, column in self._columns.items():
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[: self._rows] = column[: self._rows]
+            self._columns[name] = grown
+        self._capacity = capacity
+
+    def __call__(self, tick: int, sim_time_ns: int, objects: Any) -> None:
+        self.append_tick(objects, sim_time_ns, tick=tick)
+
+    def append_tick(
+        self,
+        objects: Iterable[Any],
+        sim_time_ns: int = 0,
+        tick: Optional[int] = None,
+    ) -> int:
+        """
+        Decode one tick of `object_pb2.ObjectState` messages and return its
+        tick index. `sim_time_ns` is used for objects without a timestamp.
+        """
+        objects = objects if isinstance(objects, list) else list(objects or ())
+        n = len(objects)
+        tick = self.num_ticks if tick is None else tick
+        self._reserve(n)
+        start, stop = self._rows, self._rows + n
+        cols = self._columns
+        self._tick_start.append(start)
+        self._tick_time_ns.append(sim_time_ns)
+
+        if n:
+            kinematics = [o.kinematic for o in objects]
+            cols["tick"][start:stop] = tick
+            cols["slot"][start:stop] = np.arange(n)
+            time_ns = cols["time_ns"][start:stop]
+            time_ns[:] = [k.time_ns for k in kinematics]
+            time_ns[time_ns == 0] = sim_time_ns
+            for name in KINEMATIC_COLUMNS:
+                cols[name][start:stop] = [getattr(k, name) for k in kinematics]
+
+            types = np.fromiter((o.type for o in objects), np.int16, n)
+            types[~np.isin(types, _KNOWN_TYPES)] = RoadObjectType.UNKNOWN.value
+            cols["type"][start:stop] = types
+            cols["shape_type"][start:stop] = ShapeType.BOUNDING_BOX.value
+            dims = _DEFAULT_DIMS[types]
+            for i, obj in enumerate(objects):
+                if obj.HasField("shape"):
+                    shape = obj.shape
+                    if shape.type in ShapeType._value2member_map_:
+                        cols["shape_type"][start + i] = shape.type
+                    d = shape.dimensions
+                    dims[i] = (d.x, d.y, d.z)
+            cols["length"][start:stop] = dims[:, 0]
+            cols["width"][start:stop] = dims[:, 1]
+            cols["height"][start:stop] = dims[:, 2]
+
+        self._rows = stop
+        return len(self._tick_start) - 1
+
+    def tick_rows(self, tick: int) -> slice:
+        start = self._tick_start[tick]
+        stop = (
+            self._tick_start[tick + 1] if tick + 1 < self.num_ticks else self._rows
+        )
+        return slice(start, stop)
+
+    def tick_time_ns(self) -> np.ndarray:
+        return np.asarray(self._tick_time_ns, dtype=np.int64)
+
+    def column(self, name: str) -> np.ndarray:
+        """Column `name` over all rows of the episode."""
+        return self._columns[name][: self._rows]
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        return {name: self.column(name) for name in self._columns}
+
+    def tick_columns(self, tick: int) -> Dict[str, np.ndarray]:
+        rows = self.tick_rows(tick)
+        return {name: column[rows] for name, column in self._columns.items()}
+
+    def track(self, slot: int) -> Dict[str, np.ndarray]:
+        """Rows of the object at position `slot` of every tick, e.g. the ego."""
+        mask = self.column("slot") == slot
+        return {name: self.column(name)[mask] for name in self._columns}
+
+    def objects(self, tick: int) -> List[ObjectState]:
+        """Tick `tick` as `ObjectState`s, for code that needs the dataclasses."""
+        cols = self.tick_columns(tick)
+        states = []
+        for i in range(len(cols["tick"])):
+            kinematic = ObjectKinematic(
+                time_ns=int(cols["time_ns"][i]),
+                **{name: float(cols[name][i]) for name in KINEMATIC_COLUMNS},
+            )
+            shape = Shape(
+                type=ShapeType(int(cols["shape_type"][i])),
+                dimensions=(
+                    float(cols["length"][i]),
+                    float(cols["width"][i]),
+                    float(cols["height"][i]),
+                ),
+            )
+            states.append(
+                ObjectState.create(
+                    type=RoadObjectType(int(cols["type"][i])),
+                    kinematic=kinematic,
+                    shape=shape,
+                )
+            )
+        return states
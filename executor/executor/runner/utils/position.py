@@ -1,10 +1,13 @@
 from __future__ import annotations
 
 import ctypes as ct
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Iterator, Optional
 import logging
+import threading
 
+import numpy as np
 from sbsvf_api import position_pb2
 
 
@@ -29,6 +32,16 @@ class RM_PositionData(ct.Structure):
     ]
 
 
+# Same layout as RM_PositionData, so RM can write straight into array rows.
+POSITION_DTYPE = np.dtype(
+    [
+        (name, np.float32 if ctype is ct.c_float else np.int32)
+        for name, ctype in RM_PositionData._fields_
+    ]
+)
+assert POSITION_DTYPE.itemsize == ct.sizeof(RM_PositionData)
+
+
 # ---------- pure data ----------
 @dataclass(frozen=True, slots=True)
 class LanePosition:
@@ -79,6 +92,10 @@ class Position:
 
     lane: LanePosition
     world: WorldPosition
+    # Protobuf form, built on first use; the snapshot never changes.
+    _pb: Optional[position_pb2.Position] = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     # convenience properties (optional)
     @property
@@ -137,18 +154,121 @@ class Position:
         }
 
     def to_protobuf(self) -> position_pb2.Position:
-        return position_pb2.Position(
-            lane=self.lane.to_protobuf(),
-            world=self.world.to_protobuf(),
-        )
+        if self._pb is None:
+            pb = position_pb2.Position(
+                lane=self.lane.to_protobuf(),
+                world=self.world.to_protobuf(),
+            )
+            object.__setattr__(self, "_pb", pb)
+        return self._pb
+
+
+def _position_from_record(rec) -> Position:
+    return Position(
+        lane=LanePosition(
+            road_id=int(rec["roadId"]),
+            lane_id=int(rec["laneId"]),
+            s=float(rec["s"]),
+            offset=float(rec["laneOffset"]),
+            junction_id=int(rec["junctionId"]),
+        ),
+        world=WorldPosition(
+            x=float(rec["x"]),
+            y=float(rec["y"]),
+            z=float(rec["z"]),
+            h=float(rec["h"]),
+            p=float(rec["p"]),
+            r=float(rec["r"]),
+            h_relative=float(rec["hRelative"]),
+        ),
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class PositionBatch:
+    """
+    Result of a batch conversion: one POSITION_DTYPE record per input point
+    and the RM return code of each. Rows whose `ret` is non-zero hold no
+    position. Columns are exposed as NumPy views; `Position` snapshots are
+    only built on indexing.
+    """
+
+    data: np.ndarray
+    ret: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __getitem__(self, index: int) -> Position:
+        if self.ret[index] != 0:
+            raise ValueError(
+                f"No position at batch index {index} (ret={self.ret[index]})"
+            )
+        return _position_from_record(self.data[index])
+
+    def __iter__(self) -> Iterator[Position]:
+        for index in range(len(self.data)):
+            yield self[index]
+
+    @property
+    def ok(self) -> np.ndarray:
+        return self.ret == 0
+
+    @property
+    def road_id(self) -> np.ndarray:
+        return self.data["roadId"]
+
+    @property
+    def junction_id(self) -> np.ndarray:
+        return self.data["junctionId"]
+
+    @property
+    def lane_id(self) -> np.ndarray:
+        return self.data["laneId"]
+
+    @property
+    def s(self) -> np.ndarray:
+        return self.data["s"]
+
+    @property
+    def offset(self) -> np.ndarray:
+        return self.data["laneOffset"]
+
+    @property
+    def x(self) -> np.ndarray:
+        return self.data["x"]
+
+    @property
+    def y(self) -> np.ndarray:
+        return self.data["y"]
+
+    @property
+    def z(self) -> np.ndarray:
+        return self.data["z"]
+
+    @property
+    def h(self) -> np.ndarray:
+        return self.data["h"]
+
+    @property
+    def p(self) -> np.ndarray:
+        return self.data["p"]
+
+    @property
+    def r(self) -> np.ndarray:
+        return self.data["r"]
+
+    def xy(self) -> np.ndarray:
+        """`(n, 2)` float64 array of world coordinates."""
+        return np.column_stack((self.x, self.y)).astype(np.float64)
 
 
 # ---------- factory ----------
 class PositionFactory:
     """
-    RM is initialized once. Each Position creation uses:
-      create handle -> set lane/world -> get data -> delete handle
-    Returned Position is pure data (no handle, no factory ref).
+    RM is initialized once and one RM position handle is reused for every
+    conversion: set lane/world -> get data. Returned Position and
+    PositionBatch objects are pure data (no handle, no factory ref).
     """
 
     def __init__(self, lib_path: Path, xodr_path: Path):
@@ -165,6 +285,9 @@ class PositionFactory:
         logger.info("RM_Init OK: %s", xodr_path)
 
         self._closed = False
+        self._handle: Optional[int] = None
+        # The reused handle must not be shared by concurrent conversions.
+        self._lock = threading.Lock()
 
     def _setup_functions(self) -> None:
         rm = self._rm
@@ -212,8 +335,15 @@ class PositionFactory:
         rm.RM_GetPositionData.restype = ct.c_int
 
     def close(self) -> None:
+        with self._lock:
+            self._close()
+
+    def _close(self) -> None:
         if self._closed:
             return
+        if self._handle is not None:
+            self._rm.RM_DeletePosition(self._handle)
+            self._handle = None
         ret = int(self._rm.RM_Close())
         self._closed = True
         logger.info("RM_Close ret=%d", ret)
@@ -230,6 +360,16 @@ class PositionFactory:
                 "PositionFactory is closed. Create a new factory to generate more positions."
             )
 
+    def _acquire_handle(self) -> int:
+        self._ensure_open()
+        if self._handle is None:
+            handle = int(self._rm.RM_CreatePosition())
+            if handle < 0:
+                raise RuntimeError("RM_CreatePosition failed")
+            logger.debug("Create handle=%d", handle)
+            self._handle = handle
+        return self._handle
+
     def _make_snapshot_from_handle(self, handle: int) -> Position:
         out = RM_PositionData()
         ret = int(self._rm.RM_GetPositionData(handle, ct.byref(out)))
@@ -262,41 +402,28 @@ class PositionFactory:
         offset: float = 0.0,
         align: bool = True,
     ) -> Position:
-        self._ensure_open()
-        handle = int(self._rm.RM_CreatePosition())
-        if handle < 0:
-            raise RuntimeError("RM_CreatePosition failed")
-
-        logger.debug("Create handle=%d (from_lane)", handle)
-
-        try:
+        with self._lock:
+            handle = self._acquire_handle()
             ret = int(
                 self._rm.RM_SetLanePosition(
                     handle, road_id, lane_id, float(offset), float(s), bool(align)
                 )
             )
-            logger.debug("RM_SetLanePosition(handle=%d) ret=%d", handle, ret)
             if ret != 0:
                 raise RuntimeError(f"RM_SetLanePosition failed ret={ret}")
 
             pos = self._make_snapshot_from_handle(handle)
-            logger.info(
-                "Position snapshot from lane: road=%d lane=%d s=%.3f offset=%.3f -> x=%.3f y=%.3f z=%.3f h=%.3f p=%.3f r=%.3f",
-                road_id,
-                lane_id,
-                s,
-                offset,
-                pos.x,
-                pos.y,
-                pos.z,
-                pos.h,
-                pos.p,
-                pos.r,
-            )
-            return pos
-        finally:
-            self._rm.RM_DeletePosition(handle)
-            logger.debug("RM_DeletePosition(%d)", handle)
+        logger.debug(
+            "Position from lane: road=%d lane=%d s=%.3f offset=%.3f -> x=%.3f y=%.3f h=%.3f",
+            road_id,
+            lane_id,
+            s,
+            offset,
+            pos.x,
+            pos.y,
+            pos.h,
+        )
+        return pos
 
     def from_world(
         self,
@@ -307,38 +434,98 @@ class PositionFactory:
         p: float = 0.0,
         r: float = 0.0,
     ) -> Position:
-        self._ensure_open()
-        handle = int(self._rm.RM_CreatePosition())
-        if handle < 0:
-            raise RuntimeError("RM_CreatePosition failed")
-
-        logger.debug("Create handle=%d (from_world)", handle)
-
-        try:
+        with self._lock:
+            handle = self._acquire_handle()
             ret = int(
                 self._rm.RM_SetWorldPosition(
                     handle, float(x), float(y), float(z), float(h), float(p), float(r)
                 )
             )
-            logger.debug("RM_SetWorldPosition(handle=%d) ret=%d", handle, ret)
             if ret != 0:
                 raise RuntimeError(f"RM_SetWorldPosition failed ret={ret}")
 
             pos = self._make_snapshot_from_handle(handle)
-            logger.info(
-                "Position snapshot from world: x=%.3f y=%.3f z=%.3f h=%.3f p=%.3f r=%.3f -> road=%d lane=%d s=%.3f offset=%.3f",
-                x,
-                y,
-                z,
-                pos.h,
-                pos.p,
-                pos.r,
-                pos.road_id,
-                pos.lane_id,
-                pos.s,
-                pos.offset,
-            )
-            return pos
-        finally:
-            self._rm.RM_DeletePosition(handle)
-            logger.debug("RM_DeletePosition(%d)", handle)
+        logger.debug(
+            "Position from world: x=%.3f y=%.3f h=%.3f -> road=%d lane=%d s=%.3f offset=%.3f",
+            x,
+            y,
+            pos.h,
+            pos.road_id,
+            pos.lane_id,
+            pos.s,
+            pos.offset,
+        )
+        return pos
+
+    def _fill_batch(self, n: int, set_position) -> PositionBatch:
+        """
+        Run `set_position(handle, i)` for every row and let RM write the
+        resulting position straight into row `i` of the output array.
+        """
+        data = np.zeros(n, dtype=POSITION_DTYPE)
+        ret = np.zeros(n, dtype=np.int32)
+        if n == 0:
+            return PositionBatch(data=data, ret=ret)
+        get_data = self._rm.RM_GetPositionData
+        # A struct view of row 0; `byref(first, offset)` addresses row i.
+        first = RM_PositionData.from_buffer(data)
+        size = POSITION_DTYPE.itemsize
+
+        with self._lock:
+            handle = self._acquire_handle()
+            for i in range(n):
+                rc = set_position(handle, i)
+                if rc == 0:
+                    rc = get_data(handle, ct.byref(first, i * size))
+                ret[i] = rc
+
+        failed = int(np.count_nonzero(ret))
+        logger.debug("Converted %d positions, %d failed", n, failed)
+        return PositionBatch(data=data, ret=ret)
+
+    def from_lanes(
+        self,
+        road_id,
+        lane_id,
+        s,
+        offset=0.0,
+        align: bool = True,
+    ) -> PositionBatch:
+        """
+        Convert many lane coordinates in one call. Arguments are scalars or
+        arrays broadcast against each other.
+        """
+        road_id, lane_id, s, offset = np.broadcast_arrays(
+            np.asarray(road_id, dtype=np.int32),
+            np.asarray(lane_id, dtype=np.int32),
+            np.asarray(s, dtype=np.float64),
+            np.asarray(offset, dtype=np.float64),
+        )
+        road_id, lane_id = road_id.ravel().tolist(), lane_id.ravel().tolist()
+        s, offset = s.ravel().tolist(), offset.ravel().tolist()
+        set_lane = self._rm.RM_SetLanePosition
+        align = bool(align)
+
+        return self._fill_batch(
+            len(s),
+            lambda handle, i: set_lane(
+                handle, road_id[i], lane_id[i], offset[i], s[i], align
+            ),
+        )
+
+    def from_worlds(self, xyzhpr) -> PositionBatch:
+        """
+        Convert many world coordinates in one call. `xyzhpr` is an `(n, k)`
+        array with k in 2..6 columns x, y[, z, h, p, r]; missing ones are 0.
+        """
+        points = np.asarray(xyzhpr, dtype=np.float64)
+        if points.ndim != 2 or not 2 <= points.shape[1] <= 6:
+            raise ValueError(f"Expected an (n, 2..6) array, got {points.shape}")
+        full = np.zeros((len(points), 6), dtype=np.float64)
+        full[:, : points.shape[1]] = points
+        rows = full.tolist()
+        set_world = self._rm.RM_SetWorldPosition
+
+        return self._fill_batch(
+            len(rows), lambda handle, i: set_world(handle, *rows[i])
+        )
@@ -0,0 +1,96 @@
+from dataclasses import dataclass
+from enum import Enum
+import logging
+from time import perf_counter_ns
+from typing import Any, Optional
+
+import grpc
+
+from executor.runner.utils.metrics import LatencyRecorder
+
+logger = logging.getLogger(__name__)
+
+
+class QuitCheckMode(Enum):
+    EVERY_TICK = "every_tick"  # blocking ShouldQuit on both services each tick
+    INTERVAL = "interval"  # blocking ShouldQuit every `interval` ticks
+    CONCURRENT = "concurrent"  # ShouldQuit futures in flight during the step
+    STEP_FLAG = "step_flag"  # quit flag on step responses, polling as fallback
+
+
+@dataclass(frozen=True)
+class QuitCheckPolicy:
+    mode: QuitCheckMode = QuitCheckMode.EVERY_TICK
+    interval: int = 1
+
+    @classmethod
+    def from_spec(cls, spec: dict[str, Any] | str | None) -> "QuitCheckPolicy":
+        if spec is None:
+            return cls()
+        if isinstance(spec, str):
+            spec = {"mode": spec}
+
+        mode = QuitCheckMode(spec.get("mode", QuitCheckMode.EVERY_TICK.value))
+        interval = int(spec.get("interval", 1))
+        if interval < 1:
+            raise ValueError(f"Quit check interval must be >= 1, got {interval}")
+        return cls(mode=mode, interval=interval)
+
+    def should_poll(self, tick: int, step_flag_supported: bool = False) -> bool:
+        """Whether the blocking ShouldQuit calls are due before `tick`."""
+        if self.mode == QuitCheckMode.EVERY_TICK:
+            return True
+        if self.mode == QuitCheckMode.CONCURRENT:
+            return False
+        if self.mode == QuitCheckMode.STEP_FLAG and step_flag_supported:
+            return False
+        return tick % self.interval == 0
+
+    def concurrent_due(self, tick: int) -> bool:
+        """Whether ShouldQuit calls are issued alongside the step of `tick`."""
+        return self.mode == QuitCheckMode.CONCURRENT and tick % self.interval == 0
+
+
+def step_quit_flag(resp: Any) -> Optional[bool]:
+    """
+    Return the quit flag carried on a step response, or None when the
+    server's API version has no such field.
+    """
+    if "should_quit" not in resp.DESCRIPTOR.fields_by_name:
+        return None
+    return bool(resp.should_quit)
+
+
+class PendingQuitCheck:
+    """
+    ShouldQuit call issued by `should_quit_future`. Its completion time is
+    stamped when the future resolves; `resolve_should_quit` records the
+    latency into `metrics` from the runner's thread, which owns the recorder.
+    """
+
+    def __init__(
+        self, future: Any, start_ns: int, metrics: Optional[LatencyRecorder] = None
+    ):
+        self.future = future
+        self.start_ns = start_ns
+        self.metrics = metrics
+        self.done_ns: Optional[int] = None
+        future.add_done_callback(self._stamp)
+
+    def _stamp(self, _future: Any) -> None:
+        self.done_ns = perf_counter_ns()
+
+
+def resolve_should_quit(pending: Optional[PendingQuitCheck]) -> bool:
+    """Wait for a ShouldQuit call issued by `should_quit_future`."""
+    if pending is None:
+        return True
+    try:
+        resp = pending.future.result()
+    except grpc.RpcError:
+        # server 抖一下不要直接判 quit
+        return False
+    if pending.metrics is not None:
+        done_ns = pending.done_ns if pending.done_ns is not None else perf_counter_ns()
+        pending.metrics.record("should_quit", done_ns - pending.start_ns)
+    return bool(resp.should_quit)
@@ -0,0 +1,316 @@
+"""
+Per-tick trajectory recording.
+
+A trajectory file holds, for every tick, the control command the simulator
+was stepped with and the observation it returned, as serialized protobuf
+messages:
+
+    header   "<4sHH"  magic b"SBTR", version, reserved
+    chunk*   "<II"    compressed size, raw size, then zlib data
+    index    "<QIiiq" per chunk: file offset, records, first tick, last tick,
+                      first sim time [ns]
+    footer   "<QII4s" index offset, number of chunks, ticks dropped by the
+                      writer, magic b"SBTX"
+
+The raw data of a chunk is a run of records:
+
+    "<iqII"  tick, sim time [ns], number of objects, control size
+    n times  "<I" size + serialized ObjectState
+             serialized CtrlCmd (control size bytes, 0 if there was none)
+
+A file whose writer died before the footer is still readable; the index is
+then rebuilt by scanning the chunks, and the number of dropped ticks is
+unknown.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_right
+from dataclasses import dataclass
+import logging
+from pathlib import Path
+import queue
+import struct
+import threading
+from typing import Any, BinaryIO, Iterator, List, Optional, Tuple
+import zlib
+
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"SBTR"
+INDEX_MAGIC = b"SBTX"
+VERSION = 1
+
+_HEADER = struct.Struct("<4sHH")
+_CHUNK = struct.Struct("<II")
+_RECORD = struct.Struct("<iqII")
+_SIZE = struct.Struct("<I")
+_INDEX_ENTRY = struct.Struct("<QIiiq")
+_FOOTER = struct.Struct("<QII4s")
+
+
+@dataclass(frozen=True)
+class ChunkInfo:
+    offset: int
+    records: int
+    first_tick: int
+    last_tick: int
+    first_time_ns: int
+
+
+@dataclass(frozen=True)
+class TickRecord:
+    tick: int
+    sim_time_ns: int
+    # Serialized object_pb2.ObjectState messages and control_pb2.CtrlCmd.
+    objects: List[bytes]
+    ctrl: bytes
+
+
+def _encode(tick: int, sim_time_ns: int, objects: Any, ctrl: Any) -> bytes:
+    parts = [b""]
+    count = 0
+    for obj in objects or ():
+        data = obj.SerializeToString()
+        parts.append(_SIZE.pack(len(data)))
+        parts.append(data)
+        count += 1
+    ctrl_data = ctrl.SerializeToString() if ctrl is not None else b""
+    parts[0] = _RECORD.pack(tick, sim_time_ns, count, len(ctrl_data))
+    parts.append(ctrl_data)
+    return b"".join(parts)
+
+
+class TrajectoryRecorder:
+    """
+    Records `(tick, sim_time_ns, raw_obs, ctrl)` per tick to a trajectory
+    file. `record()` only enqueues; a background thread serializes,
+    compresses and writes. When the bounded queue is full the tick is dropped
+    rather than stalling the step loop, and the drop is counted.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        chunk_ticks: int = 256,
+        queue_size: int = 1024,
+        compression_level: int = 1,
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._chunk_ticks = max(1, chunk_ticks)
+        self._level = compression_level
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+        self.dropped = 0
+        self.recorded = 0
+        self._error: Optional[BaseException] = None
+        self._closed = False
+
+        self._file: BinaryIO = open(self.path, "wb")
+        self._file.write(_HEADER.pack(MAGIC, VERSION, 0))
+        self._index: List[ChunkInfo] = []
+        self._thread = threading.Thread(
+            target=self._writer,
+            name=f"recorder-{self.path.parent.name}",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def record(self, tick: int, sim_time_ns: int, raw_obs: Any, ctrl: Any) -> None:
+        try:
+            self._queue.put_nowait((tick, sim_time_ns, raw_obs, ctrl))
+        except queue.Full:
+            self.dropped += 1
+
+    def _writer(self) -> None:
+        pending: List[bytes] = []
+        first: Optional[Tuple[int, int]] = None
+        last_tick = 0
+        done = False
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    done = True
+                    break
+                tick, sim_time_ns, raw_obs, ctrl = item
+                pending.append(_encode(tick, sim_time_ns, raw_obs, ctrl))
+                if first is None:
+                    first = (tick, sim_time_ns)
+                last_tick = tick
+                if len(pending) >= self._chunk_ticks:
+                    self._write_chunk(pending, first, last_tick)
+                    pending, first = [], None
+            if pending:
+                self._write_chunk(pending, first, last_tick)
+            self._write_index()
+        except BaseException as exc:  # surfaced by close()
+            self._error = exc
+            # Keep draining so close() does not wait on a queue nobody reads.
+            while not done:
+                done = self._queue.get() is None
+        finally:
+            self._file.close()
+
+    def _write_chunk(
+        self, records: List[bytes], first: Tuple[int, int], last_tick: int
+    ) -> None:
+        raw = b"".join(records)
+        data = zlib.compress(raw, self._level)
+        offset = self._file.tell()
+        self._file.write(_CHUNK.pack(len(data), len(raw)))
+        self._file.write(data)
+        self._index.append(
+            ChunkInfo(offset, len(records), first[0], last_tick, first[1])
+        )
+        self.recorded += len(records)
+
+    def _write_index(self) -> None:
+        index_offset = self._file.tell()
+        for c in self._index:
+            self._file.write(
+                _INDEX_ENTRY.pack(
+                    c.offset, c.records, c.first_tick, c.last_tick, c.first_time_ns
+                )
+            )
+        # Read after the last record was taken off the queue, so every drop is
+        # counted.
+        self._file.write(
+            _FOOTER.pack(index_offset, len(self._index), self.dropped, INDEX_MAGIC)
+        )
+
+    def close(self) -> None:
+        """Flush everything still queued and finish the file."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+        if self.dropped:
+            logger.warning(
+                "Trajectory recorder dropped %d ticks (queue full): %s",
+                self.dropped,
+                self.path,
+            )
+        if self._error is not None:
+            logger.error("Trajectory recording failed: %s", self._error)
+        else:
+            logger.debug("Recorded %d ticks to %s", self.recorded, self.path)
+
+    def __enter__(self) -> "TrajectoryRecorder":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+class TrajectoryReader:
+    """Random access to a trajectory file by tick."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file: BinaryIO = open(self.path, "rb")
+        magic, version, _ = _HEADER.unpack(self._file.read(_HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not a trajectory file")
+        if version != VERSION:
+            raise ValueError(f"Unsupported trajectory version {version}")
+        # Ticks the recorder dropped, None if the file does not say.
+        self.dropped: Optional[int] = None
+        self.chunks = self._read_index() or self._scan_chunks()
+        self._first_ticks = [c.first_tick for c in self.chunks]
+
+    def _read_index(self) -> List[ChunkInfo]:
+        size = self._file.seek(0, 2)
+        if size < _HEADER.size + _FOOTER.size:
+            return []
+        self._file.seek(size - _FOOTER.size)
+        index_offset, count, dropped, magic = _FOOTER.unpack(
+            self._file.read(_FOOTER.size)
+        )
+        if magic != INDEX_MAGIC:
+            return []
+        self.dropped = dropped
+        self._file.seek(index_offset)
+        data = self._file.read(count * _INDEX_ENTRY.size)
+        return [ChunkInfo(*entry) for entry in _INDEX_ENTRY.iter_unpack(data)]
+
+    def _scan_chunks(self) -> List[ChunkInfo]:
+        chunks = []
+        offset = _HEADER.size
+        self._file.seek(offset)
+        while True:
+            head = self._file.read(_CHUNK.size)
+            if len(head) < _CHUNK.size:
+                break
+            size, _ = _CHUNK.unpack(head)
+            data = self._file.read(size)
+            if len(data) < size:
+                break
+            try:
+                records = list(self._decode(zlib.decompress(data)))
+            except zlib.error:
+                break
+            if records:
+                chunks.append(
+                    ChunkInfo(
+                        offset,
+                        len(records),
+                        records[0].tick,
+                        records[-1].tick,
+                        records[0].sim_time_ns,
+                    )
+                )
+            offset += _CHUNK.size + size
+        return chunks
+
+    @staticmethod
+    def _decode(raw: bytes) -> Iterator[TickRecord]:
+        view = memoryview(raw)
+        pos = 0
+        while pos < len(view):
+            tick, sim_time_ns, count, ctrl_size = _RECORD.unpack_from(view, pos)
+            pos += _RECORD.size
+            objects = []
+            for _ in range(count):
+                (size,) = _SIZE.unpack_from(view, pos)
+                pos += _SIZE.size
+                objects.append(bytes(view[pos : pos + size]))
+                pos += size
+            ctrl = bytes(view[pos : pos + ctrl_size])
+            pos += ctrl_size
+            yield TickRecord(tick, sim_time_ns, objects, ctrl)
+
+    def _chunk_records(self, chunk: ChunkInfo) -> Iterator[TickRecord]:
+        self._file.seek(chunk.offset)
+        size, _ = _CHUNK.unpack(self._file.read(_CHUNK.size))
+        return self._decode(zlib.decompress(self._file.read(size)))
+
+    def __len__(self) -> int:
+        return sum(c.records for c in self.chunks)
+
+    def __iter__(self) -> Iterator[TickRecord]:
+        return self.read()
+
+    def read(self, start_tick: int = 0, stop_tick: Optional[int] = None):
+        """Records with `start_tick <= tick < stop_tick`, seeking to the chunk."""
+        first = max(bisect_right(self._first_ticks, start_tick) - 1, 0)
+        for chunk in self.chunks[first:]:
+            if stop_tick is not None and chunk.first_tick >= stop_tick:
+                return
+            for record in self._chunk_records(chunk):
+                if record.tick < start_tick:
+                    continue
+                if stop_tick is not None and record.tick >= stop_tick:
+                    return
+                yield record
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "TrajectoryReader":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import atexit
+import fcntl
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+import threading
+from typing import Any, Dict, Optional, Sequence
+
+from executor.runner.utils.position import (
+    LanePosition,
+    Position,
+    PositionFactory,
+    WorldPosition,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+def map_key(xodr_path: Path, rmlib_path: Optional[Path] = None) -> str:
+    """
+    Identity of a road network file: its path, mtime and size, plus the path
+    and mtime of the RoadManager library if positions resolved with it are
+    keyed by it.
+    """
+    xodr_path = Path(xodr_path).resolve()
+    st = xodr_path.stat()
+    raw = f"{xodr_path}:{st.st_mtime_ns}:{st.st_size}"
+    if rmlib_path is not None:
+        rmlib_path = Path(rmlib_path).resolve()
+        try:
+            lib_mtime = rmlib_path.stat().st_mtime_ns
+        except OSError:
+            lib_mtime = None
+        raw += f":{rmlib_path}:{lib_mtime}"
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+
+# ---------- road manager cache ----------
+# esmini's RoadManager holds a single map per loaded library, so the cache
+# keeps one factory per library and re-initializes it when another map (or
+# a modified file) is requested.
+_factories: Dict[Path, tuple[str, PositionFactory]] = {}
+_factories_lock = threading.Lock()
+
+
+def shared_position_factory(lib_path: Path, xodr_path: Path) -> PositionFactory:
+    """
+    Process-wide PositionFactory for `xodr_path`. The cache owns it: callers
+    must not close it; `close_shared_position_factories()` runs at exit.
+    """
+    lib_path = Path(lib_path).resolve()
+    key = map_key(xodr_path)
+    with _factories_lock:
+        cached = _factories.get(lib_path)
+        if cached is not None:
+            cached_key, factory = cached
+            if cached_key == key:
+                return factory
+            logger.info("Road network changed, reloading %s", xodr_path)
+            factory.close()
+
+        factory = PositionFactory(lib_path=lib_path, xodr_path=Path(xodr_path))
+        _factories[lib_path] = (key, factory)
+        return factory
+
+
+def close_shared_position_factories() -> None:
+    with _factories_lock:
+        for _, factory in _factories.values():
+            factory.close()
+        _factories.clear()
+
+
+atexit.register(close_shared_position_factories)
+
+
+# ---------- goal memo ----------
+def _position_to_dict(pos: Position) -> Dict[str, Any]:
+    return {
+        "road_id": pos.lane.road_id,
+        "lane_id": pos.lane.lane_id,
+        "s": pos.lane.s,
+        "offset": pos.lane.offset,
+        "junction_id": pos.lane.junction_id,
+        "x": pos.world.x,
+        "y": pos.world.y,
+        "z": pos.world.z,
+        "h": pos.world.h,
+        "p": pos.world.p,
+        "r": pos.world.r,
+        "h_relative": pos.world.h_relative,
+    }
+
+
+def _position_from_dict(rec: Dict[str, Any]) -> Position:
+    return Position(
+        lane=LanePosition(
+            road_id=int(rec["road_id"]),
+            lane_id=int(rec["lane_id"]),
+            s=float(rec["s"]),
+            offset=float(rec["offset"]),
+            junction_id=int(rec["junction_id"]),
+        ),
+        world=WorldPosition(
+            x=float(rec["x"]),
+            y=float(rec["y"]),
+            z=float(rec["z"]),
+            h=float(rec["h"]),
+            p=float(rec["p"]),
+            r=float(rec["r"]),
+            h_relative=float(rec["h_relative"]),
+        ),
+    )
+
+
+def default_cache_dir() -> Path:
+    return Path(
+        os.getenv("SBSVF_CACHE_DIR", Path.home() / ".cache" / "sbsvf")
+    ).expanduser()
+
+
+class GoalMemo:
+    """
+    On-disk memo of resolved positions, one JSON file per road network
+    (see `map_key`), keyed by the position spec. Executors on a node share the
+    files, so writes merge into the current file under an exclusive lock.
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None):
+        self.cache_dir = Path(cache_dir or default_cache_dir()) / "positions"
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def spec_key(kind: str, value: Sequence[Any]) -> str:
+        return json.dumps([kind, [float(v) for v in value]])
+
+    def _file(self, xodr_key: str) -> Path:
+        return self.cache_dir / f"{xodr_key}.json"
+
+    def _load(self, xodr_key: str) -> Dict[str, Any]:
+        entries = self._entries.get(xodr_key)
+        if entries is None:
+            try:
+                text = self._file(xodr_key).read_text(encoding="utf-8")
+                entries = json.loads(text)
+            except FileNotFoundError:
+                entries = {}
+            except (OSError, ValueError) as e:
+                logger.warning("Ignoring unreadable position memo: %s", e)
+                entries = {}
+            self._entries[xodr_key] = entries
+        return entries
+
+    def get(
+        self, xodr_key: str, kind: str, value: Sequence[Any]
+    ) -> Optional[Position]:
+        with self._lock:
+            rec = self._load(xodr_key).get(self.spec_key(kind, value))
+        return _position_from_dict(rec) if rec is not None else None
+
+    def put(
+        self, xodr_key: str, kind: str, value: Sequence[Any], pos: Position
+    ) -> None:
+        key = self.spec_key(kind, value)
+        with self._lock:
+            path = self._file(xodr_key)
+            tmp = path.with_suffix(f".{os.getpid()}.tmp")
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                with open(path.with_suffix(".lock"), "a") as lock:
+                    fcntl.flock(lock, fcntl.LOCK_EX)
+                    # Re-read to keep the entries other processes added.
+                    self._entries.pop(xodr_key, None)
+                    entries = self._load(xodr_key)
+                    entries[key] = _position_to_dict(pos)
+                    tmp.write_text(json.dumps(entries), encoding="utf-8")
+                    os.replace(tmp, path)
+            except OSError as e:
+                logger.warning("Could not write position memo %s: %s", path, e)
+                self._load(xodr_key)[key] = _position_to_dict(pos)
+
+
+_memo: Optional[GoalMemo] = None
+
+
+def resolve_position(
+    kind: str, value: Sequence[Any], xodr_path: Path, rmlib_path: Path
+) -> Position:
+    """
+    Resolve a `LanePosition` (road, lane, s[, offset]) or `WorldPosition`
+    (x, y, z[, h, p, r]) spec on `xodr_path`, consulting the goal memo first.
+    """
+    global _memo
+    if _memo is None:
+        _memo = GoalMemo()
+
+    xodr_key = map_key(xodr_path, rmlib_path)
+    pos = _memo.get(xodr_key, kind, value)
+    if pos is not None:
+        logger.debug("Position memo hit for %s %s", kind, list(value))
+        return pos
+
+    factory = shared_position_factory(rmlib_path, xodr_path)
+    if kind == "LanePosition":
+        pos = factory.from_lane(
+            road_id=int(value[0]),
+            lane_id=int(value[1]),
+            s=float(value[2]),
+            offset=float(value[3]) if len(value) > 3 else 0.0,
+        )
+    elif kind == "WorldPosition":
+        pos = factory.from_world(
+            x=float(value[0]),
+            y=float(value[1]),
+            z=float(value[2]),
+            h=float(value[3]) if len(value) > 3 else 0.0,
+            p=float(value[4]) if len(value) > 4 else 0.0,
+            r=float(value[5]) if len(value) > 5 else 0.0,
+        )
+    else:
+        raise ValueError(f"Unsupported position type {kind!r}")
+
+    _memo.put(xodr_key, kind, value, pos)
+    return pos
@@ -0,0 +1,156 @@
+import asyncio
+from dataclasses import dataclass
+import logging
+import math
+from time import perf_counter_ns, sleep
+from typing import Any, Optional
+
+from executor.runner.utils.metrics import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PacePolicy:
+    """
+    How fast simulation time may advance relative to wall-clock time.
+
+    `real_time_factor` is the target ratio of simulation to wall time (1.0 runs
+    in real time, 2.0 twice as fast); None runs as fast as the services allow.
+    A tick finishing more than `max_lag_ticks` periods late is not caught up
+    on: the schedule restarts from that tick instead of bursting.
+    """
+
+    real_time_factor: Optional[float] = None
+    max_lag_ticks: int = 5
+
+    @classmethod
+    def from_spec(cls, spec: dict[str, Any] | float | str | None) -> "PacePolicy":
+        if spec is None:
+            return cls()
+        if not isinstance(spec, dict):
+            spec = {"real_time_factor": spec}
+
+        factor = spec.get("real_time_factor")
+        if factor is None or factor == "max":
+            factor = None
+        else:
+            factor = float(factor)
+            if not factor > 0:
+                raise ValueError(f"Real-time factor must be > 0, got {factor}")
+            if math.isinf(factor):
+                factor = None
+        max_lag_ticks = int(spec.get("max_lag_ticks", 5))
+        if max_lag_ticks < 1:
+            raise ValueError(f"max_lag_ticks must be >= 1, got {max_lag_ticks}")
+        return cls(real_time_factor=factor, max_lag_ticks=max_lag_ticks)
+
+
+class TickScheduler:
+    """
+    Paces the execution loop on the monotonic `perf_counter_ns` clock.
+
+    Tick k is due `(k + 1) * dt / real_time_factor` after `start()`. Deadlines
+    are absolute, so a tick that sleeps too long or finishes a little late is
+    made up on the following ticks instead of drifting. Every tick finishing
+    after its deadline is counted as an overrun.
+
+    With `dt_ns <= 0` the simulation follows wall-clock time: each tick
+    advances it by the wall time elapsed since the previous one, and there is
+    nothing to pace.
+    """
+
+    # The last stretch of a wait is spun because sleep() overshoots by up to
+    # the scheduler's timer slack.
+    SPIN_NS = 200_000
+
+    def __init__(self, dt_ns: int, policy: Optional[PacePolicy] = None):
+        policy = policy or PacePolicy()
+        self.wall_clock = dt_ns <= 0
+        self.dt_ns = max(int(dt_ns), 0)
+        self.real_time_factor = None if self.wall_clock else policy.real_time_factor
+        self.period_ns = (
+            round(self.dt_ns / self.real_time_factor)
+            if self.real_time_factor is not None
+            else 0
+        )
+        self._max_lag_ns = self.period_ns * policy.max_lag_ticks
+        self.overruns = LatencyHistogram()
+        self.rebases = 0
+        self.sleep_ns = 0
+        self._start_ns = 0
+        self._origin_ns = 0
+        self._prev_ns = 0
+        self._ticks = 0
+
+    @property
+    def paced(self) -> bool:
+        return self.period_ns > 0
+
+    def start(self) -> None:
+        self._start_ns = self._origin_ns = self._prev_ns = perf_counter_ns()
+        self._ticks = 0
+
+    def elapsed_s(self) -> float:
+        return (perf_counter_ns() - self._start_ns) / 1e9
+
+    def advance(self) -> int:
+        """
+        Close the tick that was just stepped and return the simulation time it
+        covers, in nanoseconds.
+        """
+        self._ticks += 1
+        now = perf_counter_ns()
+        if self.wall_clock:
+            dt_ns, self._prev_ns = now - self._prev_ns, now
+            return dt_ns
+        if self.paced:
+            deadline = self._origin_ns + self._ticks * self.period_ns
+            late_ns = now - deadline
+            if late_ns > 0:
+                self.overruns.record(late_ns)
+                if late_ns > self._max_lag_ns:
+                    # Too far behind to catch up: pace from here on instead.
+                    self._origin_ns += late_ns
+                    self.rebases += 1
+        return self.dt_ns
+
+    def _remaining_ns(self) -> int:
+        deadline = self._origin_ns + self._ticks * self.period_ns
+        return deadline - perf_counter_ns()
+
+    def wait(self) -> None:
+        """Block until the deadline of the tick closed by `advance()`."""
+        if not self.paced:
+            return
+        remaining = self._remaining_ns()
+        if remaining <= 0:
+            return
+        self.sleep_ns += remaining
+        if remaining > self.SPIN_NS:
+            sleep((remaining - self.SPIN_NS) / 1e9)
+        while self._remaining_ns() > 0:
+            pass
+
+    async def wait_async(self) -> None:
+        """
+        Like `wait()`, without spinning so that other lanes on the event loop
+        keep running; the loop's timer resolution is evened out by the
+        absolute deadlines.
+        """
+        if not self.paced:
+            return
+        remaining = self._remaining_ns()
+        if remaining <= 0:
+            return
+        self.sleep_ns += remaining
+        await asyncio.sleep(remaining / 1e9)
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "target_real_time_factor": self.real_time_factor,
+            "period_ns": self.period_ns,
+            "overrun": self.overruns.to_dict(),
+            "rebases": self.rebases,
+            "sleep_ns": self.sleep_ns,
+        }
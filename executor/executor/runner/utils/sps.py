@@ -2,55 +2,89 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Callable, Dict, Optional, Tuple
 import yaml
 
 from sbsvf_api import path_pb2, scenario_pb2
 
 
 from executor.runner.utils.util import get_cfg
-from executor.runner.utils.position import PositionFactory, Position
+from executor.runner.utils.position import Position
+from executor.runner.utils.road_network import resolve_position
+
+
+class _ProtobufMemo:
+    """
+    Keeps the protobuf form of a config until one of its fields is reassigned
+    or a nested message it was built from is rebuilt. Call `invalidate()`
+    after mutating a field in place. The cached message is shared: treat it
+    as read-only (protobuf copies it into enclosing messages).
+    """
+
+    _pb = None
+    _pb_parts: Tuple[Any, ...] = ()
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        object.__setattr__(self, name, value)
+        if not name.startswith("_pb"):
+            object.__setattr__(self, "_pb", None)
+
+    def invalidate(self) -> None:
+        object.__setattr__(self, "_pb", None)
+
+    def _memoized(self, parts: Tuple[Any, ...], build: Callable[..., Any]) -> Any:
+        if (
+            self._pb is None
+            or len(parts) != len(self._pb_parts)
+            or any(a is not b for a, b in zip(parts, self._pb_parts))
+        ):
+            self._pb = build(*parts)
+            self._pb_parts = parts
+        return self._pb
 
 
 @dataclass
-class SpawnConfig:
+class SpawnConfig(_ProtobufMemo):
     position: Position
     speed: float
 
     def to_protobuf(self) -> scenario_pb2.SpawnConfig:
-        return scenario_pb2.SpawnConfig(
-            position=self.position.to_protobuf(),
-            speed=self.speed,
+        return self._memoized(
+            (self.position.to_protobuf(),),
+            lambda position: scenario_pb2.SpawnConfig(
+                position=position,
+                speed=self.speed,
+            ),
         )
 
 
 @dataclass
-class GoalConfig:
+class GoalConfig(_ProtobufMemo):
     position: Position
     # speed: float
 
     def to_protobuf(self) -> scenario_pb2.GoalConfig:
-        return scenario_pb2.GoalConfig(
-            position=self.position.to_protobuf(),
-            # speed=self.speed,
+        return self._memoized(
+            (self.position.to_protobuf(),),
+            lambda position: scenario_pb2.GoalConfig(
+                position=position,
+                # speed=self.speed,
+            ),
         )
 
 
 @dataclass
-class EgoConfig:
+class EgoConfig(_ProtobufMemo):
     target_speed: float
     goal: GoalConfig
     spawn: SpawnConfig = field(default=None)
+    # Name of the ego entity in the simulator observation, if known.
+    name: Optional[str] = None
 
     @classmethod
     def from_dict(
         cls, ego: Dict[str, Any], xodr_path: Path, rmlib_path: Path
     ) -> "EgoConfig":
-        position_factory = PositionFactory(
-            lib_path=rmlib_path.resolve(),
-            xodr_path=xodr_path.resolve(),
-        )
-
         try:
             target_speed = float(ego["target_speed"])
         except KeyError:
@@ -65,32 +99,19 @@ class EgoConfig:
         except KeyError:
             raise ValueError("ego.position not defined")
 
-        if goal_raw["type"] == "LanePosition":
-            goal_pos = position_factory.from_lane(
-                road_id=int(goal_raw["value"][0]),
-                lane_id=int(goal_raw["value"][1]),
-                s=float(goal_raw["value"][2]),
-                offset=(
-                    float(goal_raw["value"][3]) if len(goal_raw["value"]) > 3 else 0.0
-                ),
-            )
-        elif goal_raw["type"] == "WorldPosition":
-            goal_pos = position_factory.from_world(
-                x=float(goal_raw["value"][0]),
-                y=float(goal_raw["value"][1]),
-                z=float(goal_raw["value"][2]),
-                h=float(goal_raw["value"][3]) if len(goal_raw["value"]) > 3 else 0.0,
-                p=float(goal_raw["value"][4]) if len(goal_raw["value"]) > 4 else 0.0,
-                r=float(goal_raw["value"][5]) if len(goal_raw["value"]) > 5 else 0.0,
-            )
-
+        goal_pos = resolve_position(
+            goal_raw["type"],
+            goal_raw["value"],
+            xodr_path=xodr_path,
+            rmlib_path=rmlib_path,
+        )
         goal = GoalConfig(position=goal_pos)
-        position_factory.close()
         return cls(
             target_speed=target_speed,
             # spawn=spawn,
             # check_points=check_points,
             goal=goal,
+            name=ego.get("name"),
         )
 
     @classmethod
@@ -100,16 +121,19 @@ class EgoConfig:
         return cls.from_dict(data)
 
     def to_protobuf(self) -> scenario_pb2.EgoConfig:
-        return scenario_pb2.EgoConfig(
-            target_speed=self.target_speed,
-            # spawn_config=self.spawn.to_protobuf(),
-            # check_points=[cp.to_protobuf() for cp in self.check_points],
-            goal_config=self.goal.to_protobuf(),
+        return self._memoized(
+            (self.goal.to_protobuf(),),
+            lambda goal_config: scenario_pb2.EgoConfig(
+                target_speed=self.target_speed,
+                # spawn_config=self.spawn.to_protobuf(),
+                # check_points=[cp.to_protobuf() for cp in self.check_points],
+                goal_config=goal_config,
+            ),
         )
 
 
 @dataclass
-class ScenarioPack:
+class ScenarioPack(_ProtobufMemo):
     name: str
     map_name: str
     scenarios: dict[str, Path]
@@ -153,6 +177,13 @@ class ScenarioPack:
         return cls.from_dict(data)
 
     def to_protobuf(self):
+        """
+        Protobuf form, built once and reused by every Init/Reset request until
+        a field changes.
+        """
+        return self._memoized((self.ego.to_protobuf(),), self._build_protobuf)
+
+    def _build_protobuf(self, ego: scenario_pb2.EgoConfig):
         return scenario_pb2.ScenarioPack(
             name=self.name,
             map_name=self.map_name,
@@ -164,6 +195,6 @@ class ScenarioPack:
                 if self.param_range_file
                 else None
             ),
-            ego=self.ego.to_protobuf(),
+            ego=ego,
             timeout_ns=self.timeout_ns,
         )
@@ -0,0 +1,142 @@
+from concurrent.futures import ThreadPoolExecutor
+import inspect
+import json
+import logging
+from typing import Any, Optional
+
+from executor.apptainer_utils.apptainer_manager import ApptainerServiceManager
+from executor.runner.async_runner import engine_loop
+from executor.runner.runner import Lane
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceSession:
+    """
+    Keep the Apptainer services and their gRPC wrappers of one executor alive
+    across tasks.
+
+    Services are started on the first `acquire` and reused by later tasks as
+    long as the services spec (AV image, simulator image, map and scenario
+    root mounts) stays the same. Reused wrappers skip `Init` and only get `Reset`.
+    When `reuse` is disabled every task gets freshly started services.
+
+    Each service manager runs one lane, an independent sim/AV service pair
+    with its own ports and ROS domain. Lane 0 is always used; parameter sweeps
+    may ask for more lanes, up to the number of managers.
+    """
+
+    def __init__(
+        self,
+        service_managers: list[ApptainerServiceManager],
+        reuse: bool = False,
+    ):
+        if not service_managers:
+            raise ValueError("ServiceSession needs at least one service manager")
+        self.service_managers = service_managers
+        self.reuse = reuse
+
+        self.lanes: list[Lane] = []
+
+        self._key: Optional[str] = None
+        self._started_specs: list[dict[str, dict[str, Any]]] = []
+
+    @staticmethod
+    def _services_key(services_spec: dict[str, Any]) -> str:
+        spec = dict(services_spec)
+        scenario_spec = dict(spec.get("scenario", {}))
+        # With a bound scenario root the services see every scenario below it,
+        # so the task's own scenario does not decide reuse.
+        if scenario_spec.get("scenario_root"):
+            scenario_spec.pop("scenario_path", None)
+            spec["scenario"] = scenario_spec
+        return json.dumps(spec, sort_keys=True, default=str)
+
+    @property
+    def max_lanes(self) -> int:
+        return len(self.service_managers)
+
+    @property
+    def is_warm(self) -> bool:
+        return bool(self._started_specs)
+
+    def acquire(
+        self,
+        services_spec: dict[str, Any],
+        output_dir: str,
+        lanes: int = 1,
+    ) -> list[dict[str, dict[str, Any]]]:
+        """
+        Return the started specs of `lanes` service pairs matching
+        `services_spec`, starting only those that are not running yet.
+        """
+        lanes = max(1, min(lanes, self.max_lanes))
+        key = self._services_key(services_spec)
+        scenario_path = ApptainerServiceManager.scenario_container_path(
+            services_spec.get("scenario", {})
+        )
+        if self.reuse and self.is_warm and key == self._key:
+            logger.info("Reusing running services for the next task.")
+        else:
+            if self.is_warm:
+                logger.info("Services spec changed; restarting services.")
+            self.release(force=True)
+            self._key = key
+
+        missing = range(len(self._started_specs), lanes)
+        if missing:
+            with ThreadPoolExecutor(max_workers=len(missing)) as pool:
+                futures = [
+                    pool.submit(
+                        self.service_managers[index].start,
+                        services_spec=services_spec,
+                        output_dir=output_dir,
+                    )
+                    for index in missing
+                ]
+                started = [future.result() for future in futures]
+            self._started_specs.extend(started)
+
+        # Reused services keep their mounts; point them at this task's scenario.
+        return [
+            {
+                name: {**started_spec, "scenario_path": scenario_path}
+                for name, started_spec in lane_specs.items()
+            }
+            for lane_specs in self._started_specs[:lanes]
+        ]
+
+    def adopt(self, lanes: list[Lane]) -> None:
+        """Keep the initialized wrappers of a runner for the next task."""
+        if not self.reuse:
+            return
+        for lane in lanes[len(self.lanes) :]:
+            self.lanes.append(lane)
+
+    def release(self, force: bool = False, wait: bool = True) -> None:
+        """
+        Stop the services after a task. Without `force` the services are kept
+        running when reuse is enabled. With `wait=False` the instances are
+        stopped in the background while the executor reports the result and
+        claims the next task.
+        """
+        if self.reuse and not force:
+            return
+
+        self._close_wrappers()
+        for service_manager in self.service_managers:
+            service_manager.stop_all_services(wait=wait)
+        self._key = None
+        self._started_specs = []
+
+    def _close_wrappers(self) -> None:
+        for lane in self.lanes:
+            for name, wrapper in (("av", lane.av), ("sim", lane.sim)):
+                try:
+                    result = wrapper.stop()
+                    # Async engine wrappers stop on the loop their channel lives on.
+                    if inspect.isawaitable(result):
+                        engine_loop().run_until_complete(result)
+                except Exception:
+                    logger.exception("%s.stop() failed", name)
+        self.lanes = []
@@ -29,13 +29,46 @@ def resolve_host_path(host_path: str | None) -> str:
     return absolute_path
 
 
+def rmlib_path() -> str:
+    """Host path of esmini's RoadManager library."""
+    return resolve_host_path(
+        os.getenv(
+            "RMLIB_PATH",
+            f"{os.getenv('SBSVF_DIR', '/opt/sbsvf')}/lib/libesminiRMLib.so",
+        )
+    )
+
+
+def scenario_root(scenario_path: str | None) -> str | None:
+    """
+    Host directory bound into the services in place of a single scenario, so
+    that running services can be reused for other scenarios below it:
+    $SBSVF_SCENARIO_ROOT, or the parent of the scenario directory.
+    """
+    root = os.getenv("SBSVF_SCENARIO_ROOT")
+    if root:
+        return resolve_host_path(root)
+    if scenario_path is None:
+        return None
+    return os.path.dirname(resolve_host_path(scenario_path))
+
+
 def build_services_spec(
     claimed_av: dict[str, Any],
     claimed_simulator: dict[str, Any],
     claimed_map: dict[str, Any],
     claimed_scenario: dict[str, Any],
+    reuse: bool = False,
 ) -> dict[str, dict[str, Any]]:
+    """
+    Services spec of a claimed task. With `reuse` the services bind the
+    scenario root instead of the task's scenario, so that later tasks can
+    share them.
+    """
     worker_scenario_path = claimed_scenario.get("scenario_path")
+    scenario_spec = {"scenario_path": worker_scenario_path}
+    if reuse:
+        scenario_spec["scenario_root"] = scenario_root(worker_scenario_path)
 
     return {
         "simulator": {
@@ -56,12 +89,53 @@ def build_services_spec(
             "osm_path": claimed_map.get("osm_path"),
             "xodr_path": claimed_map.get("xodr_path"),
         },
+        "scenario": scenario_spec,
+    }
+
+
+def _build_simulator_runner_spec(
+    claimed_simulator: dict[str, Any],
+    claimed_scenario: dict[str, Any],
+    simulator_started_spec: dict[str, Any],
+) -> dict[str, Any]:
+    return {
+        "config_path": resolve_host_path(claimed_simulator.get("config_path")),
+        "map": simulator_started_spec.get("map", {}),
+        "scenario": {
+            "title": claimed_scenario.get("title"),
+            "path": simulator_started_spec.get("scenario_path", {}),
+        },
+        "output_path": simulator_started_spec.get("output_path", {}),
+        "url": simulator_started_spec.get("service_info", {}).get("url", {}),
+    }
+
+
+def _build_av_runner_spec(
+    claimed_av: dict[str, Any],
+    claimed_scenario: dict[str, Any],
+    av_started_spec: dict[str, Any],
+) -> dict[str, Any]:
+    return {
+        "config_path": resolve_host_path(claimed_av.get("config_path")),
+        "map": av_started_spec.get("map", {}),
         "scenario": {
-            "scenario_path": worker_scenario_path,
+            "title": claimed_scenario.get("title"),
+            "path": av_started_spec.get("scenario", {}).get(
+                "path", av_started_spec.get("scenario_path", {})
+            ),
         },
+        "output_path": av_started_spec.get("output_path", {}),
+        "url": av_started_spec.get("service_info", {}).get("url", {}),
     }
 
 
+def _build_sampler_runner_spec(claimed_sampler: dict[str, Any]) -> dict[str, Any]:
+    sampler_spec = copy.deepcopy(claimed_sampler)
+    if sampler_spec.get("config_path"):
+        sampler_spec["config_path"] = resolve_host_path(sampler_spec["config_path"])
+    return sampler_spec
+
+
 def build_runner_spec(
     claimed_spec: dict[str, dict[str, Any]],
     claimed_simulator: dict[str, Any],
@@ -71,40 +145,46 @@ def build_runner_spec(
     started_specs: dict[str, dict[str, Any]],
     job_id: Any,
     output_dir: str,
+    service_output_prefix: str = "",
+    runtime: dict[str, Any] | None = None,
+    lane_started_specs: list[dict[str, dict[str, Any]]] | None = None,
 ) -> dict[str, Any]:
-    simulator_started_spec = started_specs.get("simulator", {})
-    av_started_spec = started_specs.get("av", {})
+    """
+    Build the Runner spec of a claimed task. `started_specs` describes the
+    primary sim/AV pair; each entry of `lane_started_specs` adds an extra lane
+    for parallel parameter sweeps.
+    """
+    lanes = [
+        {
+            "simulator": _build_simulator_runner_spec(
+                claimed_simulator, claimed_scenario, lane_specs.get("simulator", {})
+            ),
+            "av": _build_av_runner_spec(
+                claimed_av, claimed_scenario, lane_specs.get("av", {})
+            ),
+        }
+        for lane_specs in lane_started_specs or []
+    ]
 
     return {
         "runtime": {
             "dt": 0.05,
+            **(runtime or {}),
         },
         "task": {
             "job_id": str(job_id),
             "output_dir": output_dir,
+            "service_output_prefix": service_output_prefix,
+            "shard": copy.deepcopy(claimed_spec.get("task", {}).get("shard")),
+            "claimed": copy.deepcopy(claimed_spec),
         },
-        "simulator": {
-            "config_path": resolve_host_path(claimed_simulator.get("config_path")),
-            "map": simulator_started_spec.get("map", {}),
-            "scenario": {
-                "title": claimed_scenario.get("title"),
-                "path": simulator_started_spec.get("scenario_path", {}),
-            },
-            "output_path": simulator_started_spec.get("output_path", {}),
-            "url": simulator_started_spec.get("service_info", {}).get("url", {}),
-        },
-        "av": {
-            "config_path": resolve_host_path(claimed_av.get("config_path")),
-            "map": av_started_spec.get("map", {}),
-            "scenario": {
-                "title": claimed_scenario.get("title"),
-                "path": av_started_spec.get("scenario", {}).get(
-                    "path", av_started_spec.get("scenario_path", {})
-                ),
-            },
-            "output_path": av_started_spec.get("output_path", {}),
-            "url": av_started_spec.get("service_info", {}).get("url", {}),
-        },
+        "simulator": _build_simulator_runner_spec(
+            claimed_simulator, claimed_scenario, started_specs.get("simulator", {})
+        ),
+        "av": _build_av_runner_spec(
+            claimed_av, claimed_scenario, started_specs.get("av", {})
+        ),
+        "lanes": lanes,
         "map": {
             "name": claimed_map.get("name"),
             "osm_path": resolve_host_path(claimed_map.get("osm_path")),
@@ -114,12 +194,17 @@ def build_runner_spec(
             "goal_config": claimed_scenario.get("goal_config"),
             "title": claimed_scenario.get("title"),
             "scenario_path": resolve_host_path(claimed_scenario.get("scenario_path")),
-            "rmlib_path": resolve_host_path(
-                os.getenv(
-                    "RMLIB_PATH",
-                    f"{os.getenv('SBSVF_DIR', '/opt/sbsvf')}/lib/libesminiRMLib.so",
-                )
-            ),
+            "rmlib_path": rmlib_path(),
         },
-        "sampler": copy.deepcopy(claimed_spec.get("sampler", {})),
+        "sampler": _build_sampler_runner_spec(claimed_spec.get("sampler", {})),
     }
+
+
+def is_logical_scenario(claimed_scenario: dict[str, Any]) -> bool:
+    """Whether the scenario ships a `<title>_param.xosc` parameter range file."""
+    scenario_path = claimed_scenario.get("scenario_path")
+    title = claimed_scenario.get("title")
+    if scenario_path is None or title is None:
+        return False
+    param_file = os.path.join(resolve_host_path(scenario_path), f"{title}_param.xosc")
+    return os.path.exists(param_file)
@@ -0,0 +1,59 @@
+import pytest
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    """Benchmark workspace with a scenario, a map and a memoized goal."""
+    from executor.bench.suite import Workspace
+
+    with Workspace(tmp_path) as workspace:
+        yield workspace
+
+
+@pytest.fixture
+def fake_service_config():
+    """Spec of the fake services; test modules override it."""
+    return {"quit_after_ticks": 5, "object_count": 3}
+
+
+@pytest.fixture
+def fake_services(fake_service_config):
+    """Fake simulator and AV servers."""
+    from executor.bench.fake_services import FakeServer, FakeServiceConfig
+
+    config = FakeServiceConfig.from_spec(fake_service_config)
+    with FakeServer("simulator", config) as sim, FakeServer("av", config) as av:
+        yield sim, av
+
+
+@pytest.fixture
+def make_runner(workspace, fake_services):
+    """Build a runner of the given class against the fake services."""
+    sim, av = fake_services
+
+    def make(runner_class, output="out", **runtime):
+        spec = {
+            "runtime": {"dt": 0.05, **runtime},
+            "task": {"job_id": "test", "output_dir": str(workspace.root / output)},
+            "simulator": {"url": sim.url},
+            "av": {"url": av.url},
+            "scenario": workspace.scenario_spec(),
+            "map": workspace.map_spec(),
+            "sampler": {},
+        }
+        return runner_class(spec)
+
+    return make
+
+
+@pytest.fixture
+def run_iteration():
+    """Run one concrete iteration and close the runner."""
+
+    def run(runner, output_related="iteration_1"):
+        try:
+            return runner.run_concrete(output_related, runner.sps)
+        finally:
+            runner.close()
+
+    return run
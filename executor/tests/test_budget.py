@@ -0,0 +1,88 @@
+from types import SimpleNamespace
+
+import pytest
+
+from executor.runner.utils.budget import AdaptiveDeadline, BudgetPolicy, EpisodeStalled
+
+MS = 1_000_000
+
+
+def test_budget_policy_from_spec():
+    assert BudgetPolicy.from_spec(None) == BudgetPolicy()
+    policy = BudgetPolicy.from_spec({"sim_time_s": "30", "wall_factor": 2})
+    assert policy == BudgetPolicy(sim_time_s=30.0, wall_factor=2.0)
+    for name in ("sim_time_s", "wall_s", "wall_factor"):
+        with pytest.raises(ValueError, match=name):
+            BudgetPolicy.from_spec({name: 0})
+
+
+def test_sim_time_budget_defaults_to_the_scenario_timeout():
+    assert BudgetPolicy().sim_time_ns(300 * 10**9) == 300 * 10**9
+    assert BudgetPolicy().sim_time_ns(0) is None
+    assert BudgetPolicy(sim_time_s=1.5).sim_time_ns(300 * 10**9) == 1_500 * MS
+
+
+def test_wall_budget_is_opt_in():
+    timeout_ns = 20 * 10**9
+
+    assert BudgetPolicy().wall_time_s(timeout_ns) is None
+    assert BudgetPolicy(wall_s=7.0).wall_time_s(timeout_ns) == 7.0
+    assert BudgetPolicy(wall_factor=1.5).wall_time_s(timeout_ns) == 30.0
+    assert BudgetPolicy(wall_factor=1.5).wall_time_s(0) is None
+
+
+def test_deadline_follows_the_latency_quantile_after_warmup():
+    deadline = AdaptiveDeadline(
+        ceiling_s=60.0, multiplier=10.0, floor_s=0.1, warmup=4, quantile=0.5
+    )
+    # The first call of an episode carries its setup and is not observed.
+    deadline.observe(50_000 * MS)
+    for _ in range(3):
+        deadline.observe(20 * MS)
+    assert deadline.timeout_s() == 60.0
+    deadline.observe(20 * MS)
+    assert deadline.timeout_s() == pytest.approx(0.2)
+
+
+def test_deadline_is_clamped_and_reset_per_episode():
+    deadline = AdaptiveDeadline(ceiling_s=2.0, floor_s=0.5, warmup=1)
+    deadline.observe(0)
+    deadline.observe(1 * MS)
+    assert deadline.timeout_s() == 0.5
+
+    deadline.reset()
+    assert deadline.timeout_s() == 2.0
+    deadline.observe(1_000 * MS)
+    deadline.observe(1_000 * MS)
+    assert deadline.timeout_s() == 2.0
+
+
+def test_disabled_deadline_stays_at_the_ceiling():
+    deadline = AdaptiveDeadline.from_spec(False, ceiling_s=30.0)
+    for _ in range(100):
+        deadline.observe(1 * MS)
+
+    assert deadline.timeout_s() == 30.0
+    assert AdaptiveDeadline.from_spec(None, ceiling_s=30.0).enabled
+    spec = {"floor_s": 60.0, "quantile": 0.9}
+    assert AdaptiveDeadline.from_spec(spec, ceiling_s=30.0).floor_s == 30.0
+    with pytest.raises(ValueError):
+        AdaptiveDeadline.from_spec({"quantile": 0}, ceiling_s=30.0)
+
+
+def test_missed_deadlines_and_wall_budget_stall_the_episode():
+    grpc = pytest.importorskip("grpc")
+    pytest.importorskip("sbsvf_api")
+    from executor.runner.runner import Runner, _outcome_status
+    from executor.runner.sim_wrapper import SimWrapper
+
+    class DeadlineExceeded(grpc.RpcError):
+        def code(self):
+            return grpc.StatusCode.DEADLINE_EXCEEDED
+
+    assert isinstance(SimWrapper._step_error(DeadlineExceeded(), 0.5), EpisodeStalled)
+    scheduler = SimpleNamespace(elapsed_s=lambda: 3.0)
+    with pytest.raises(EpisodeStalled, match="wall-clock budget") as excinfo:
+        Runner._check_wall_budget(None, scheduler, 2.0, 40)
+    assert _outcome_status(excinfo.value) == "stalled"
+    Runner._check_wall_budget(None, scheduler, None, 40)
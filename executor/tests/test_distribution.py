@@ -0,0 +1,116 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from executor.runner.sampler.distribution import (  # noqa: E402
+    frange_inclusive,
+    parse_parameter_value_distribution,
+    parse_parameter_value_distribution_file,
+)
+
+HEADER = """<?xml version="1.0" encoding="UTF-8"?>
+<OpenSCENARIO>
+<FileHeader revMajor="1" revMinor="2" description="test"/>
+<ParameterValueDistribution>
+<ScenarioFile filepath="test.xosc"/>
+"""
+FOOTER = """</ParameterValueDistribution>
+</OpenSCENARIO>
+"""
+
+UNIFORM = """<Stochastic numberOfTestRuns="8">
+<StochasticDistribution parameterName="speed">
+<UniformDistribution><Range lowerLimit="10" upperLimit="20"/></UniformDistribution>
+</StochasticDistribution>
+</Stochastic>
+"""
+
+STOCHASTIC = """<Stochastic numberOfTestRuns="200" randomSeed="42">
+<StochasticDistribution parameterName="gap">
+<NormalDistribution expectedValue="10" variance="25">
+<Range lowerLimit="5" upperLimit="15"/>
+</NormalDistribution>
+</StochasticDistribution>
+<StochasticDistribution parameterName="delay">
+<Histogram>
+<HistogramBin weight="1"><Range lowerLimit="0" upperLimit="1"/></HistogramBin>
+<HistogramBin weight="3"><Range lowerLimit="4" upperLimit="5"/></HistogramBin>
+</Histogram>
+</StochasticDistribution>
+<StochasticDistribution parameterName="weather">
+<ProbabilityDistributionSet>
+<Element value="sun" weight="0.9"/><Element value="rain" weight="0.1"/>
+</ProbabilityDistributionSet>
+</StochasticDistribution>
+</Stochastic>
+"""
+
+
+def _parse(body):
+    return parse_parameter_value_distribution(HEADER + body + FOOTER)
+
+
+def test_frange_inclusive_is_lazy_and_indexable():
+    values = frange_inclusive(0.0, 1.0, 0.1)
+
+    assert len(values) == 11
+    assert values[-1] == pytest.approx(1.0)
+    assert values.index_of(0.3) == 3
+    assert values.index_of(0.35) is None
+
+
+def test_stochastic_draws_every_run_within_its_bounds():
+    (spec,) = _parse(STOCHASTIC)
+
+    assert len(spec) == 200
+    assert spec.names == ["gap", "delay", "weather"]
+    gaps = spec.columns["gap"]
+    assert ((gaps >= 5) & (gaps <= 15)).all()
+    delays = spec.columns["delay"]
+    assert (((delays >= 0) & (delays <= 1)) | ((delays >= 4) & (delays <= 5))).all()
+    assert (delays >= 4).sum() > (delays <= 1).sum()
+    assert set(spec.columns["weather"]) <= {"sun", "rain"}
+    # A randomSeed draws the same values on every parse.
+    (again,) = _parse(STOCHASTIC)
+    assert spec.assignment(17) == again.assignment(17)
+
+
+def test_stochastic_without_seed_draws_the_same_values_on_every_parse(tmp_path):
+    first = tmp_path / "a" / "cut_in_param.xosc"
+    second = tmp_path / "b" / "cut_in_param.xosc"
+    other = tmp_path / "other_param.xosc"
+    for path in (first, second, other):
+        path.parent.mkdir(exist_ok=True)
+        path.write_text(HEADER + UNIFORM + FOOTER, encoding="utf-8")
+
+    def speeds(path):
+        (spec,) = parse_parameter_value_distribution_file(path)
+        return list(spec.columns["speed"])
+
+    # Keyed by file name, not by where the scenarios are mounted.
+    assert speeds(first) == speeds(first) == speeds(second)
+    assert speeds(first) != speeds(other)
+    assert all(10 <= v <= 20 for v in speeds(first))
+
+
+def test_value_sets_fill_missing_assignments():
+    (spec,) = _parse(
+        """<Deterministic>
+<DeterministicMultiParameterDistribution><ValueSetDistribution>
+<ParameterValueSet><ParameterAssignment parameterRef="gap" value="5"/>
+</ParameterValueSet>
+<ParameterValueSet><ParameterAssignment parameterRef="lane" value="-2"/>
+</ParameterValueSet>
+</ValueSetDistribution></DeterministicMultiParameterDistribution>
+</Deterministic>
+"""
+    )
+
+    assert spec.assignment(0) == {"gap": "5", "lane": ""}
+    assert spec.assignment(1) == {"gap": "", "lane": "-2"}
+    assert spec.index_of({"gap": "", "lane": "-2"}) == 1
+
+
+def test_user_defined_distributions_are_rejected():
+    with pytest.raises(ValueError, match="UserDefinedDistribution"):
+        _parse('<UserDefinedDistribution type="custom">x</UserDefinedDistribution>\n')
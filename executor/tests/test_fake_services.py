@@ -0,0 +1,44 @@
+import pytest
+
+pytest.importorskip("grpc")
+pytest.importorskip("sbsvf_api")
+
+from executor.bench.fake_services import FakeServiceConfig  # noqa: E402
+from executor.runner.async_runner import AsyncRunner  # noqa: E402
+from executor.runner.runner import Runner  # noqa: E402
+
+TICKS = 5
+
+
+def test_config_round_trips_through_its_spec():
+    config = FakeServiceConfig(
+        latency_s={"Step": 0.002}, object_count=8, quit_after_ticks=40
+    )
+
+    assert FakeServiceConfig.from_spec(config.to_spec()) == config
+    assert FakeServiceConfig.from_spec(None) == FakeServiceConfig()
+    assert FakeServiceConfig.from_spec({"object_count": 0}).object_count == 1
+
+
+def test_config_rejects_unknown_rpcs():
+    with pytest.raises(ValueError, match="Unknown RPCs"):
+        FakeServiceConfig.from_spec({"latency_s": {"Teleport": 1.0}})
+
+
+@pytest.mark.parametrize("runner_class", [Runner, AsyncRunner])
+def test_run_concrete_stops_when_the_simulator_quits(
+    workspace, fake_services, make_runner, run_iteration, runner_class
+):
+    sim, av = fake_services
+    result = run_iteration(make_runner(runner_class))
+
+    assert result["quit_reason"] == "simulator"
+    metrics = result["metrics"]
+    assert metrics["ticks"] == TICKS
+    assert metrics["sim"]["step"]["count"] == TICKS
+    assert metrics["av"]["step"]["count"] == TICKS
+    assert metrics["sim"]["should_quit"]["count"] == TICKS + 1
+    assert (workspace.root / "out" / "iteration_1" / "metrics.json").exists()
+    # Every call the runner made reached the fake servicers.
+    assert sim.servicer.calls["Step"] == av.servicer.calls["Step"] == TICKS
+    assert sim.servicer.calls["Reset"] == av.servicer.calls["Reset"] == 1
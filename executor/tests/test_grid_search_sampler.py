@@ -0,0 +1,135 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from executor.runner.sampler.base import Shard  # noqa: E402
+from executor.runner.sampler.grid_search_sampler import (  # noqa: E402
+    GridSearchSampler,
+)
+
+GRID = """<?xml version="1.0" encoding="UTF-8"?>
+<OpenSCENARIO>
+<FileHeader revMajor="1" revMinor="2" description="test"/>
+<ParameterValueDistribution>
+<ScenarioFile filepath="test.xosc"/>
+<Deterministic>
+<DeterministicSingleParameterDistribution parameterName="speed">
+<DistributionRange stepWidth="2.5"><Range lowerLimit="10" upperLimit="20"/>
+</DistributionRange>
+</DeterministicSingleParameterDistribution>
+<DeterministicSingleParameterDistribution parameterName="weather">
+<DistributionSet><Element value="sun"/><Element value="rain"/></DistributionSet>
+</DeterministicSingleParameterDistribution>
+<DeterministicMultiParameterDistribution><ValueSetDistribution>
+<ParameterValueSet>
+<ParameterAssignment parameterRef="gap" value="5"/>
+<ParameterAssignment parameterRef="lane" value="-1"/>
+</ParameterValueSet>
+<ParameterValueSet>
+<ParameterAssignment parameterRef="gap" value="8"/>
+<ParameterAssignment parameterRef="lane" value="-2"/>
+</ParameterValueSet>
+<ParameterValueSet>
+<ParameterAssignment parameterRef="gap" value="12"/>
+<ParameterAssignment parameterRef="lane" value="-1"/>
+</ParameterValueSet>
+</ValueSetDistribution></DeterministicMultiParameterDistribution>
+</Deterministic>
+</ParameterValueDistribution>
+</OpenSCENARIO>
+"""
+
+
+@pytest.fixture
+def grid_file(tmp_path):
+    path = tmp_path / "test_param.xosc"
+    path.write_text(GRID, encoding="utf-8")
+    return path
+
+
+def _indices(sampler):
+    indices = []
+    while sampler.next() is not None:
+        indices.append(sampler.last_index)
+    return indices
+
+
+def test_shard_from_spec():
+    assert Shard.from_spec(None) is None
+    assert Shard.from_spec({"index": 1, "count": 4}).indices(10) == range(1, 10, 4)
+    assert Shard.from_spec({"start": 3, "stop": 7}).indices(10) == range(3, 7)
+    assert Shard.from_spec({"start": 3, "stop": 70}).indices(10) == range(3, 10)
+    for spec in ({"index": 4, "count": 4}, {"count": 0}, {"start": 5, "stop": 2}):
+        with pytest.raises(ValueError):
+            Shard.from_spec(spec)
+
+
+def test_grid_shards_partition_the_grid(grid_file):
+    indices = []
+    for index in range(3):
+        shard = Shard.from_spec({"index": index, "count": 3})
+        indices += _indices(GridSearchSampler(param_range_file=grid_file, shard=shard))
+    assert sorted(indices) == list(range(30))
+
+
+def test_grid_range_shard_covers_its_range(grid_file):
+    shard = Shard.from_spec({"start": 10, "stop": 20})
+    sampler = GridSearchSampler(param_range_file=grid_file, shard=shard)
+
+    assert _indices(sampler) == list(range(10, 20))
+
+
+def test_grid_index_is_mixed_radix_with_the_last_dimension_fastest(grid_file):
+    sampler = GridSearchSampler(param_range_file=grid_file)
+
+    # 5 speeds x 2 weathers x 3 value sets.
+    assert sampler.total_permutations() == 30
+    assert sampler.point(0) == {
+        "speed": "10.0",
+        "weather": "sun",
+        "gap": "5",
+        "lane": "-1",
+    }
+    assert sampler.point(1)["gap"] == "8"
+    assert sampler.point(3)["weather"] == "rain"
+    assert sampler.point(6)["speed"] == "12.5"
+    assert sampler.point(29) == {
+        "speed": "20.0",
+        "weather": "rain",
+        "gap": "12",
+        "lane": "-1",
+    }
+    with pytest.raises(IndexError):
+        sampler.point(30)
+
+
+def test_grid_index_of_inverts_point(grid_file):
+    sampler = GridSearchSampler(param_range_file=grid_file)
+
+    for index in range(sampler.total_permutations()):
+        assert sampler.index_of(sampler.point(index)) == index
+    # Values reported back as numbers still map to their grid point.
+    params = {"speed": 12.5, "weather": "sun", "gap": 5, "lane": -1}
+    assert sampler.index_of(params) == 6
+    assert sampler.index_of({"speed": "11.0", "weather": "sun"}) is None
+
+
+def test_grid_next_reports_the_index_of_every_point(grid_file):
+    sampler = GridSearchSampler(param_range_file=grid_file)
+
+    seen = []
+    while (params := sampler.next()) is not None:
+        assert sampler.point(sampler.last_index) == params
+        seen.append(sampler.last_index)
+    assert seen == list(range(30))
+
+
+def test_grid_skips_points_of_past_results(grid_file):
+    probe = GridSearchSampler(param_range_file=grid_file)
+    past = [{"params": probe.point(0)}, {"params": probe.point(7)}]
+
+    sampler = GridSearchSampler(param_range_file=grid_file, past_results=past)
+    sampler.mark_seen(2)
+
+    assert _indices(sampler) == [i for i in range(30) if i not in (0, 2, 7)]
+    assert sampler.remaining_permutations() == 0
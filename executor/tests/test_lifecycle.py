@@ -0,0 +1,38 @@
+import os
+
+import pytest
+
+pytest.importorskip("grpc")
+pytest.importorskip("sbsvf_api")
+
+from executor.bench.lifecycle import run_lifecycle  # noqa: E402
+
+ENV = ("APPTAINER_BIN", "FAKE_APPTAINER_STATE", "SBSVF_CACHE_DIR")
+
+
+@pytest.fixture
+def clean_env(monkeypatch):
+    for name in ENV:
+        monkeypatch.delenv(name, raising=False)
+
+
+@pytest.mark.parametrize("persistent", [False, True])
+def test_services_start_ready_and_stop_through_the_fake_apptainer(
+    clean_env, persistent
+):
+    report = run_lifecycle(tasks=2, boot_delay_s=0.0, persistent=persistent)
+
+    assert len(report["runs"]) == 2
+    for run in report["runs"]:
+        assert run["first_step_s"] > 0
+        assert run["teardown_s"] >= 0
+
+
+def test_lifecycle_restores_the_environment(clean_env, monkeypatch):
+    monkeypatch.setenv("APPTAINER_BIN", "/usr/bin/apptainer")
+
+    run_lifecycle(tasks=1, boot_delay_s=0.0)
+
+    assert os.environ["APPTAINER_BIN"] == "/usr/bin/apptainer"
+    assert "FAKE_APPTAINER_STATE" not in os.environ
+    assert "SBSVF_CACHE_DIR" not in os.environ
@@ -0,0 +1,65 @@
+import pytest
+
+from executor.runner.utils.manifest import ResumeManifest
+
+
+@pytest.fixture
+def manifest_path(tmp_path):
+    return tmp_path / ResumeManifest.FILENAME
+
+
+def _completed(output_base, total):
+    manifest = ResumeManifest(output_base, total)
+    try:
+        return list(manifest.completed())
+    finally:
+        manifest.close()
+
+
+def test_completed_points_survive_reopening(tmp_path):
+    manifest = ResumeManifest(tmp_path, 100)
+    for index in (0, 7, 8, 63, 99):
+        manifest.mark_completed(index)
+    assert manifest.is_completed(63) and not manifest.is_completed(64)
+    manifest.close()
+
+    assert _completed(tmp_path, 100) == [0, 7, 8, 63, 99]
+
+
+def test_out_of_range_index_is_rejected(tmp_path):
+    manifest = ResumeManifest(tmp_path, 10)
+    try:
+        for index in (-1, 10):
+            with pytest.raises(IndexError):
+                manifest.mark_completed(index)
+    finally:
+        manifest.close()
+
+
+def test_manifest_of_another_grid_size_is_discarded(tmp_path):
+    manifest = ResumeManifest(tmp_path, 10)
+    manifest.mark_completed(3)
+    manifest.close()
+
+    assert _completed(tmp_path, 12) == []
+
+
+@pytest.mark.parametrize("keep", [2, ResumeManifest.HEADER.size + 1])
+def test_malformed_or_truncated_manifest_is_discarded(tmp_path, manifest_path, keep):
+    manifest = ResumeManifest(tmp_path, 100)
+    manifest.mark_completed(3)
+    manifest.close()
+    manifest_path.write_bytes(manifest_path.read_bytes()[:keep])
+
+    assert _completed(tmp_path, 100) == []
+    expected = ResumeManifest.HEADER.size + 100 // 8 + 1
+    assert manifest_path.stat().st_size == expected
+
+
+def test_manifest_with_a_foreign_magic_is_discarded(tmp_path, manifest_path):
+    manifest = ResumeManifest(tmp_path, 8)
+    manifest.mark_completed(0)
+    manifest.close()
+    manifest_path.write_bytes(b"XXXX" + manifest_path.read_bytes()[4:])
+
+    assert _completed(tmp_path, 8) == []
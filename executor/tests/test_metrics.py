@@ -0,0 +1,63 @@
+import random
+
+import pytest
+
+from executor.runner.utils.metrics import LatencyHistogram
+
+
+def _histogram(values):
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.record(value)
+    return histogram
+
+
+def test_small_values_are_counted_exactly():
+    for value in range(2 * LatencyHistogram.HALF):
+        bucket = LatencyHistogram._bucket(value)
+        assert LatencyHistogram._bucket_value(bucket) == value
+
+
+def test_buckets_are_ordered_and_bound_the_relative_error():
+    rng = random.Random(0)
+    values = sorted(rng.randrange(1, 10**12) for _ in range(10_000))
+    buckets = [LatencyHistogram._bucket(value) for value in values]
+
+    assert buckets == sorted(buckets)
+    for value, bucket in zip(values, buckets):
+        error = abs(LatencyHistogram._bucket_value(bucket) - value) / value
+        assert error <= 1 / (2 * LatencyHistogram.HALF)
+
+
+def test_percentiles_stay_within_the_bucket_error():
+    histogram = _histogram(range(1_000, 1_001_000, 1_000))
+
+    assert histogram.count == 1_000
+    assert histogram.percentile(50) == pytest.approx(500_000, rel=0.04)
+    assert histogram.percentile(99) == pytest.approx(990_000, rel=0.04)
+    assert histogram.percentile(100) == pytest.approx(1_000_000, rel=0.04)
+
+
+def test_percentiles_never_leave_the_recorded_range():
+    # 1_000_003 falls in a bucket whose midpoint lies below it.
+    histogram = _histogram([1_000_003] * 3)
+
+    assert {histogram.percentile(q) for q in (0, 50, 100)} == {1_000_003}
+
+
+def test_merge_matches_recording_everything_in_one_histogram():
+    first = list(range(0, 5_000, 7))
+    second = list(range(3, 900_000, 1_001))
+    merged = _histogram(first)
+    merged.merge(_histogram(second))
+
+    assert merged.to_dict() == _histogram(first + second).to_dict()
+    merged.merge(LatencyHistogram())
+    assert merged.to_dict() == _histogram(first + second).to_dict()
+
+
+def test_summary_of_an_empty_histogram():
+    histogram = LatencyHistogram()
+
+    assert histogram.to_dict() == {"count": 0}
+    assert histogram.percentile(50) is None
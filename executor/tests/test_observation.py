@@ -0,0 +1,101 @@
+from types import SimpleNamespace
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("sbsvf_api")
+
+from executor.runner.utils.object import RoadObjectType, ShapeType  # noqa: E402
+from executor.runner.utils.observation import ObservationBuffer  # noqa: E402
+
+
+class ObjectMessage:
+    """Stand-in for `object_pb2.ObjectState`."""
+
+    def __init__(self, x, type=RoadObjectType.CAR.value, time_ns=0, shape=None):
+        self.kinematic = SimpleNamespace(
+            time_ns=time_ns,
+            x=x,
+            y=-x,
+            z=0.0,
+            yaw=0.1,
+            speed=10.0 + x,
+            acceleration=0.0,
+            yaw_rate=0.0,
+            yaw_acceleration=0.0,
+        )
+        self.type = type
+        self.shape = shape
+
+    def HasField(self, name):
+        return getattr(self, name) is not None
+
+
+def _box(length, width, height):
+    dimensions = SimpleNamespace(x=length, y=width, z=height)
+    return SimpleNamespace(type=ShapeType.BOUNDING_BOX.value, dimensions=dimensions)
+
+
+def test_ticks_grow_past_the_capacity_and_keep_their_rows():
+    buffer = ObservationBuffer(capacity=2)
+    for tick in range(4):
+        buffer(tick, tick * 100, [ObjectMessage(tick + slot) for slot in range(3)])
+
+    assert len(buffer) == 12
+    assert buffer.num_ticks == 4
+    assert buffer.tick_rows(2) == slice(6, 9)
+    np.testing.assert_array_equal(buffer.tick_time_ns(), [0, 100, 200, 300])
+    columns = buffer.tick_columns(3)
+    np.testing.assert_array_equal(columns["x"], [3, 4, 5])
+    np.testing.assert_array_equal(columns["slot"], [0, 1, 2])
+    np.testing.assert_array_equal(buffer.track(0)["speed"], [10, 11, 12, 13])
+
+
+def test_timestamps_types_and_shapes_are_filled_in():
+    buffer = ObservationBuffer()
+    buffer.append_tick(
+        [
+            ObjectMessage(0, time_ns=42),
+            ObjectMessage(1, type=RoadObjectType.TRUCK.value),
+            ObjectMessage(2, type=999, shape=_box(3.0, 1.0, 2.0)),
+        ],
+        sim_time_ns=7,
+    )
+
+    columns = buffer.columns()
+    np.testing.assert_array_equal(columns["time_ns"], [42, 7, 7])
+    assert columns["type"][2] == RoadObjectType.UNKNOWN.value
+    np.testing.assert_array_equal(columns["length"], [4.5, 8.0, 3.0])
+    np.testing.assert_allclose(columns["width"], [1.8, 2.5, 1.0], rtol=1e-6)
+
+
+def test_ticks_without_objects_have_no_rows():
+    buffer = ObservationBuffer()
+    buffer.append_tick([ObjectMessage(0)])
+    buffer.append_tick([])
+    buffer.append_tick([ObjectMessage(1)])
+
+    assert buffer.tick_rows(1) == slice(1, 1)
+    np.testing.assert_array_equal(buffer.column("tick"), [0, 2])
+
+
+def test_objects_convert_back_to_dataclasses():
+    buffer = ObservationBuffer()
+    buffer.append_tick([ObjectMessage(2.5, shape=_box(3.0, 1.0, 2.0))], 9)
+
+    (state,) = buffer.objects(0)
+    assert state.type == RoadObjectType.CAR
+    assert state.kinematic.x == 2.5 and state.kinematic.time_ns == 9
+    assert state.shape.dimensions == (3.0, 1.0, 2.0)
+
+
+def test_clear_keeps_the_allocation():
+    buffer = ObservationBuffer(capacity=2)
+    buffer.append_tick([ObjectMessage(x) for x in range(5)])
+    capacity = len(buffer._columns["x"])
+    buffer.clear()
+
+    assert len(buffer) == 0 and buffer.num_ticks == 0
+    buffer.append_tick([ObjectMessage(1)])
+    assert len(buffer._columns["x"]) == capacity
+    np.testing.assert_array_equal(buffer.column("x"), [1])
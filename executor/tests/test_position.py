@@ -0,0 +1,102 @@
+import ctypes as ct
+import threading
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("sbsvf_api")
+
+from executor.runner.utils.position import (  # noqa: E402
+    PositionFactory,
+    RM_PositionData,
+)
+
+
+class FakeRM:
+    """
+    RoadManager stand-in with real C callbacks, so that RM_GetPositionData
+    writes through the pointers the factory hands out. Lane positions map to
+    x = s, y = offset; world positions keep x, y, h and report road 7,
+    lane -1 and s = x. Negative road ids and x fail.
+    """
+
+    def __init__(self):
+        self.state = {}
+        set_lane = ct.CFUNCTYPE(
+            ct.c_int, ct.c_int, ct.c_int, ct.c_int, ct.c_float, ct.c_float, ct.c_bool
+        )
+        set_world = ct.CFUNCTYPE(ct.c_int, ct.c_int, *[ct.c_float] * 6)
+        get_data = ct.CFUNCTYPE(ct.c_int, ct.c_int, ct.POINTER(RM_PositionData))
+        self.RM_CreatePosition = ct.CFUNCTYPE(ct.c_int)(lambda: 0)
+        self.RM_SetLanePosition = set_lane(self._set_lane)
+        self.RM_SetWorldPosition = set_world(self._set_world)
+        self.RM_GetPositionData = get_data(self._get_data)
+
+    def _set_lane(self, handle, road_id, lane_id, offset, s, align):
+        if road_id < 0:
+            return -1
+        self.state = {"roadId": road_id, "laneId": lane_id, "s": s, "x": s}
+        self.state.update(laneOffset=offset, y=offset)
+        return 0
+
+    def _set_world(self, handle, x, y, z, h, p, r):
+        if x < 0:
+            return -1
+        self.state = {"roadId": 7, "laneId": -1, "s": x, "x": x, "y": y, "h": h}
+        return 0
+
+    def _get_data(self, handle, out):
+        data = out.contents
+        ct.memset(ct.byref(data), 0, ct.sizeof(data))
+        data.junctionId = -1
+        for name, value in self.state.items():
+            setattr(data, name, value)
+        return 0
+
+
+@pytest.fixture
+def factory():
+    # Skip RM_Init: the conversions only need the position functions.
+    factory = PositionFactory.__new__(PositionFactory)
+    factory._rm = FakeRM()
+    factory._closed = False
+    factory._handle = None
+    factory._lock = threading.Lock()
+    return factory
+
+
+def test_lane_batch_matches_single_conversions(factory):
+    batch = factory.from_lanes(3, [-1, -2], np.arange(4.0).reshape(2, 2), 0.5)
+
+    assert len(batch) == 4
+    assert batch.ok.all()
+    for i, (lane_id, s) in enumerate([(-1, 0.0), (-2, 1.0), (-1, 2.0), (-2, 3.0)]):
+        assert batch[i] == factory.from_lane(3, lane_id, s, 0.5)
+    np.testing.assert_array_equal(batch.lane_id, [-1, -2, -1, -2])
+    np.testing.assert_array_equal(batch.xy(), [[0, 0.5], [1, 0.5], [2, 0.5], [3, 0.5]])
+
+
+def test_world_batch_pads_the_missing_columns(factory):
+    batch = factory.from_worlds([[1.0, 2.0], [3.0, 4.0]])
+
+    assert list(batch) == [factory.from_world(1, 2, 0), factory.from_world(3, 4, 0)]
+    np.testing.assert_array_equal(batch.road_id, [7, 7])
+    with pytest.raises(ValueError):
+        factory.from_worlds([1.0, 2.0])
+    with pytest.raises(ValueError):
+        factory.from_worlds(np.zeros((2, 7)))
+
+
+def test_failed_rows_carry_their_return_code(factory):
+    batch = factory.from_lanes([1, -1, 2], -1, 10.0)
+
+    np.testing.assert_array_equal(batch.ok, [True, False, True])
+    assert batch[2].road_id == 2
+    with pytest.raises(ValueError, match="batch index 1"):
+        batch[1]
+
+
+def test_empty_batch(factory):
+    batch = factory.from_worlds(np.zeros((0, 2)))
+
+    assert len(batch) == 0 and list(batch) == []
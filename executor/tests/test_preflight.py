@@ -0,0 +1,143 @@
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("sbsvf_api")
+
+from executor.preflight import (  # noqa: E402
+    LaneGraph,
+    _ego_entity,
+    check_route,
+    scenario_start,
+)
+
+
+def _road(road_id, link="", junction="-1"):
+    return f"""<road id="{road_id}" length="100" junction="{junction}">
+<link>{link}</link>
+<lanes><laneSection s="0">
+<left><lane id="1" type="driving"/></left>
+<center><lane id="0" type="none"/></center>
+<right>
+<lane id="-1" type="driving"><link><successor id="-1"/></link></lane>
+<lane id="-2" type="driving"/>
+<lane id="-3" type="sidewalk"/>
+</right>
+</laneSection></lanes>
+</road>
+"""
+
+
+# 1 -> 2 with lane links, 2 -> 3 without any, 5 -> junction 9 -> 6; 4 is apart.
+MAP = (
+    "<OpenDRIVE>\n"
+    + _road(1, '<successor elementType="road" elementId="2" contactPoint="start"/>')
+    + _road(2, '<successor elementType="road" elementId="3" contactPoint="start"/>')
+    .replace('<successor id="-1"/>', "")
+    + _road(3)
+    + _road(4)
+    + _road(5, '<successor elementType="junction" elementId="9"/>')
+    + _road(6, "", junction="9")
+    + """<junction id="9">
+<connection id="0" incomingRoad="5" connectingRoad="6" contactPoint="start">
+<laneLink from="-1" to="-1"/>
+</connection>
+</junction>
+</OpenDRIVE>
+"""
+)
+
+SCENARIO = """<?xml version="1.0" encoding="UTF-8"?>
+<OpenSCENARIO>
+<ParameterDeclarations>
+<ParameterDeclaration name="StartS" parameterType="double" value="5"/>
+</ParameterDeclarations>
+<Entities>
+<ScenarioObject name="npc"/>
+<ScenarioObject name="Ego"/>
+</Entities>
+<Storyboard><Init><Actions>
+<Private entityRef="Ego"><PrivateAction><TeleportAction><Position>
+<LanePosition roadId="1" laneId="-1" s="$StartS" offset="0"/>
+</Position></TeleportAction></PrivateAction></Private>
+</Actions></Init></Storyboard>
+</OpenSCENARIO>
+"""
+
+
+@pytest.fixture
+def map_file(tmp_path):
+    path = tmp_path / "maps" / "town.xodr"
+    path.parent.mkdir()
+    path.write_text(MAP, encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def graph(map_file):
+    return LaneGraph.from_xodr(map_file)
+
+
+def test_lane_and_junction_links_reach_the_next_road(graph):
+    assert graph.reachable(("1", 0, -1), ("2", 0, -1)) is True
+    assert graph.reachable(("5", 0, -1), ("6", 0, -1)) is True
+    # Lane changes to the neighbouring drivable lane.
+    assert graph.reachable(("1", 0, -2), ("2", 0, -1)) is True
+    assert ("1", 0, -3) not in graph.edges
+
+
+def test_disconnected_roads_are_unreachable(graph):
+    assert graph.reachable(("5", 0, -1), ("4", 0, -1)) is False
+    # Against the driving direction.
+    assert graph.reachable(("6", 0, -1), ("5", 0, -1)) is False
+
+
+def test_road_link_without_lane_links_cannot_tell(graph):
+    assert ("2", 0, -1) in graph.uncertain
+    assert graph.reachable(("1", 0, -1), ("3", 0, -1)) is None
+
+
+def test_ego_is_picked_by_name():
+    assert _ego_entity(["npc", "Ego"], None) == "Ego"
+    assert _ego_entity(["npc", "car"], "car") == "car"
+    assert _ego_entity(["lead"], None) == "lead"
+    assert _ego_entity(["npc", "car"], None) is None
+
+
+def test_scenario_start_resolves_declared_parameters(tmp_path):
+    path = tmp_path / "cut_in.xosc"
+    path.write_text(SCENARIO, encoding="utf-8")
+
+    assert scenario_start(path) == ("LanePosition", ["1", "-1", "5", "0"])
+    # A swept start is only known once the iteration runs.
+    assert scenario_start(path, swept={"StartS"}) is None
+
+
+@pytest.mark.parametrize(
+    "start_road, goal, expected",
+    [
+        (5, [6, -1, 50], None),
+        (5, [4, -1, 50], "not reachable"),
+        (1, [2, -1, 50], None),
+        # Past the link without lane links the preflight cannot tell.
+        (1, [4, -1, 50], None),
+    ],
+)
+def test_check_route(tmp_path, map_file, start_road, goal, expected):
+    scenario_dir = tmp_path / "scenarios"
+    scenario_dir.mkdir()
+    scenario = SCENARIO.replace('roadId="1"', f'roadId="{start_road}"')
+    (scenario_dir / "cut_in.xosc").write_text(scenario, encoding="utf-8")
+
+    reason = check_route(
+        {
+            "title": "cut_in",
+            "scenario_path": str(scenario_dir),
+            "goal_config": {"position": {"type": "LanePosition", "value": goal}},
+        },
+        {"name": "town", "xodr_path": str(map_file.parent)},
+    )
+
+    if expected is None:
+        assert reason is None
+    else:
+        assert expected in reason
@@ -0,0 +1,81 @@
+from concurrent.futures import Future
+import time
+
+import pytest
+
+pytest.importorskip("grpc")
+
+from executor.runner.utils.metrics import LatencyRecorder  # noqa: E402
+from executor.runner.utils.quit_check import (  # noqa: E402
+    PendingQuitCheck,
+    QuitCheckMode,
+    QuitCheckPolicy,
+    resolve_should_quit,
+)
+
+
+class Response:
+    def __init__(self, should_quit: bool):
+        self.should_quit = should_quit
+
+
+def test_policy_from_spec():
+    assert QuitCheckPolicy.from_spec(None) == QuitCheckPolicy()
+    assert QuitCheckPolicy.from_spec("concurrent").mode == QuitCheckMode.CONCURRENT
+    policy = QuitCheckPolicy.from_spec({"mode": "interval", "interval": 4})
+    assert (policy.mode, policy.interval) == (QuitCheckMode.INTERVAL, 4)
+    with pytest.raises(ValueError):
+        QuitCheckPolicy.from_spec({"mode": "interval", "interval": 0})
+    with pytest.raises(ValueError):
+        QuitCheckPolicy.from_spec("sometimes")
+
+
+def test_blocking_polls_are_due_by_mode():
+    every_tick = QuitCheckPolicy()
+    interval = QuitCheckPolicy(QuitCheckMode.INTERVAL, 3)
+    concurrent = QuitCheckPolicy(QuitCheckMode.CONCURRENT, 3)
+    step_flag = QuitCheckPolicy(QuitCheckMode.STEP_FLAG, 3)
+
+    assert all(every_tick.should_poll(tick) for tick in range(6))
+    assert [interval.should_poll(tick) for tick in range(6)] == [
+        True,
+        False,
+        False,
+        True,
+        False,
+        False,
+    ]
+    assert not any(concurrent.should_poll(tick) for tick in range(6))
+    assert not any(step_flag.should_poll(tick, True) for tick in range(6))
+    # Without the flag on the step responses it falls back to the interval.
+    assert step_flag.should_poll(3, False) and not step_flag.should_poll(4, False)
+
+
+def test_concurrent_checks_are_issued_every_interval():
+    concurrent = QuitCheckPolicy(QuitCheckMode.CONCURRENT, 2)
+
+    assert [concurrent.concurrent_due(tick) for tick in range(4)] == [
+        True,
+        False,
+        True,
+        False,
+    ]
+    assert not QuitCheckPolicy(QuitCheckMode.INTERVAL).concurrent_due(0)
+
+
+def test_pending_check_records_the_latency_until_the_answer():
+    metrics = LatencyRecorder()
+    future = Future()
+    pending = PendingQuitCheck(future, time.perf_counter_ns(), metrics)
+    time.sleep(0.01)
+    future.set_result(Response(True))
+    # Resolving later does not add to the recorded latency.
+    time.sleep(0.05)
+
+    assert resolve_should_quit(pending)
+    latency_ns = metrics.histograms["should_quit"].max
+    assert 10_000_000 <= latency_ns < 50_000_000
+
+
+def test_unconnected_service_counts_as_quitting():
+    assert resolve_should_quit(None)
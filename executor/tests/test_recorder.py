@@ -0,0 +1,102 @@
+import queue
+
+import pytest
+
+from executor.runner.utils import recorder as recorder_module
+from executor.runner.utils.recorder import TrajectoryReader, TrajectoryRecorder
+
+
+class Message:
+    """Stand-in for a protobuf message."""
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+    def SerializeToString(self) -> bytes:
+        return self.data
+
+
+def _full(item):
+    raise queue.Full
+
+
+def _record(path, ticks, chunk_ticks=16, ctrl=True):
+    with TrajectoryRecorder(path, chunk_ticks=chunk_ticks) as recorder:
+        for tick in ticks:
+            objects = [Message(b"ego%d" % tick), Message(b"npc%d" % tick)]
+            command = Message(b"ctrl%d" % tick) if ctrl else None
+            recorder.record(tick, tick * 50_000_000, objects, command)
+    return recorder
+
+
+def test_recorded_ticks_read_back_in_order(tmp_path):
+    path = tmp_path / "trajectory.sbtr"
+    recorder = _record(path, range(100))
+
+    assert recorder.recorded == 100
+    with TrajectoryReader(path) as reader:
+        assert reader.dropped == 0
+        assert len(reader) == 100
+        assert len(reader.chunks) == 7
+        records = list(reader)
+    assert [r.tick for r in records] == list(range(100))
+    assert records[42].sim_time_ns == 42 * 50_000_000
+    assert records[42].objects == [b"ego42", b"npc42"]
+    assert records[42].ctrl == b"ctrl42"
+
+
+def test_read_seeks_to_a_tick_range(tmp_path):
+    path = tmp_path / "trajectory.sbtr"
+    _record(path, range(100))
+
+    with TrajectoryReader(path) as reader:
+        assert [r.tick for r in reader.read(37, 41)] == [37, 38, 39, 40]
+        assert [r.tick for r in reader.read(95)] == list(range(95, 100))
+
+
+def test_missing_control_is_recorded_empty(tmp_path):
+    path = tmp_path / "trajectory.sbtr"
+    _record(path, range(3), ctrl=False)
+
+    with TrajectoryReader(path) as reader:
+        assert [r.ctrl for r in reader] == [b"", b"", b""]
+
+
+def test_file_without_footer_is_rebuilt_from_its_chunks(tmp_path):
+    path = tmp_path / "trajectory.sbtr"
+    _record(path, range(40))
+    data = path.read_bytes()
+    # Cut off the index and footer, as if the writer had died.
+    with TrajectoryReader(path) as reader:
+        end = max(c.offset for c in reader.chunks)
+    path.write_bytes(data[:end])
+
+    with TrajectoryReader(path) as reader:
+        assert reader.dropped is None
+        assert [r.tick for r in reader] == list(range(32))
+
+
+def test_full_queue_drops_ticks_and_counts_them(tmp_path, monkeypatch):
+    path = tmp_path / "trajectory.sbtr"
+    recorder = TrajectoryRecorder(path, queue_size=1)
+    # Keep the writer from draining the queue while the ticks come in.
+    monkeypatch.setattr(recorder._queue, "put_nowait", _full)
+    for tick in range(5):
+        recorder.record(tick, 0, [], None)
+    monkeypatch.undo()
+    recorder.close()
+
+    assert recorder.dropped == 5
+    with TrajectoryReader(path) as reader:
+        assert reader.dropped == 5
+
+
+def test_other_format_versions_are_refused(tmp_path):
+    path = tmp_path / "trajectory.sbtr"
+    _record(path, range(3))
+    data = bytearray(path.read_bytes())
+    data[4:6] = (recorder_module.VERSION + 1).to_bytes(2, "little")
+    path.write_bytes(bytes(data))
+
+    with pytest.raises(ValueError, match="version"):
+        TrajectoryReader(path)
@@ -0,0 +1,91 @@
+import pytest
+
+pytest.importorskip("grpc")
+pytest.importorskip("sbsvf_api")
+
+from executor.runner.replay import (  # noqa: E402
+    ReplayAV,
+    load_replay_params,
+    save_replay_params,
+)
+from executor.runner.runner import Runner  # noqa: E402
+from executor.runner.utils.recorder import (  # noqa: E402
+    TrajectoryReader,
+    TrajectoryRecorder,
+)
+
+
+def _commands(count):
+    from google.protobuf.struct_pb2 import Struct
+    from sbsvf_api import control_pb2
+
+    commands = []
+    for tick in range(count):
+        payload = Struct()
+        payload.update({"tick": tick})
+        commands.append(control_pb2.CtrlCmd(payload=payload))
+    return commands
+
+
+def test_replay_hands_back_the_recorded_controls(tmp_path):
+    path = tmp_path / "trajectory.sbtr"
+    ctrls = _commands(4)
+    with TrajectoryRecorder(path) as recorder:
+        for tick, ctrl in enumerate(ctrls):
+            recorder.record(tick, tick, [], ctrl)
+
+    replay = ReplayAV(path)
+    assert replay.reset("out", None, None) == ctrls[0]
+    for tick in range(1, 4):
+        assert not replay.should_quit()
+        assert replay.step(None, tick) == ctrls[tick]
+    # The simulator has not been stepped with the last command yet.
+    assert not replay.exhausted
+    replay.step(None, 4)
+    assert replay.exhausted
+    assert replay.should_quit()
+
+
+def test_replay_refuses_a_recording_with_gaps(tmp_path):
+    path = tmp_path / "trajectory.sbtr"
+    with TrajectoryRecorder(path) as recorder:
+        for tick, ctrl in zip((0, 1, 3), _commands(3)):
+            recorder.record(tick, tick, [], ctrl)
+
+    with pytest.raises(ValueError, match="missing"):
+        ReplayAV(path)
+
+
+def test_params_are_kept_next_to_the_trajectory(tmp_path):
+    save_replay_params(tmp_path, {"speed": 12.5, "weather": "rain"})
+
+    params = load_replay_params(tmp_path / "trajectory.sbtr")
+    assert params == {"speed": 12.5, "weather": "rain"}
+    assert load_replay_params(tmp_path / "other" / "trajectory.sbtr") is None
+
+
+def test_recorded_iteration_replays_without_the_av(
+    workspace, make_runner, run_iteration
+):
+    recorded = run_iteration(make_runner(Runner, "recorded", record={"enabled": True}))
+    trajectory = workspace.root / "recorded" / "iteration_1" / "trajectory.sbtr"
+
+    replayed = run_iteration(
+        make_runner(
+            Runner,
+            "replayed",
+            record={"enabled": True},
+            replay={"trajectory": str(trajectory)},
+        )
+    )
+
+    assert replayed["metrics"]["ticks"] == recorded["metrics"]["ticks"]
+    with (
+        TrajectoryReader(trajectory) as original,
+        TrajectoryReader(
+            workspace.root / "replayed" / "iteration_1" / "trajectory.sbtr"
+        ) as replay,
+    ):
+        assert replay.dropped == 0
+        for a, b in zip(original, replay, strict=True):
+            assert (a.tick, a.ctrl, a.objects) == (b.tick, b.ctrl, b.objects)
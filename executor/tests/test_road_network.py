@@ -0,0 +1,91 @@
+import os
+import threading
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("sbsvf_api")
+
+from executor.runner.utils import road_network  # noqa: E402
+from executor.runner.utils.position import (  # noqa: E402
+    LanePosition,
+    Position,
+    WorldPosition,
+)
+from executor.runner.utils.road_network import GoalMemo, map_key  # noqa: E402
+
+
+def _position(s):
+    return Position(
+        lane=LanePosition(road_id=1, lane_id=-1, s=s, offset=0.0),
+        world=WorldPosition(x=s, y=0.0, z=0.0, h=0.0, p=0.0, r=0.0, h_relative=0.0),
+    )
+
+
+@pytest.fixture
+def xodr(tmp_path):
+    path = tmp_path / "map.xodr"
+    path.write_text("<OpenDRIVE/>", encoding="utf-8")
+    return path
+
+
+def test_memo_round_trips_through_its_file(tmp_path):
+    GoalMemo(tmp_path).put("key", "LanePosition", [1, -1, 5.0], _position(5.0))
+
+    memo = GoalMemo(tmp_path)
+    assert memo.get("key", "LanePosition", [1, -1, 5]) == _position(5.0)
+    assert memo.get("key", "LanePosition", [1, -1, 6]) is None
+    assert memo.get("other", "LanePosition", [1, -1, 5]) is None
+
+
+def test_writes_merge_the_entries_of_other_memos(tmp_path):
+    first, second = GoalMemo(tmp_path), GoalMemo(tmp_path)
+    # Both have read the (empty) file before either writes.
+    assert first.get("key", "LanePosition", [0]) is None
+    assert second.get("key", "LanePosition", [0]) is None
+
+    def put(memo, start):
+        for s in range(start, 100, 4):
+            memo.put("key", "LanePosition", [s], _position(float(s)))
+
+    memos = [first, second, GoalMemo(tmp_path), GoalMemo(tmp_path)]
+    threads = [
+        threading.Thread(target=put, args=(memo, i)) for i, memo in enumerate(memos)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    memo = GoalMemo(tmp_path)
+    for s in range(100):
+        assert memo.get("key", "LanePosition", [s]) == _position(float(s))
+
+
+def test_map_key_changes_with_the_map_and_the_library(tmp_path, xodr):
+    rmlib = tmp_path / "libesminiRMLib.so"
+    rmlib.write_bytes(b"v1")
+    key = map_key(xodr, rmlib)
+
+    assert map_key(xodr, rmlib) == key
+    assert map_key(xodr) != key
+    assert map_key(xodr, tmp_path / "other.so") != key
+
+    stat = rmlib.stat()
+    os.utime(rmlib, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert map_key(xodr, rmlib) != key
+
+    plain = map_key(xodr)
+    xodr.write_text("<OpenDRIVE></OpenDRIVE>", encoding="utf-8")
+    assert map_key(xodr) != plain
+
+
+def test_resolve_position_answers_from_the_memo(tmp_path, xodr, monkeypatch):
+    rmlib = tmp_path / "missing" / "libesminiRMLib.so"
+    memo = GoalMemo(tmp_path)
+    memo.put(map_key(xodr, rmlib), "WorldPosition", [3, 0, 0], _position(3.0))
+    monkeypatch.setattr(road_network, "_memo", GoalMemo(tmp_path))
+
+    # A hit never loads the RoadManager library.
+    pos = road_network.resolve_position("WorldPosition", [3, 0, 0], xodr, rmlib)
+    assert pos == _position(3.0)
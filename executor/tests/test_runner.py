@@ -0,0 +1,26 @@
+import pytest
+
+pytest.importorskip("grpc")
+pytest.importorskip("sbsvf_api")
+
+from executor.runner.async_runner import AsyncRunner  # noqa: E402
+from executor.runner.runner import Runner  # noqa: E402
+
+TICKS = 5
+
+
+@pytest.mark.parametrize("runner_class", [Runner, AsyncRunner])
+@pytest.mark.parametrize("mode", ["interval", "concurrent", "step_flag"])
+def test_quit_check_modes_end_the_episode(
+    make_runner, run_iteration, runner_class, mode
+):
+    runner = make_runner(runner_class, quit_check={"mode": mode, "interval": 2})
+    result = run_iteration(runner)
+
+    assert result["quit_reason"] == "simulator"
+    # Concurrent and interval checks may run one more tick.
+    assert TICKS <= result["metrics"]["ticks"] <= TICKS + 2
+    if mode == "concurrent":
+        # Issued every other tick; their latency is recorded once resolved.
+        should_quit = result["metrics"]["sim"]["should_quit"]["count"]
+        assert 0 < should_quit < result["metrics"]["ticks"]
@@ -0,0 +1,116 @@
+import math
+from types import SimpleNamespace
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("sbsvf_api")
+
+from executor.runner.monitor.base import MonitorStage, find_ego  # noqa: E402
+from executor.runner.monitor.safety import (  # noqa: E402
+    CollisionMonitor,
+    TTCMonitor,
+    obb_overlap,
+    time_to_collision,
+)
+
+CAR = (4.5, 1.8)
+
+
+def _frame(*objects):
+    """Frame of (x, y, yaw, speed, length, width) rows, the ego first."""
+    columns = np.array(objects, dtype=np.float64).T
+    names = ("x", "y", "yaw", "speed", "length", "width")
+    return dict(zip(names, columns))
+
+
+def _car(x, y=0.0, yaw=0.0, speed=0.0, size=CAR):
+    return (x, y, yaw, speed, *size)
+
+
+class ObjectMessage:
+    """Stand-in for `object_pb2.ObjectState`."""
+
+    def __init__(self, name, x, y=0.0, speed=0.0):
+        self.name = name
+        self.type = 1
+        self.shape = None
+        self.kinematic = SimpleNamespace(
+            time_ns=0,
+            x=x,
+            y=y,
+            z=0.0,
+            yaw=0.0,
+            speed=speed,
+            acceleration=0.0,
+            yaw_rate=0.0,
+            yaw_acceleration=0.0,
+        )
+
+    def HasField(self, name):
+        return getattr(self, name) is not None
+
+
+def test_boxes_overlap_by_the_separating_axis_test():
+    frame = _frame(
+        _car(0.0),
+        _car(4.0),  # Bumper to bumper.
+        _car(5.0),  # Just ahead.
+        _car(0.0, 2.0, yaw=math.pi / 2),  # Turned across the ego's side.
+        _car(0.0, 2.0),  # Alongside.
+        # The corner of a tilted box next to the ego's corner: the axis
+        # aligned boxes overlap, the rotated ones do not.
+        _car(2.85, 1.5, yaw=math.pi / 4, size=(1.0, 1.0)),
+    )
+
+    np.testing.assert_array_equal(obb_overlap(frame), [True, False, True, False, False])
+
+
+def test_time_to_collision_of_circles_at_constant_velocity():
+    reach = math.hypot(*CAR)
+    frame = _frame(
+        _car(0.0, speed=10.0),
+        _car(50.0, yaw=math.pi, speed=10.0),  # Head on.
+        _car(-50.0, yaw=math.pi, speed=10.0),  # Driving away.
+        _car(20.0, speed=10.0),  # Same velocity.
+        _car(3.0),  # Already touching.
+    )
+
+    ttc = time_to_collision(frame)
+    assert ttc[0] == pytest.approx((50.0 - reach) / 20.0)
+    assert ttc[1:3].tolist() == [math.inf, math.inf]
+    assert ttc[3] == 0.0
+
+
+def test_ego_is_found_by_name_or_id():
+    objects = [SimpleNamespace(name="npc"), SimpleNamespace(name="", id="Hero")]
+
+    assert find_ego(objects, ("ego", "hero")) == 1
+    assert find_ego(objects, ("npc",)) == 0
+    assert find_ego(objects, ("truck",)) is None
+    assert find_ego(objects + [SimpleNamespace(name="HERO")], ("hero",)) is None
+
+
+def test_stage_puts_the_ego_first_wherever_it_is_observed():
+    collision, ttc = CollisionMonitor(), TTCMonitor({"stop_below_s": 0.5})
+    stage = MonitorStage([collision, ttc])
+    stage.reset(None)
+
+    stage(0, 0, [ObjectMessage("npc", 30.0), ObjectMessage("ego", 0.0, speed=10.0)])
+    assert stage.stopped_by is None
+    stage(1, 50_000_000, [ObjectMessage("npc", 4.0), ObjectMessage("ego", 0.0)])
+    assert stage.stopped_by == ("collision", "collision")
+    assert collision.result()["slot"] == 0
+
+    results = stage.results()
+    assert results["collision"]["collided"]
+    assert results["ttc"]["min_ttc_s"] == 0.0
+
+
+def test_stage_skips_ticks_without_a_single_ego():
+    stage = MonitorStage([CollisionMonitor()])
+    stage.reset(None)
+
+    stage(0, 0, [ObjectMessage("npc", 0.0), ObjectMessage("car", 1.0)])
+    assert stage.stopped_by is None
+    assert stage.results()["skipped_ticks"] == 1
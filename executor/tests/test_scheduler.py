@@ -0,0 +1,108 @@
+import math
+
+import pytest
+
+from executor.runner.utils import scheduler as scheduler_module
+from executor.runner.utils.scheduler import PacePolicy, TickScheduler
+
+MS = 1_000_000
+
+
+class Clock:
+    """Monotonic clock that only moves when slept on or told to."""
+
+    def __init__(self):
+        self.now_ns = 0
+
+    def perf_counter_ns(self):
+        return self.now_ns
+
+    def sleep(self, seconds):
+        self.now_ns += round(seconds * 1e9)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(scheduler_module, "perf_counter_ns", clock.perf_counter_ns)
+    monkeypatch.setattr(scheduler_module, "sleep", clock.sleep)
+    # Sleep the whole wait; the fake clock has no timer slack to spin off.
+    monkeypatch.setattr(TickScheduler, "SPIN_NS", 0)
+    return clock
+
+
+def test_pace_policy_from_spec():
+    assert PacePolicy.from_spec(None) == PacePolicy()
+    assert PacePolicy.from_spec(2).real_time_factor == 2.0
+    assert PacePolicy.from_spec("max").real_time_factor is None
+    assert PacePolicy.from_spec(math.inf).real_time_factor is None
+    policy = PacePolicy.from_spec({"real_time_factor": 0.5, "max_lag_ticks": 2})
+    assert policy == PacePolicy(real_time_factor=0.5, max_lag_ticks=2)
+    for spec in (0, -1.0, {"max_lag_ticks": 0}):
+        with pytest.raises(ValueError):
+            PacePolicy.from_spec(spec)
+
+
+def test_ticks_wait_for_their_absolute_deadlines(clock):
+    scheduler = TickScheduler(50 * MS, PacePolicy(real_time_factor=2.0))
+    scheduler.start()
+
+    assert scheduler.period_ns == 25 * MS
+    clock.now_ns += 10 * MS
+    assert scheduler.advance() == 50 * MS
+    scheduler.wait()
+    assert clock.now_ns == 25 * MS
+
+    # Tick 2 finishes late; tick 3 makes up for it.
+    clock.now_ns = 60 * MS
+    scheduler.advance()
+    scheduler.wait()
+    assert clock.now_ns == 60 * MS
+    clock.now_ns += 5 * MS
+    scheduler.advance()
+    scheduler.wait()
+    assert clock.now_ns == 75 * MS
+
+    summary = scheduler.summary()
+    assert summary["overrun"]["count"] == 1
+    assert summary["overrun"]["max_ns"] == 10 * MS
+    assert summary["rebases"] == 0
+    assert summary["sleep_ns"] == 25 * MS
+
+
+def test_schedule_restarts_after_falling_too_far_behind(clock):
+    scheduler = TickScheduler(
+        50 * MS, PacePolicy(real_time_factor=2.0, max_lag_ticks=4)
+    )
+    scheduler.start()
+
+    # 175 ms late is more than 4 periods: pace from here on.
+    clock.now_ns = 200 * MS
+    scheduler.advance()
+    scheduler.wait()
+    assert clock.now_ns == 200 * MS
+    scheduler.advance()
+    scheduler.wait()
+    assert clock.now_ns == 225 * MS
+    assert scheduler.rebases == 1
+
+
+def test_unpaced_ticks_never_wait(clock):
+    scheduler = TickScheduler(50 * MS)
+    scheduler.start()
+
+    assert not scheduler.paced
+    assert scheduler.advance() == 50 * MS
+    scheduler.wait()
+    assert clock.now_ns == 0
+
+
+def test_wall_clock_ticks_advance_by_the_elapsed_time(clock):
+    scheduler = TickScheduler(0, PacePolicy(real_time_factor=2.0))
+    scheduler.start()
+
+    assert scheduler.real_time_factor is None
+    clock.now_ns += 30 * MS
+    assert scheduler.advance() == 30 * MS
+    clock.now_ns += 12 * MS
+    assert scheduler.advance() == 12 * MS
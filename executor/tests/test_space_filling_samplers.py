@@ -0,0 +1,105 @@
+import json
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from executor.runner.sampler.base import Shard  # noqa: E402
+from executor.runner.sampler.latin_hypercube_sampler import (  # noqa: E402
+    LatinHypercubeSampler,
+)
+from executor.runner.sampler.sobol_sampler import SobolSampler  # noqa: E402
+
+DISTRIBUTION = """<?xml version="1.0" encoding="UTF-8"?>
+<OpenSCENARIO>
+<FileHeader revMajor="1" revMinor="2" description="test"/>
+<ParameterValueDistribution>
+<ScenarioFile filepath="test.xosc"/>
+<Deterministic>
+<DeterministicSingleParameterDistribution parameterName="speed">
+<DistributionRange stepWidth="2.5"><Range lowerLimit="10" upperLimit="20"/>
+</DistributionRange>
+</DeterministicSingleParameterDistribution>
+<DeterministicSingleParameterDistribution parameterName="gap">
+<DistributionRange stepWidth="0.5"><Range lowerLimit="0" upperLimit="50"/>
+</DistributionRange>
+</DeterministicSingleParameterDistribution>
+<DeterministicSingleParameterDistribution parameterName="weather">
+<DistributionSet><Element value="sun"/><Element value="rain"/></DistributionSet>
+</DeterministicSingleParameterDistribution>
+</Deterministic>
+</ParameterValueDistribution>
+</OpenSCENARIO>
+"""
+
+
+@pytest.fixture
+def make_sampler(tmp_path):
+    distribution_file = tmp_path / "test_param.xosc"
+    distribution_file.write_text(DISTRIBUTION, encoding="utf-8")
+
+    def make(sampler_class, shard=None, **cfg):
+        cfg_path = tmp_path / "sampler.json"
+        cfg_path.write_text(json.dumps(cfg), encoding="utf-8")
+        return sampler_class(
+            cfg_path=cfg_path, param_range_file=distribution_file, shard=shard
+        )
+
+    return make
+
+
+def _points(sampler):
+    points = {}
+    while (params := sampler.next()) is not None:
+        assert sampler.point(sampler.last_index) == params
+        points[sampler.last_index] = params
+    return points
+
+
+@pytest.mark.parametrize("sampler_class", [LatinHypercubeSampler, SobolSampler])
+def test_index_maps_to_the_same_point_every_run(make_sampler, sampler_class):
+    full = _points(make_sampler(sampler_class, budget=16, seed=7))
+
+    assert full == _points(make_sampler(sampler_class, budget=16, seed=7))
+    sharded = {}
+    for index in range(2):
+        shard = Shard.from_spec({"index": index, "count": 2})
+        sharded.update(
+            _points(make_sampler(sampler_class, shard=shard, budget=16, seed=7))
+        )
+    assert sharded == full
+
+
+@pytest.mark.parametrize("sampler_class", [LatinHypercubeSampler, SobolSampler])
+def test_every_coordinate_hits_each_stratum_once(make_sampler, sampler_class):
+    sampler = make_sampler(sampler_class, seed=3)
+    unit = sampler._unit_points(64, 3)
+
+    assert unit.shape == (64, 3)
+    assert ((unit >= 0) & (unit < 1)).all()
+    for dim in range(3):
+        strata = np.sort((unit[:, dim] * 64).astype(int))
+        assert (strata == np.arange(64)).all()
+
+
+def test_unscrambled_sobol_matches_the_reference_sequence(make_sampler):
+    sampler = make_sampler(SobolSampler, scramble=False)
+    unit = sampler._unit_points(8, 2)
+
+    np.testing.assert_array_equal(
+        unit[:, 0], [0, 0.5, 0.75, 0.25, 0.375, 0.875, 0.625, 0.125]
+    )
+    np.testing.assert_array_equal(
+        unit[:, 1], [0, 0.5, 0.25, 0.75, 0.375, 0.875, 0.125, 0.625]
+    )
+
+
+def test_unsnapped_ranges_are_continuous(make_sampler):
+    sampler = make_sampler(LatinHypercubeSampler, budget=32, snap_to_grid=False)
+    points = list(_points(sampler).values())
+
+    assert len(points) == 32
+    speeds = [float(p["speed"]) for p in points]
+    assert all(10 <= speed <= 20 for speed in speeds)
+    assert any(speed % 2.5 for speed in speeds)
+    assert {p["weather"] for p in points} == {"sun", "rain"}
@@ -0,0 +1,90 @@
+from dataclasses import dataclass
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("sbsvf_api")
+
+from executor.runner.utils.position import (  # noqa: E402
+    LanePosition,
+    Position,
+    WorldPosition,
+)
+from executor.runner.utils.sps import (  # noqa: E402
+    EgoConfig,
+    GoalConfig,
+    ScenarioPack,
+    _ProtobufMemo,
+)
+
+
+@dataclass
+class Leaf(_ProtobufMemo):
+    value: list
+
+    def to_protobuf(self):
+        return self._memoized((), lambda: {"value": list(self.value)})
+
+
+@dataclass
+class Node(_ProtobufMemo):
+    leaf: Leaf
+    label: str = ""
+
+    def to_protobuf(self):
+        return self._memoized(
+            (self.leaf.to_protobuf(),),
+            lambda leaf: {"leaf": leaf, "label": self.label},
+        )
+
+
+def test_message_is_reused_until_a_field_is_reassigned():
+    leaf = Leaf([1])
+    first = leaf.to_protobuf()
+
+    assert leaf.to_protobuf() is first
+    leaf.value = [2]
+    assert leaf.to_protobuf() == {"value": [2]}
+
+
+def test_in_place_changes_need_invalidate():
+    leaf = Leaf([1])
+    leaf.to_protobuf()
+    leaf.value.append(2)
+
+    assert leaf.to_protobuf() == {"value": [1]}
+    leaf.invalidate()
+    assert leaf.to_protobuf() == {"value": [1, 2]}
+
+
+def test_parent_is_rebuilt_when_a_nested_message_is():
+    node = Node(Leaf([1]), "a")
+    first = node.to_protobuf()
+
+    assert node.to_protobuf() is first
+    node.leaf.value = [3]
+    assert node.to_protobuf() == {"leaf": {"value": [3]}, "label": "a"}
+    node.leaf = Leaf([4])
+    assert node.to_protobuf()["leaf"] == {"value": [4]}
+
+
+def test_scenario_pack_message_follows_its_fields():
+    position = Position(
+        lane=LanePosition(road_id=1, lane_id=-1, s=5.0, offset=0.0),
+        world=WorldPosition(x=5, y=0, z=0, h=0, p=0, r=0, h_relative=0),
+    )
+    pack = ScenarioPack(
+        name="cut_in",
+        map_name="town",
+        scenarios={"xosc": Path("/scenarios/cut_in")},
+        param_range_file=None,
+        ego=EgoConfig(target_speed=10.0, goal=GoalConfig(position=position)),
+    )
+    first = pack.to_protobuf()
+
+    assert pack.to_protobuf() is first
+    pack.ego.target_speed = 12.0
+    assert pack.to_protobuf().ego.target_speed == 12.0
+    pack.timeout_ns = 5
+    assert pack.to_protobuf().timeout_ns == 5
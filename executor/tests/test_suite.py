@@ -0,0 +1,25 @@
+import os
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("sbsvf_api")
+
+from executor.bench.suite import Workspace  # noqa: E402
+from executor.runner.utils import road_network  # noqa: E402
+
+
+def test_workspace_lends_its_goal_memo_until_closed(tmp_path, monkeypatch):
+    monkeypatch.delenv("SBSVF_CACHE_DIR", raising=False)
+    previous = road_network._memo
+
+    with Workspace(tmp_path) as workspace:
+        memo = road_network._memo
+        assert memo is not previous
+        assert memo.cache_dir.is_relative_to(tmp_path)
+        goal = workspace.scenario_spec()["goal_config"]["position"]
+        xodr_key = road_network.map_key(workspace.xodr, workspace.rmlib)
+        assert memo.get(xodr_key, goal["type"], goal["value"]) is not None
+
+    assert road_network._memo is previous
+    assert "SBSVF_CACHE_DIR" not in os.environ
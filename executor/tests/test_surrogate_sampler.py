@@ -0,0 +1,102 @@
+import json
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from executor.runner.sampler.surrogate_sampler import (  # noqa: E402
+    SurrogateSampler,
+)
+
+GRID = """<?xml version="1.0" encoding="UTF-8"?>
+<OpenSCENARIO>
+<FileHeader revMajor="1" revMinor="2" description="test"/>
+<ParameterValueDistribution>
+<ScenarioFile filepath="test.xosc"/>
+<Deterministic>
+<DeterministicSingleParameterDistribution parameterName="speed">
+<DistributionRange stepWidth="1"><Range lowerLimit="0" upperLimit="9"/>
+</DistributionRange>
+</DeterministicSingleParameterDistribution>
+<DeterministicSingleParameterDistribution parameterName="gap">
+<DistributionRange stepWidth="1"><Range lowerLimit="0" upperLimit="9"/>
+</DistributionRange>
+</DeterministicSingleParameterDistribution>
+</Deterministic>
+</ParameterValueDistribution>
+</OpenSCENARIO>
+"""
+
+
+@pytest.fixture
+def make_sampler(tmp_path):
+    grid_file = tmp_path / "test_param.xosc"
+    grid_file.write_text(GRID, encoding="utf-8")
+
+    def make(**cfg):
+        cfg_path = tmp_path / "sampler.json"
+        cfg_path.write_text(json.dumps({"seed": 1, **cfg}), encoding="utf-8")
+        return SurrogateSampler(cfg_path=cfg_path, param_range_file=grid_file)
+
+    return make
+
+
+def _result(index, status="succeeded", **metrics):
+    return {"index": index, "status": status, "metrics": metrics}
+
+
+def test_outcomes_score_failures_without_an_objective(make_sampler):
+    sampler = make_sampler()
+    sampler.update_with_results(
+        [
+            _result(0),
+            _result(1, "failed"),
+            _result(2, "stalled"),
+            _result(3, monitors={"collision": {"collided": True}}),
+        ]
+    )
+
+    assert sampler._y == [1.0, 0.0, 0.0, 0.0]
+    assert all(sampler.is_seen(index) for index in range(4))
+
+
+def test_unfinished_iterations_score_below_the_objective_threshold(make_sampler):
+    sampler = make_sampler(objective="metrics.min_ttc_s", failure_threshold=1.5)
+    sampler.update_with_results(
+        [
+            _result(0, min_ttc_s=4.0),
+            _result(1, "failed"),
+            _result(2, "stalled"),
+            # Succeeded but without the objective: nothing to learn from.
+            _result(3),
+        ]
+    )
+
+    assert sampler._y[0] == 4.0
+    assert all(value < 1.5 for value in sampler._y[1:])
+    assert len(sampler._y) == 3
+    assert not sampler.is_seen(3)
+
+
+def test_results_are_matched_to_grid_points_by_their_params(make_sampler):
+    sampler = make_sampler()
+    params = sampler.point(42)
+    sampler.update_with_results([{"params": params, "status": "succeeded"}])
+
+    assert sampler.is_seen(42)
+    assert sampler._y == [1.0]
+
+
+def test_proposals_stay_unseen_and_within_the_budget(make_sampler):
+    sampler = make_sampler(max_evaluations=20, initial_samples=5)
+    proposed = []
+    while (params := sampler.next()) is not None:
+        index = sampler.last_index
+        assert sampler.point(index) == params
+        proposed.append(index)
+        # Low speeds fail, so that the surrogate has something to chase.
+        status = "failed" if float(params["speed"]) < 3 else "succeeded"
+        sampler.update_with_results([_result(index, status)])
+
+    assert len(proposed) == 20
+    assert len(set(proposed)) == 20
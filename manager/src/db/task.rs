@@ -32,6 +32,47 @@ pub async fn create(
     active.insert(db).await
 }
 
+/// Create `shard_count` pending tasks that split the parameter grid of one
+/// plan between them. Shard `i` runs every `shard_count`-th grid point
+/// starting at `i`.
+pub async fn create_shards(
+    db: &DatabaseConnection,
+    plan_id: i32,
+    av_id: i32,
+    sampler_id: i32,
+    simulator_id: i32,
+    shard_count: i32,
+) -> Result<Vec<task::Model>, DbErr> {
+    let result = db
+        .transaction(|txn| {
+            Box::pin(async move {
+                let mut tasks = Vec::with_capacity(shard_count as usize);
+                for shard_index in 0..shard_count {
+                    let active = task::ActiveModel {
+                        plan_id: Set(plan_id),
+                        av_id: Set(av_id),
+                        sampler_id: Set(sampler_id),
+                        simulator_id: Set(simulator_id),
+                        task_status: Set(TaskStatus::Pending),
+                        retry_count: Set(0),
+                        shard_index: Set(Some(shard_index)),
+                        shard_count: Set(Some(shard_count)),
+                        ..Default::default()
+                    };
+                    tasks.push(active.insert(txn).await?);
+                }
+                Ok(tasks)
+            })
+        })
+        .await;
+
+    match result {
+        Ok(v) => Ok(v),
+        Err(TransactionError::Connection(e)) => Err(e),
+        Err(TransactionError::Transaction(e)) => Err(e),
+    }
+}
+
 pub async fn claim_task_with_filters(
     db: &DatabaseConnection,
     executor_id: i32,
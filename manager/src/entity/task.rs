@@ -15,6 +15,8 @@ pub struct Model {
     pub task_status: TaskStatus,
     pub created_at: DateTimeWithTimeZone,
     pub retry_count: i32,
+    pub shard_index: Option<i32>,
+    pub shard_count: Option<i32>,
 }
 
 #[derive(Copy, Clone, Debug, EnumIter, DeriveRelation)]
@@ -15,6 +15,15 @@ pub struct CreateTaskRequest {
     pub simulator_id: i32,
 }
 
+#[derive(Debug, Deserialize)]
+pub struct CreateShardedTaskRequest {
+    pub plan_id: i32,
+    pub av_id: i32,
+    pub sampler_id: i32,
+    pub simulator_id: i32,
+    pub shard_count: i32,
+}
+
 #[derive(Debug, Serialize)]
 pub struct TaskResponse {
     pub id: i32,
@@ -24,6 +33,8 @@ pub struct TaskResponse {
     pub sampler_id: i32,
     pub created_at: DateTime<Utc>,
     pub retry_count: i32,
+    pub shard_index: Option<i32>,
+    pub shard_count: Option<i32>,
 }
 
 impl From<task::Model> for TaskResponse {
@@ -36,6 +47,8 @@ impl From<task::Model> for TaskResponse {
             sampler_id: m.sampler_id,
             created_at: m.created_at.with_timezone(&Utc),
             retry_count: m.retry_count,
+            shard_index: m.shard_index,
+            shard_count: m.shard_count,
         }
     }
 }
@@ -60,14 +73,25 @@ pub struct ClaimTaskResponse {
     pub sampler: SamplerExecutionDto,
 }
 
+#[derive(Debug, Serialize)]
+pub struct TaskShardDto {
+    pub index: i32,
+    pub count: i32,
+}
+
 #[derive(Debug, Serialize)]
 pub struct TaskExecutionDto {
     pub id: i32,
+    pub shard: Option<TaskShardDto>,
 }
 
 impl From<task::Model> for TaskExecutionDto {
     fn from(m: task::Model) -> Self {
-        Self { id: m.id }
+        let shard = match (m.shard_index, m.shard_count) {
+            (Some(index), Some(count)) => Some(TaskShardDto { index, count }),
+            _ => None,
+        };
+        Self { id: m.id, shard }
     }
 }
 
@@ -3,7 +3,8 @@ use axum::{Json, extract::State, http::StatusCode};
 use crate::app_state::AppState;
 use crate::db;
 use crate::http::dto::task::{
-    ClaimTaskRequest, ClaimTaskResponse, CreateTaskRequest, TaskResponse, TaskRunUpdateRequest,
+    ClaimTaskRequest, ClaimTaskResponse, CreateShardedTaskRequest, CreateTaskRequest,
+    TaskResponse, TaskRunUpdateRequest,
 };
 use crate::service;
 
@@ -17,38 +18,57 @@ pub async fn list_tasks(
     Ok(Json(tasks.into_iter().map(TaskResponse::from).collect()))
 }
 
-pub async fn create_task(
-    State(state): State<AppState>,
-    Json(payload): Json<CreateTaskRequest>,
-) -> Result<Json<TaskResponse>, (StatusCode, &'static str)> {
-    if !db::plan::plan_exists(&state.db, payload.plan_id)
+async fn validate_task_references(
+    state: &AppState,
+    plan_id: i32,
+    av_id: i32,
+    sampler_id: i32,
+    simulator_id: i32,
+) -> Result<(), (StatusCode, &'static str)> {
+    if !db::plan::plan_exists(&state.db, plan_id)
         .await
         .map_err(|_| (StatusCode::INTERNAL_SERVER_ERROR, "db error"))?
     {
         return Err((StatusCode::BAD_REQUEST, "Plan does not exist"));
     }
 
-    if !db::av::av_exists(&state.db, payload.av_id)
+    if !db::av::av_exists(&state.db, av_id)
         .await
         .map_err(|_| (StatusCode::INTERNAL_SERVER_ERROR, "db error"))?
     {
         return Err((StatusCode::BAD_REQUEST, "AV does not exist"));
     }
 
-    if !db::sampler::sampler_exists(&state.db, payload.sampler_id)
+    if !db::sampler::sampler_exists(&state.db, sampler_id)
         .await
         .map_err(|_| (StatusCode::INTERNAL_SERVER_ERROR, "db error"))?
     {
         return Err((StatusCode::BAD_REQUEST, "Sampler does not exist"));
     }
 
-    if !db::simulator::simulator_exists(&state.db, payload.simulator_id)
+    if !db::simulator::simulator_exists(&state.db, simulator_id)
         .await
         .map_err(|_| (StatusCode::INTERNAL_SERVER_ERROR, "db error"))?
     {
         return Err((StatusCode::BAD_REQUEST, "Simulator does not exist"));
     }
 
+    Ok(())
+}
+
+pub async fn create_task(
+    State(state): State<AppState>,
+    Json(payload): Json<CreateTaskRequest>,
+) -> Result<Json<TaskResponse>, (StatusCode, &'static str)> {
+    validate_task_references(
+        &state,
+        payload.plan_id,
+        payload.av_id,
+        payload.sampler_id,
+        payload.simulator_id,
+    )
+    .await?;
+
     let task = db::task::create(
         &state.db,
         payload.plan_id,
@@ -62,6 +82,37 @@ pub async fn create_task(
     Ok(Json(TaskResponse::from(task)))
 }
 
+pub async fn create_sharded_tasks(
+    State(state): State<AppState>,
+    Json(payload): Json<CreateShardedTaskRequest>,
+) -> Result<Json<Vec<TaskResponse>>, (StatusCode, &'static str)> {
+    if payload.shard_count < 1 {
+        return Err((StatusCode::BAD_REQUEST, "shard_count must be at least 1"));
+    }
+
+    validate_task_references(
+        &state,
+        payload.plan_id,
+        payload.av_id,
+        payload.sampler_id,
+        payload.simulator_id,
+    )
+    .await?;
+
+    let tasks = db::task::create_shards(
+        &state.db,
+        payload.plan_id,
+        payload.av_id,
+        payload.sampler_id,
+        payload.simulator_id,
+        payload.shard_count,
+    )
+    .await
+    .map_err(|_| (StatusCode::INTERNAL_SERVER_ERROR, "db error"))?;
+
+    Ok(Json(tasks.into_iter().map(TaskResponse::from).collect()))
+}
+
 pub async fn claim_task(
     State(state): State<AppState>,
     Json(req): Json<ClaimTaskRequest>,
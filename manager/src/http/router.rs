@@ -41,6 +41,7 @@ pub fn create_router(state: AppState) -> Router {
             "/executor",
             get(handlers::executor::list_executors).post(handlers::executor::create_executor),
         )
+        .route("/task/shards", post(handlers::task::create_sharded_tasks))
         .route("/task/claim", post(handlers::task::claim_task))
         .route("/task/failed", post(handlers::task::task_failed))
         .route("/task/invalid", post(handlers::task::task_invalidated))
@@ -0,0 +1,47 @@
+// src/migrator/m20261017_120000_task_shard.rs
+
+use sea_orm_migration::prelude::*;
+
+pub struct Migration;
+
+impl MigrationName for Migration {
+    fn name(&self) -> &str {
+        "m20261017_120000_task_shard"
+    }
+}
+
+#[async_trait::async_trait]
+impl MigrationTrait for Migration {
+    async fn up(&self, manager: &SchemaManager) -> Result<(), DbErr> {
+        // A shard runs every `shard_count`-th grid point starting at
+        // `shard_index`; NULL means the task covers the whole grid.
+        manager
+            .alter_table(
+                Table::alter()
+                    .table(Task::Table)
+                    .add_column(ColumnDef::new(Task::ShardIndex).integer().null())
+                    .add_column(ColumnDef::new(Task::ShardCount).integer().null())
+                    .to_owned(),
+            )
+            .await
+    }
+
+    async fn down(&self, manager: &SchemaManager) -> Result<(), DbErr> {
+        manager
+            .alter_table(
+                Table::alter()
+                    .table(Task::Table)
+                    .drop_column(Task::ShardIndex)
+                    .drop_column(Task::ShardCount)
+                    .to_owned(),
+            )
+            .await
+    }
+}
+
+#[derive(DeriveIden)]
+enum Task {
+    Table,
+    ShardIndex,
+    ShardCount,
+}
@@ -3,11 +3,15 @@
 use sea_orm_migration::prelude::*;
 
 mod m20260305_155925_new_db_schema;
+mod m20261017_120000_task_shard;
 pub struct Migrator;
 
 #[async_trait::async_trait]
 impl MigratorTrait for Migrator {
     fn migrations() -> Vec<Box<dyn MigrationTrait>> {
-        vec![Box::new(m20260305_155925_new_db_schema::Migration)]
+        vec![
+            Box::new(m20260305_155925_new_db_schema::Migration),
+            Box::new(m20261017_120000_task_shard::Migration),
+        ]
     }
 }